@@ -0,0 +1,1105 @@
+"""识别性能基准测试
+
+在保存的截图上离线运行检测引擎，不需要Windows窗口或真实屏幕，例如:
+
+    python benchmark.py engine --frames debug --templates 1.png 2.png 3.png 4.png
+    python benchmark.py suite --frames synthetic --save baseline.json
+    python benchmark.py suite --frames synthetic --compare baseline.json
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from config import Config
+from core.matcher import ENGINE_EXACT, ENGINE_FFT, ENGINE_TEMPLATE, MATCH_ENGINES, ORDER_POSITION, TemplateMatcher, to_gray
+from core.templates import Template, TemplateRegistry, load_template, decode_image, read_image_bytes
+from core.template_cache import TemplateCache, compile_template
+from core.tracker import RoiTracker
+from core.scales import ScaleCache
+from core.color_key import ColorKeyFilter
+from core.change_detector import FrameChangeDetector
+from core.capture import FRAME_SOURCES, FrameRing, MemorySource, convert_into, create_frame_source
+from core.detector import ImageDetector
+from core.headless import FakeWindow
+from core.synthetic import load_ground_truth
+from utils.image_utils import find_template_match
+from utils.tile_utils import match_tiled
+
+ROOT_DIR = Path(__file__).parent
+DEFAULT_TEMPLATES = ["1.png", "2.png", "3.png", "4.png", "allow_button.png"]
+
+
+def frame_paths(path):
+    """截图文件，或目录中的 screen_*.png 截图"""
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "screen_*.png")))
+    return [path]
+
+
+def load_frames(path):
+    """加载截图文件或目录中的 screen_*.png 截图"""
+    frames = []
+    for file in frame_paths(path):
+        frame = decode_image(read_image_bytes(file))
+        if frame is not None:
+            frames.append(frame)
+    return frames
+
+
+def embed_frame(frame, size):
+    """将截图嵌入到更大的画布中，模拟4K或多显示器桌面"""
+    if not size:
+        return frame
+    width, height = (int(v) for v in size.lower().split("x"))
+    if width <= frame.shape[1] and height <= frame.shape[0]:
+        return frame
+    rng = np.random.default_rng(0)
+    canvas = rng.integers(0, 256, (max(height, frame.shape[0]), max(width, frame.shape[1]), 3), dtype=np.uint8)
+    canvas = cv2.GaussianBlur(canvas, (0, 0), 3)
+    y = (canvas.shape[0] - frame.shape[0]) // 2
+    x = (canvas.shape[1] - frame.shape[1]) // 2
+    canvas[y:y + frame.shape[0], x:x + frame.shape[1]] = frame
+    return canvas
+
+
+def load_templates(paths):
+    """加载模板列表，跳过无法读取的文件"""
+    templates = []
+    for path in paths:
+        template = load_template(str(path))
+        if template is not None:
+            templates.append(template)
+    return templates
+
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存(MB)，不支持的系统返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def time_call(func, repeat):
+    """重复调用函数，返回每次耗时(毫秒)列表"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name, timings):
+    """输出耗时统计"""
+    print(f"{name:<24} 中位数: {statistics.median(timings):8.2f} ms   "
+          f"最小: {min(timings):8.2f} ms   最大: {max(timings):8.2f} ms")
+
+
+def bench_engine(args):
+    """对比逐模板重新截图/解码与单帧多模板引擎"""
+    frames = load_frames(args.frames)
+    template_paths = [str(ROOT_DIR / p) for p in args.templates]
+    templates = load_templates(template_paths)
+    if not frames or not templates:
+        print("错误: 没有可用的截图或模板")
+        return
+
+    matcher = TemplateMatcher()
+    print(f"截图: {len(frames)} 张, 模板: {len(templates)} 个, 重复: {args.repeat} 次")
+
+    for index, frame in enumerate(frames):
+        h, w = frame.shape[:2]
+        print(f"\n截图 #{index} ({w}x{h})")
+
+        def legacy_tick():
+            # 模拟旧流程: 每个模板各自截屏一次并从磁盘重新解码
+            for path in template_paths:
+                screen = to_gray(frame.copy())
+                template = cv2.cvtColor(decode_image(read_image_bytes(path)), cv2.COLOR_BGR2GRAY)
+                result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
+                cv2.minMaxLoc(result)
+
+        def engine_tick():
+            matcher.find_best(frame, templates)
+
+        report("逐模板截图+解码", time_call(legacy_tick, args.repeat))
+        report("单帧多模板引擎", time_call(engine_tick, args.repeat))
+        print(f"最佳匹配: {matcher.find_best(frame, templates)}")
+
+
+def bench_pyramid(args):
+    """对比全分辨率穷举搜索与金字塔粗到细搜索"""
+    frames = [embed_frame(frame, args.canvas) for frame in load_frames(args.frames)]
+    templates = load_templates([str(ROOT_DIR / p) for p in args.templates])
+    if not frames or not templates:
+        print("错误: 没有可用的截图或模板")
+        return
+
+    exhaustive = TemplateMatcher()
+    print(f"截图: {len(frames)} 张, 模板: {len(templates)} 个, 候选数: {args.candidates}")
+
+    for index, frame in enumerate(frames):
+        h, w = frame.shape[:2]
+        print(f"\n截图 #{index} ({w}x{h})")
+        expected = {r.template.name: r for r in exhaustive.match_all(frame, templates)}
+        base = time_call(lambda: exhaustive.match_all(frame, templates), args.repeat)
+        report("穷举搜索", base)
+
+        for levels in args.levels:
+            pyramid = TemplateMatcher(pyramid_levels=levels, pyramid_candidates=args.candidates)
+            timings = time_call(lambda: pyramid.match_all(frame, templates), args.repeat)
+            report(f"金字塔 {levels} 层", timings)
+            print(f"{'':<24} 加速比: {statistics.median(base) / statistics.median(timings):.2f}x")
+
+            # 检查与穷举搜索的位置是否一致
+            for result in pyramid.match_all(frame, templates):
+                reference = expected[result.template.name]
+                if result.location != reference.location:
+                    print(f"{'':<24} 位置不一致: {result.template.name} "
+                          f"{result.location} != {reference.location} (穷举得分 {reference.score:.4f})")
+
+
+def bench_roi(args):
+    """对比每帧全屏搜索与最近命中区域优先搜索"""
+    frames = [embed_frame(frame, args.canvas) for frame in load_frames(args.frames)]
+    templates = load_templates([str(ROOT_DIR / p) for p in args.templates])
+    if not frames or not templates:
+        print("错误: 没有可用的截图或模板")
+        return
+
+    full = TemplateMatcher()
+    tracker = RoiTracker(args.padding, args.misses)
+    tracked = TemplateMatcher(tracker=tracker)
+    ticks = [frames[i % len(frames)] for i in range(args.repeat)]
+    print(f"截图: {len(frames)} 张, 模板: {len(templates)} 个, 检测次数: {len(ticks)}")
+
+    base = [time_call(lambda: full.find_best(frame, templates, args.threshold), 1)[0] for frame in ticks]
+    fast = [time_call(lambda: tracked.find_best(frame, templates, args.threshold), 1)[0] for frame in ticks]
+    report("全屏搜索", base)
+    report("区域优先", fast)
+    print(f"{'':<24} 加速比: {statistics.median(base) / statistics.median(fast):.2f}x")
+
+    stats = tracker.stats()
+    print(f"区域命中: {stats['roi_hits']}, 区域未命中: {stats['roi_misses']}, "
+          f"全屏搜索: {stats['full_searches']}, 命中率: {stats['roi_hit_rate']:.1%}")
+
+
+def bench_dirty(args):
+    """模拟按钮弹出: 对比整帧搜索与只搜索变化区域"""
+    frames = [embed_frame(frame, args.canvas) for frame in load_frames(args.frames)]
+    templates = load_templates([str(ROOT_DIR / p) for p in args.templates])
+    if not frames or not templates:
+        print("错误: 没有可用的截图或模板")
+        return
+
+    matcher = TemplateMatcher()
+    for index, frame in enumerate(frames):
+        best = matcher.find_best(frame, templates)
+        if best is None or best.score < args.threshold:
+            print(f"截图 #{index}: 没有找到按钮，跳过")
+            continue
+
+        # 用按钮上方一行像素的颜色遮住按钮，作为弹出前的画面
+        x, y, w, h = best.box
+        before = frame.copy()
+        before[y:y + h, x:x + w] = frame[max(0, y - 1), x:x + w]
+
+        height, width = frame.shape[:2]
+        print(f"\n截图 #{index} ({width}x{height}), 按钮位置: {best.location}")
+
+        def dirty_tick():
+            detector = FrameChangeDetector(args.change_threshold)
+            detector.has_changed(before)
+            start = time.perf_counter()
+            detector.has_changed(frame)
+            result = matcher.find_best(frame, templates, regions=detector.changed_regions)
+            return (time.perf_counter() - start) * 1000, result, detector.changed_regions
+
+        base = time_call(lambda: matcher.find_best(frame, templates), args.repeat)
+        runs = [dirty_tick() for _ in range(args.repeat)]
+        timings = [run[0] for run in runs]
+        report("整帧搜索", base)
+        report("变化区域搜索", timings)
+        print(f"{'':<24} 加速比: {statistics.median(base) / statistics.median(timings):.2f}x")
+        print(f"变化区域: {runs[0][2]}, 结果: {runs[0][1]}")
+
+
+def bench_capture(args):
+    """对比各截图方式的单帧截图耗时"""
+    for name in args.backends or list(FRAME_SOURCES):
+        try:
+            source = create_frame_source(name, args.replay)
+            region = source.full_region()
+            source.grab(region)  # 预热
+        except Exception as e:
+            print(f"{name:<24} 不可用: {str(e)}")
+            continue
+
+        timings = time_call(lambda: source.grab(region), args.repeat)
+        report(f"{name} ({region.width}x{region.height})", timings)
+        source.close()
+
+
+def _buffer_worker(mode, frame, repeat):
+    """在独立进程中模拟截图转换流程，返回耗时、每帧临时分配量和峰值内存"""
+    from PIL import Image
+    screenshot = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    bgra = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA).tobytes()
+    ring = FrameRing(2)
+    shape = frame.shape
+
+    if mode == "pil-alloc":
+        # 旧流程: PIL图像转数组，cvtColor再分配一个新数组
+        def tick():
+            return cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+    elif mode == "pil-ring":
+        def tick():
+            return convert_into(screenshot, cv2.COLOR_RGB2BGR, ring.acquire(shape))
+    else:
+        # mss方式: 原始BGRA数据（mss每次截图复制一份）直接转换到缓冲区
+        def tick():
+            raw = np.frombuffer(bytearray(bgra), np.uint8).reshape(shape[0], shape[1], 4)
+            return convert_into(raw, cv2.COLOR_BGRA2BGR, ring.acquire(shape))
+
+    tick()
+    tracemalloc.start()
+    peaks = []
+    timings = []
+    for _ in range(repeat):
+        current = tracemalloc.get_traced_memory()[0]
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        tick()
+        timings.append((time.perf_counter() - start) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+    return timings, statistics.median(peaks) / 1024 / 1024, peak_rss_mb(), ring.allocations
+
+
+def bench_buffers(args):
+    """对比每帧分配新数组与写入预分配缓冲区的截图转换"""
+    frames = [embed_frame(frame, args.canvas) for frame in load_frames(args.frames)]
+    if not frames:
+        print("错误: 没有可用的截图")
+        return
+
+    frame = frames[0]
+    height, width = frame.shape[:2]
+    print(f"截图尺寸: {width}x{height}, 单帧BGR大小: {frame.nbytes / 1024 / 1024:.1f} MB")
+
+    # 每种方式在独立的新进程中运行，峰值内存互不影响
+    context = multiprocessing.get_context("spawn")
+    modes = (
+        ("pil-alloc", "PIL+每帧分配"),
+        ("pil-ring", "PIL+预分配缓冲区"),
+        ("bgra-ring", "BGRA+预分配缓冲区"),
+    )
+    for mode, name in modes:
+        with context.Pool(1) as pool:
+            timings, allocated, rss, allocations = pool.apply(_buffer_worker, (mode, frame, args.repeat))
+        report(name, timings)
+        rss_text = f"{rss:.1f} MB" if rss is not None else "N/A"
+        print(f"{'':<24} 每帧临时分配: {allocated:.1f} MB   进程峰值内存: {rss_text}   "
+              f"缓冲区分配次数: {allocations}")
+    print("\n注意: PIL截图（pyautogui / imagegrab）每帧仍会分配整帧内存，检测器对这两种方式不使用缓冲区；"
+          "只有mss和回放截图能省掉分配")
+
+
+def bench_gray(args):
+    """对比先转BGR再转灰度与直接从BGRA转灰度的截图+匹配CPU耗时"""
+    frames = [embed_frame(frame, args.canvas) for frame in load_frames(args.frames)]
+    templates = load_templates([str(ROOT_DIR / p) for p in args.templates])
+    if not frames or not templates:
+        print("错误: 没有可用的截图或模板")
+        return
+
+    # 模拟mss的原始BGRA像素
+    raw = cv2.cvtColor(frames[0], cv2.COLOR_BGR2BGRA)
+    height, width = raw.shape[:2]
+    print(f"截图尺寸: {width}x{height}, 模板: {len(templates)} 个, 重复: {args.repeat} 次")
+
+    matcher = TemplateMatcher(pyramid_levels=args.levels)
+    ring = FrameRing()
+
+    def color_capture():
+        return to_gray(convert_into(raw, cv2.COLOR_BGRA2BGR, ring.acquire((height, width, 3))))
+
+    def gray_capture():
+        return convert_into(raw, cv2.COLOR_BGRA2GRAY, ring.acquire((height, width)))
+
+    report("截图转换: BGR+转灰度", time_call(color_capture, args.repeat))
+    report("截图转换: 直接灰度", time_call(gray_capture, args.repeat))
+
+    def color_tick():
+        # 旧流程: 截图转为BGR保留彩色图，匹配时再转灰度
+        frame = convert_into(raw, cv2.COLOR_BGRA2BGR, ring.acquire((height, width, 3)))
+        matcher.find_best(frame, templates)
+
+    def gray_tick():
+        # 灰度流程: 截图直接转为单通道灰度图用于匹配
+        frame = convert_into(raw, cv2.COLOR_BGRA2GRAY, ring.acquire((height, width)))
+        matcher.find_best(frame, templates)
+
+    for name, func in (("BGR截图+转灰度匹配", color_tick), ("直接灰度截图匹配", gray_tick)):
+        func()
+        cpu_start = time.process_time()
+        timings = time_call(func, args.repeat)
+        cpu = (time.process_time() - cpu_start) * 1000 / args.repeat
+        report(name, timings)
+        print(f"{'':<24} 每帧CPU时间: {cpu:8.2f} ms")
+
+
+def bench_parallel(args):
+    """对比不同线程数下多模板匹配的吞吐量"""
+    frames = [embed_frame(frame, args.canvas) for frame in load_frames(args.frames)]
+    templates = load_templates([str(ROOT_DIR / p) for p in args.templates]) * args.copies
+    if not frames or not templates:
+        print("错误: 没有可用的截图或模板")
+        return
+
+    frame = to_gray(frames[0])
+    height, width = frame.shape[:2]
+    print(f"截图尺寸: {width}x{height}, 模板: {len(templates)} 个, 重复: {args.repeat} 次, "
+          f"CPU核数: {os.cpu_count()}")
+
+    expected = TemplateMatcher().match_all(frame, templates)
+    for workers in args.workers:
+        matcher = TemplateMatcher(pyramid_levels=args.levels, workers=workers)
+        if args.levels == 0:
+            # 并行结果的模板和位置必须与单线程逐个匹配一致（分块匹配的得分只有浮点舍入差异）
+            results = matcher.match_all(frame, templates)
+            same = len(results) == len(expected) and all(
+                r.template is e.template and r.location == e.location and abs(r.score - e.score) < 1e-5
+                for r, e in zip(results, expected)
+            )
+        else:
+            same = None
+        timings = time_call(lambda: matcher.find_best(frame, templates), args.repeat)
+        report(f"{workers}线程", timings)
+        fps = 1000.0 / statistics.median(timings)
+        check = "" if same is None else f"   结果一致: {'是' if same else '否'}"
+        print(f"{'':<24} 吞吐量: {fps:6.2f} 帧/秒{check}")
+        
+        if args.threshold is not None:
+            # 第一个模板即命中时，提前停止可以省去其余模板的匹配
+            first = time_call(lambda: matcher.find_best(frame, templates, args.threshold, first_hit=True), args.repeat)
+            report(f"{workers}线程+命中即停止", first)
+        matcher.close()
+
+
+def bench_tiles(args):
+    """对比整帧匹配与分块并行匹配，并检查两者结果位置一致"""
+    frames = [embed_frame(frame, args.canvas) for frame in load_frames(args.frames)]
+    templates = load_templates([str(ROOT_DIR / p) for p in args.templates])
+    if not frames or not templates:
+        print("错误: 没有可用的截图或模板")
+        return
+
+    frame = to_gray(frames[0])
+    height, width = frame.shape[:2]
+    print(f"截图尺寸: {width}x{height}, 分块边长: {args.tile_size}, CPU核数: {os.cpu_count()}")
+
+    for template in templates:
+        image = template.gray
+        print(f"\n模板 {template.name} ({template.width}x{template.height})")
+        expected = cv2.minMaxLoc(cv2.matchTemplate(frame, image, cv2.TM_CCOEFF_NORMED))
+        report("整帧匹配", time_call(lambda: cv2.matchTemplate(frame, image, cv2.TM_CCOEFF_NORMED), args.repeat))
+        for workers in args.workers:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                def tiled():
+                    return match_tiled(frame, image, cv2.TM_CCOEFF_NORMED, executor, args.tile_size)
+                timings = time_call(tiled, args.repeat)
+                _, score, _, location = cv2.minMaxLoc(tiled())
+            report(f"分块 {workers}线程", timings)
+            print(f"{'':<24} 位置一致: {'是' if location == expected[3] else '否'}   "
+                  f"得分差: {abs(score - expected[1]):.2e}")
+
+
+def crop_templates(frame, size, count, seed=0):
+    """从截图中随机裁剪模板，每个模板宽度略有不同，避免共用窗口统计量"""
+    rng = np.random.RandomState(seed)
+    height, width = frame.shape[:2]
+    templates = []
+    for index in range(count):
+        w = min(width, size + index)
+        h = min(height, size)
+        x = rng.randint(0, width - w + 1)
+        y = rng.randint(0, height - h + 1)
+        color = np.ascontiguousarray(frame[y:y + h, x:x + w])
+        gray = cv2.cvtColor(color, cv2.COLOR_BGR2GRAY)
+        templates.append(Template(f"crop_{size}_{index}.png", color, gray, digest=f"crop-{size}-{index}"))
+    return templates
+
+
+def bench_fft(args):
+    """对比逐模板 matchTemplate 与共用帧频谱的FFT引擎，找出FFT更快的模板数量和尺寸"""
+    frames = [embed_frame(frame, args.canvas) for frame in load_frames(args.frames)]
+    if not frames:
+        print("错误: 没有可用的截图")
+        return
+
+    frame = frames[0]
+    gray = to_gray(frame)
+    height, width = gray.shape[:2]
+    print(f"截图尺寸: {width}x{height}, 重复: {args.repeat} 次")
+    print(f"{'模板边长':>8} {'模板数':>6} {'逐模板(ms)':>12} {'FFT(ms)':>10} {'加速比':>8}  位置一致")
+
+    loop = TemplateMatcher(engine=ENGINE_TEMPLATE)
+    fft = TemplateMatcher(engine=ENGINE_FFT)
+    for size in args.sizes:
+        crossover = None
+        for count in args.counts:
+            templates = crop_templates(frame, size, count)
+            # 先各跑一次，模板频谱缓存预热后再计时（实际运行时模板不变，频谱只算一次）
+            expected = loop.match_all(gray, templates)
+            results = fft.match_all(gray, templates)
+            # 平坦或重复的裁剪区域可能有多个得分相同的位置，得分一致也算一致
+            same = all(r.location == e.location or abs(r.score - e.score) < 1e-4
+                       for r, e in zip(results, expected))
+            loop_time = statistics.median(time_call(lambda: loop.find_best(gray, templates), args.repeat))
+            fft_time = statistics.median(time_call(lambda: fft.find_best(gray, templates), args.repeat))
+            speedup = loop_time / fft_time
+            if crossover is None and speedup > 1.0:
+                crossover = count
+            print(f"{size:>8} {count:>6} {loop_time:>12.2f} {fft_time:>10.2f} {speedup:>7.2f}x  "
+                  f"{'是' if same else '否'}")
+        if crossover is None:
+            print(f"{'':>8} 模板边长 {size}: 测试范围内FFT引擎都不比逐模板快")
+        else:
+            print(f"{'':>8} 模板边长 {size}: {crossover} 个模板起FFT引擎更快")
+
+
+def bench_scales(args):
+    """模拟不同显示缩放: 对比单一比例与多尺度匹配的得分，以及全部比例搜索与已学习比例的耗时"""
+    frames = load_frames(args.frames)
+    templates = load_templates([str(ROOT_DIR / p) for p in args.templates])
+    if not frames or not templates:
+        print("错误: 没有可用的截图或模板")
+        return
+
+    print(f"缩放比例: {args.scales}, 阈值: {args.threshold}, 重复: {args.repeat} 次")
+    for display_scale in args.display_scales:
+        # 截图按显示缩放放大，相当于在该缩放比例的显示器上截图
+        frame = to_gray(cv2.resize(frames[0], None, fx=display_scale, fy=display_scale,
+                                   interpolation=cv2.INTER_CUBIC))
+        height, width = frame.shape[:2]
+        print(f"\n显示缩放 {display_scale:g} ({width}x{height})")
+
+        single = TemplateMatcher().find_best(frame, templates)
+        print(f"{'单一比例':<24} {single}")
+
+        cache = ScaleCache(args.scales, sweep_misses=5)
+        matcher = TemplateMatcher(scale_cache=cache)
+        sweep = time_call(lambda: (cache.reset(), matcher.find_best(frame, templates, args.threshold)), args.repeat)
+        best = matcher.find_best(frame, templates, args.threshold)
+        report("全部比例搜索", sweep)
+        report("已学习比例", time_call(lambda: matcher.find_best(frame, templates, args.threshold), args.repeat))
+        learned = {t.name: cache.learned_scale(t) for t in templates}
+        print(f"{'多尺度':<24} {best}")
+        print(f"{'已学习的比例':<24} {learned}")
+
+
+def bench_signature(args):
+    """对比已知位置的像素签名确认、区域内匹配和全屏匹配的单模板耗时"""
+    frames = load_frames(args.frames)
+    templates = load_templates([str(ROOT_DIR / p) for p in args.templates])
+    if not frames or not templates:
+        print("错误: 没有可用的截图或模板")
+        return
+
+    frame = to_gray(frames[0])
+    height, width = frame.shape[:2]
+    rng = np.random.RandomState(0)
+    print(f"截图尺寸: {width}x{height}, 签名像素数: {len(templates[0].signature())}")
+
+    for template in templates:
+        best = TemplateMatcher().match(frame, template)
+        print(f"\n模板 {template.name} 匹配位置: {best.location}, 得分: {best.score:.4f}")
+        if best.score < args.threshold:
+            print("未命中，跳过")
+            continue
+
+        # 稳定状态: 上一帧已在该位置命中
+        tracker = RoiTracker()
+        tracker.record_hit(template, best.location, best.score)
+        signature = template.signature(True, args.tolerance)
+        roi = TemplateMatcher(tracker=tracker)
+        full = TemplateMatcher()
+
+        def signature_check():
+            return signature.verify(frame, best.location)
+
+        def roi_check():
+            return roi.match_region(frame, template, tracker.regions(template, frame.shape)[0])
+
+        print(f"签名确认得分: {signature_check()}")
+        report("像素签名确认", time_call(signature_check, args.repeat * 100))
+        report("区域内匹配", time_call(roi_check, args.repeat))
+        report("全屏匹配", time_call(lambda: full.match(frame, template), args.repeat))
+
+        # 随机位置上签名不应确认命中
+        false_hits = 0
+        for _ in range(args.samples):
+            x = rng.randint(0, width - template.width + 1)
+            y = rng.randint(0, height - template.height + 1)
+            if (x, y) != best.location and signature.verify(frame, (x, y)) is not None:
+                false_hits += 1
+        print(f"随机位置误确认: {false_hits}/{args.samples}")
+
+
+def bench_colorkey(args):
+    """对比整帧匹配与颜色预筛选后只在候选位置匹配"""
+    frames = [embed_frame(frame, args.canvas) for frame in load_frames(args.frames)]
+    templates = load_templates([str(ROOT_DIR / p) for p in args.templates])
+    if not frames or not templates:
+        print("错误: 没有可用的截图或模板")
+        return
+
+    frame = frames[0]
+    height, width = frame.shape[:2]
+    print(f"截图尺寸: {width}x{height}, 重复: {args.repeat} 次")
+
+    full = TemplateMatcher()
+    keyed = TemplateMatcher()
+    keyed.color_keys = ColorKeyFilter()
+    for template in templates:
+        print(f"\n模板 {template.name}: 颜色键 {template.color_key()}")
+        expected = full.match(to_gray(frame), template)
+        result = keyed.find_best(frame, [template])
+        report("整帧匹配", time_call(lambda: full.find_best(frame, [template]), args.repeat))
+        report("颜色预筛选", time_call(lambda: keyed.find_best(frame, [template]), args.repeat))
+        print(f"{'整帧结果':<24} {expected}")
+        print(f"{'预筛选结果':<24} {result}")
+    print(f"\n候选统计: {keyed.color_keys.stats()}")
+
+
+def bench_exact(args):
+    """对比 find_template_match 与行哈希精确匹配引擎（每帧包含构建行哈希的开销）"""
+    frames = [embed_frame(frame, args.canvas) for frame in load_frames(args.frames)]
+    bundled = load_templates([str(ROOT_DIR / p) for p in args.templates])
+    if not frames:
+        print("错误: 没有可用的截图")
+        return
+
+    exact = TemplateMatcher(engine=ENGINE_EXACT)
+    for index, frame in enumerate(frames):
+        gray = to_gray(frame)
+        height, width = gray.shape[:2]
+        print(f"\n截图 {index + 1}: {width}x{height}, 重复: {args.repeat} 次")
+
+        # 从录制截图中裁剪的模板与屏幕像素完全一致；随附的模板图片与截图有±1的编码差异，会回退到相关匹配
+        crops = crop_templates(frame, args.size, args.count, seed=index)
+        for label, templates in (("截图裁剪", crops), ("随附模板", bundled)):
+            if not templates:
+                continue
+            images = [template.image(True) for template in templates]
+            report(f"{label} find_template_match",
+                   time_call(lambda: [find_template_match(gray, image) for image in images], args.repeat))
+            report(f"{label} 精确匹配",
+                   time_call(lambda: [exact.match_all(gray, templates)], args.repeat))
+
+            same = 0
+            for template, image, result in zip(templates, images, exact.match_all(gray, templates)):
+                score, location, _ = find_template_match(gray, image)
+                # 平坦或重复的图案可能有多个得分相同的位置，位置不同但得分相等也算一致
+                if result.location == location or abs(result.score - score) < 1e-4:
+                    same += 1
+            print(f"{label} 结果一致: {same}/{len(templates)}")
+        print(f"命中统计: {exact.exact_stats()}")
+
+
+def bench_compile(args):
+    """对比解码PNG并预计算、首次编译写入缓存（冷启动）和从缓存加载（热启动）的模板加载耗时"""
+    paths = [str(ROOT_DIR / p) for p in args.templates]
+    paths = [p for p in paths if os.path.exists(p)]
+    if not paths:
+        print("错误: 没有可用的模板")
+        return
+    print(f"模板: {len(paths)} 个, 重复: {args.repeat} 次")
+
+    def decode_all():
+        # 不使用缓存: 解码后同样计算金字塔、签名和颜色键，与编译结果对等
+        registry = TemplateRegistry(logger=lambda message: None)
+        for template in registry.get_templates(paths):
+            compile_template(template)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TemplateCache(directory)
+
+        def cold():
+            cache.clear()
+            TemplateRegistry(lambda message: None, cache).get_templates(paths)
+
+        def warm():
+            templates = TemplateRegistry(lambda message: None, cache).get_templates(paths)
+            for template in templates:
+                compile_template(template)  # 已预计算，应当不再做任何计算
+
+        report("解码并预计算（无缓存）", time_call(decode_all, args.repeat))
+        report("冷启动（编译并写入缓存）", time_call(cold, args.repeat))
+        report("热启动（从缓存加载）", time_call(warm, args.repeat))
+        size = sum(os.path.getsize(f) for f in glob.glob(os.path.join(directory, "*.npz")))
+        print(f"缓存文件大小: {size / 1024:.1f} KB, 统计: {cache.stats()}")
+
+
+def stack_prompts(frame, template, count, gap=20):
+    """把模板图像复制到帧中竖直排列的多个位置，模拟堆叠的多个权限确认框"""
+    frame = frame.copy()
+    height, width = frame.shape[:2]
+    locations = []
+    for index in range(count):
+        x = (width - template.width) // 2
+        y = gap + index * (template.height + gap)
+        if y + template.height > height:
+            break
+        frame[y:y + template.height, x:x + template.width] = template.color
+        locations.append((x, y))
+    return frame, locations
+
+
+def bench_findall(args):
+    """对比多目标模式一次找出所有堆叠目标与每个目标单独检测一次"""
+    frames = [embed_frame(frame, args.canvas) for frame in load_frames(args.frames)]
+    templates = load_templates([str(ROOT_DIR / p) for p in args.templates])
+    if not frames or not templates:
+        print("错误: 没有可用的截图或模板")
+        return
+
+    matcher = TemplateMatcher()
+    frame, locations = stack_prompts(frames[0], templates[0], args.count)
+    gray = to_gray(frame)
+    height, width = gray.shape[:2]
+    print(f"截图尺寸: {width}x{height}, 堆叠目标: {len(locations)} 个, 模板: {len(templates)} 个")
+
+    hits = matcher.find_all(gray, templates, args.threshold, order=ORDER_POSITION)
+    found = {hit.location for hit in hits}
+    print(f"多目标命中: {len(hits)} 个, 覆盖堆叠目标: {sum(loc in found for loc in locations)}/{len(locations)}")
+    for hit in hits:
+        print(f"  {hit}")
+
+    single = time_call(lambda: matcher.find_best(gray, templates, args.threshold), args.repeat)
+    report("多目标模式（一帧）", time_call(lambda: matcher.find_all(gray, templates, args.threshold), args.repeat))
+    report("单目标检测（一帧）", single)
+    # 单目标模式每次点击后还要等待0.5秒才进入下一轮检测
+    total = len(locations) * (statistics.median(single) + 500.0)
+    print(f"单目标模式处理全部 {len(locations)} 个目标约需: {total:.0f} ms（每个目标一轮检测加0.5秒等待）")
+
+
+# 基准测试套件的变体: 完整检测流程和各匹配引擎
+SUITE_DETECTOR = "detector"
+SUITE_VARIANTS = (SUITE_DETECTOR,) + MATCH_ENGINES
+BASELINE_VERSION = 1
+
+
+def percentile(values, q):
+    """最近秩法百分位数"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = max(0, int(np.ceil(q / 100.0 * len(ordered))) - 1)
+    return ordered[index]
+
+
+def score_positions(positions, targets):
+    """按点击位置是否落在标注目标区域内统计 (命中, 误报, 漏检)
+
+    每个目标只算命中一次，重复点击同一目标和落在目标外的点击都算误报。
+    """
+    remaining = list(targets)
+    true_positive = 0
+    for x, y in positions:
+        for target in remaining:
+            if (target['x'] <= x < target['x'] + target['width']
+                    and target['y'] <= y < target['y'] + target['height']):
+                remaining.remove(target)
+                true_positive += 1
+                break
+    return true_positive, len(positions) - true_positive, len(remaining)
+
+
+def suite_detector(args, template_paths):
+    """构造完整的检测器，返回每帧检测函数 frame -> [点击位置]"""
+    config = Config()
+    if args.settings:
+        config.load_from_file(args.settings)
+    config.confidence_threshold = args.threshold
+    config.match_scales = list(args.scales)
+    config.find_all = not args.single
+    # 语料中每帧都是新画面，不按画面变化跳过匹配
+    config.change_gating = False
+
+    source = MemorySource()
+    window = FakeWindow(config.window_title)
+    detector = ImageDetector(
+        config,
+        lambda message: None,
+        registry=TemplateRegistry(lambda message: None),
+        frame_source=source,
+        window_geometry=window.window_rect,
+        window_finder=window.find_window
+    )
+    detector.get_templates(template_paths)  # 模板加载不计入检测耗时
+
+    def detect(frame):
+        source.set_frame(frame)
+        window.frame_rect = source.screen_rect()
+        if config.find_all:
+            return detector.locate_targets(template_paths)[0]
+        position, _ = detector.locate_target(template_paths)
+        return [position] if position else []
+
+    return detect
+
+
+def suite_engine(args, engine, template_paths):
+    """构造只使用指定匹配引擎的匹配器，返回每帧检测函数 frame -> [点击位置]"""
+    templates = load_templates(template_paths)
+    scale_cache = ScaleCache(args.scales) if len(args.scales) > 1 else None
+    matcher = TemplateMatcher(engine=engine, scale_cache=scale_cache)
+
+    def detect(frame):
+        if args.single:
+            best = matcher.find_best(frame, templates, args.threshold)
+            return [best.center] if best is not None and best.score >= args.threshold else []
+        return [hit.center for hit in matcher.find_all(frame, templates, args.threshold)]
+
+    return detect
+
+
+def run_variant(variant, args):
+    """在独立进程中对整个语料运行一个变体，返回统计结果
+
+    每个变体单独一个进程，峰值内存和模板、频谱等缓存互不影响。
+    截图的读取和解码不计入检测耗时。
+    """
+    template_paths = [str(ROOT_DIR / p) if not Path(p).is_absolute() else p for p in args.templates]
+    if variant == SUITE_DETECTOR:
+        detect = suite_detector(args, template_paths)
+    else:
+        detect = suite_engine(args, variant, template_paths)
+
+    timings = []
+    cpu = 0.0
+    true_positive = false_positive = false_negative = annotated = 0
+    for _ in range(args.repeat):
+        for path in frame_paths(args.frames):
+            frame = decode_image(read_image_bytes(path))
+            if frame is None:
+                continue
+            cpu_start = time.process_time()
+            start = time.perf_counter()
+            positions = detect(frame)
+            timings.append((time.perf_counter() - start) * 1000)
+            cpu += time.process_time() - cpu_start
+
+            truth = load_ground_truth(path)
+            if truth is not None:
+                annotated += 1
+                tp, fp, fn = score_positions(positions, truth['targets'])
+                true_positive += tp
+                false_positive += fp
+                false_negative += fn
+
+    total = sum(timings)
+    return {
+        'frames': len(timings),
+        'annotated': annotated,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(total / len(timings), 3) if timings else 0.0,
+        'fps': round(len(timings) * 1000.0 / total, 2) if total else 0.0,
+        'cpu_ms_per_frame': round(cpu * 1000.0 / len(timings), 3) if timings else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+        'true_positive': true_positive,
+        'false_positive': false_positive,
+        'false_negative': false_negative,
+        'precision': round(true_positive / (true_positive + false_positive), 4)
+        if true_positive + false_positive else None,
+        'recall': round(true_positive / (true_positive + false_negative), 4)
+        if true_positive + false_negative else None,
+    }
+
+
+def suite_environment():
+    """记录运行环境，对比基线时环境不同会给出提示"""
+    import platform
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+        'cpus': os.cpu_count(),
+    }
+
+
+def format_metric(value, pattern):
+    """格式化可能为None的指标"""
+    return "-" if value is None else format(value, pattern)
+
+
+def compare_baseline(baseline, results, args):
+    """与基线对比，返回退化项描述列表"""
+    regressions = []
+    if baseline.get('environment') != suite_environment():
+        print("注意: 基线的运行环境与当前不同，耗时对比仅供参考")
+    for key in ('threshold', 'scales', 'single'):
+        if baseline.get(key) != getattr(args, key):
+            print(f"注意: 基线的 {key} 为 {baseline.get(key)}，当前为 {getattr(args, key)}")
+    for variant, current in results.items():
+        base = baseline.get('results', {}).get(variant)
+        if base is None:
+            print(f"{variant}: 基线中没有该变体，跳过对比")
+            continue
+        for key in ('p50_ms', 'p95_ms'):
+            limit = base[key] * (1 + args.tolerance)
+            if current[key] > limit:
+                regressions.append(f"{variant} {key}: {base[key]:.2f} -> {current[key]:.2f} ms "
+                                   f"(超过容差 {args.tolerance:.0%})")
+        for key in ('precision', 'recall'):
+            if base.get(key) is not None and current.get(key) is not None:
+                if current[key] < base[key] - args.accuracy_tolerance:
+                    regressions.append(f"{variant} {key}: {base[key]:.4f} -> {current[key]:.4f}")
+    return regressions
+
+
+def bench_suite(args):
+    """在截图语料上运行检测器和各匹配引擎，统计延迟分位数、吞吐量、资源占用和准确率
+
+    指定 --save 时把结果保存为基线，指定 --compare 时与基线对比，延迟或准确率退化时返回非0。
+    """
+    paths = frame_paths(args.frames)
+    if not paths:
+        print("错误: 没有可用的截图")
+        return 1
+    variants = args.variants or list(SUITE_VARIANTS)
+    for variant in variants:
+        if variant not in SUITE_VARIANTS:
+            print(f"错误: 未知的变体 {variant}，可选: {', '.join(SUITE_VARIANTS)}")
+            return 1
+
+    print(f"语料: {args.frames} ({len(paths)} 张), 模板: {len(args.templates)} 个, "
+          f"阈值: {args.threshold}, 缩放比例: {', '.join(f'{s:g}' for s in args.scales)}, "
+          f"{'单目标' if args.single else '多目标'}模式, 重复: {args.repeat} 次\n")
+    print(f"{'变体':<20}{'p50':>9}{'p95':>9}{'p99':>9}{'FPS':>8}{'CPU/帧':>9}{'RSS(MB)':>9}"
+          f"{'精确率':>8}{'召回率':>8}")
+
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for variant in variants:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(run_variant, variant, args).result()
+        results[variant] = result
+        print(f"{variant:<20}{result['p50_ms']:9.2f}{result['p95_ms']:9.2f}{result['p99_ms']:9.2f}"
+              f"{result['fps']:8.2f}{result['cpu_ms_per_frame']:9.2f}"
+              f"{format_metric(result['peak_rss_mb'], '9.1f'):>9}"
+              f"{format_metric(result['precision'], '8.3f'):>8}{format_metric(result['recall'], '8.3f'):>8}")
+    annotated = next(iter(results.values()))['annotated']
+    print(f"\n延迟单位为毫秒；有标注的截图: {annotated} 张" + ("" if annotated else "，未统计准确率"))
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': BASELINE_VERSION,
+                'corpus': args.frames,
+                'frames': len(paths),
+                'templates': args.templates,
+                'threshold': args.threshold,
+                'scales': args.scales,
+                'single': args.single,
+                'repeat': args.repeat,
+                'environment': suite_environment(),
+                'results': results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"基线已保存到 {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_baseline(baseline, results, args)
+        if regressions:
+            print("\n性能退化:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\n与基线 {args.compare} 对比: 未发现退化")
+    return 0
+
+
+def build_parser():
+    """构造命令行参数解析器"""
+    parser = argparse.ArgumentParser(description="Claude自动点击器识别性能基准测试")
+    subparsers = parser.add_subparsers(dest="command")
+
+    engine = subparsers.add_parser("engine", help="单帧多模板检测引擎")
+    engine.add_argument("--frames", default=str(ROOT_DIR / "debug"), help="截图文件或目录")
+    engine.add_argument("--templates", nargs="+", default=DEFAULT_TEMPLATES, help="模板图片")
+    engine.add_argument("--repeat", type=int, default=20, help="重复次数")
+    engine.set_defaults(func=bench_engine)
+
+    pyramid = subparsers.add_parser("pyramid", help="金字塔粗到细匹配")
+    pyramid.add_argument("--frames", default=str(ROOT_DIR / "debug"), help="截图文件或目录")
+    pyramid.add_argument("--templates", nargs="+", default=DEFAULT_TEMPLATES, help="模板图片")
+    pyramid.add_argument("--levels", nargs="+", type=int, default=[1, 2], help="金字塔层数")
+    pyramid.add_argument("--candidates", type=int, default=3, help="原图确认的候选数")
+    pyramid.add_argument("--canvas", default="", help="嵌入到指定尺寸的画布，例如 3840x2160")
+    pyramid.add_argument("--repeat", type=int, default=10, help="重复次数")
+    pyramid.set_defaults(func=bench_pyramid)
+
+    roi = subparsers.add_parser("roi", help="最近命中区域优先搜索")
+    roi.add_argument("--frames", default=str(ROOT_DIR / "debug"), help="截图文件或目录")
+    roi.add_argument("--templates", nargs="+", default=DEFAULT_TEMPLATES, help="模板图片")
+    roi.add_argument("--threshold", type=float, default=0.6, help="相似度阈值")
+    roi.add_argument("--padding", type=int, default=40, help="搜索区域扩展像素")
+    roi.add_argument("--misses", type=int, default=3, help="连续未命中多少次后全屏搜索")
+    roi.add_argument("--canvas", default="", help="嵌入到指定尺寸的画布，例如 3840x2160")
+    roi.add_argument("--repeat", type=int, default=10, help="检测次数")
+    roi.set_defaults(func=bench_roi)
+
+    dirty = subparsers.add_parser("dirty", help="只搜索画面变化区域")
+    dirty.add_argument("--frames", default=str(ROOT_DIR / "debug"), help="截图文件或目录")
+    dirty.add_argument("--templates", nargs="+", default=DEFAULT_TEMPLATES, help="模板图片")
+    dirty.add_argument("--threshold", type=float, default=0.6, help="相似度阈值")
+    dirty.add_argument("--change-threshold", type=int, default=4, help="画面变化阈值")
+    dirty.add_argument("--canvas", default="", help="嵌入到指定尺寸的画布，例如 3840x2160")
+    dirty.add_argument("--repeat", type=int, default=10, help="重复次数")
+    dirty.set_defaults(func=bench_dirty)
+
+    capture = subparsers.add_parser("capture", help="截图方式耗时")
+    capture.add_argument("--backends", nargs="*", help=f"截图方式，可选: {', '.join(FRAME_SOURCES)}")
+    capture.add_argument("--replay", default=str(ROOT_DIR / "debug"), help="回放截图的目录或zip压缩包")
+    capture.add_argument("--repeat", type=int, default=20, help="重复次数")
+    capture.set_defaults(func=bench_capture)
+
+    buffers = subparsers.add_parser("buffers", help="截图缓冲区内存分配")
+    buffers.add_argument("--frames", default=str(ROOT_DIR / "debug"), help="截图文件或目录")
+    buffers.add_argument("--canvas", default="3840x2160", help="嵌入到指定尺寸的画布，例如 3840x2160")
+    buffers.add_argument("--repeat", type=int, default=20, help="重复次数")
+    buffers.set_defaults(func=bench_buffers)
+
+    gray = subparsers.add_parser("gray", help="灰度截图与彩色截图的匹配CPU耗时")
+    gray.add_argument("--frames", default=str(ROOT_DIR / "debug"), help="截图文件或目录")
+    gray.add_argument("--templates", nargs="+", default=DEFAULT_TEMPLATES, help="模板图片")
+    gray.add_argument("--canvas", default="3840x2160", help="嵌入到指定尺寸的画布，例如 3840x2160")
+    gray.add_argument("--levels", type=int, default=2, help="金字塔层数")
+    gray.add_argument("--repeat", type=int, default=10, help="重复次数")
+    gray.set_defaults(func=bench_gray)
+
+    parallel = subparsers.add_parser("parallel", help="多线程并行匹配吞吐量")
+    parallel.add_argument("--frames", default=str(ROOT_DIR / "debug"), help="截图文件或目录")
+    parallel.add_argument("--templates", nargs="+", default=DEFAULT_TEMPLATES, help="模板图片")
+    parallel.add_argument("--copies", type=int, default=2, help="模板重复份数，模拟更多模板")
+    parallel.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4, 8], help="线程数")
+    parallel.add_argument("--levels", type=int, default=0, help="金字塔层数")
+    parallel.add_argument("--threshold", type=float, default=None, help="设置后同时测试命中即停止")
+    parallel.add_argument("--canvas", default="3840x2160", help="嵌入到指定尺寸的画布，例如 3840x2160")
+    parallel.add_argument("--repeat", type=int, default=5, help="重复次数")
+    parallel.set_defaults(func=bench_parallel)
+
+    tiles = subparsers.add_parser("tiles", help="大图分块并行匹配")
+    tiles.add_argument("--frames", default=str(ROOT_DIR / "debug"), help="截图文件或目录")
+    tiles.add_argument("--templates", nargs="+", default=DEFAULT_TEMPLATES, help="模板图片")
+    tiles.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4, 8], help="线程数")
+    tiles.add_argument("--tile-size", type=int, default=1024, help="每块结果图的边长")
+    tiles.add_argument("--canvas", default="3840x2160", help="嵌入到指定尺寸的画布，例如 3840x2160")
+    tiles.add_argument("--repeat", type=int, default=5, help="重复次数")
+    tiles.set_defaults(func=bench_tiles)
+
+    fft = subparsers.add_parser("fft", help="FFT引擎与逐模板匹配的交叉点")
+    fft.add_argument("--frames", default=str(ROOT_DIR / "debug"), help="截图文件或目录")
+    fft.add_argument("--sizes", nargs="+", type=int, default=[16, 32, 64, 128], help="模板边长")
+    fft.add_argument("--counts", nargs="+", type=int, default=[1, 2, 4, 8, 16], help="模板数量")
+    fft.add_argument("--canvas", default="", help="嵌入到指定尺寸的画布，例如 3840x2160")
+    fft.add_argument("--repeat", type=int, default=5, help="重复次数")
+    fft.set_defaults(func=bench_fft)
+
+    scales = subparsers.add_parser("scales", help="多尺度匹配和缩放比例缓存")
+    scales.add_argument("--frames", default=str(ROOT_DIR / "debug"), help="截图文件或目录")
+    scales.add_argument("--templates", nargs="+", default=DEFAULT_TEMPLATES, help="模板图片")
+    scales.add_argument("--scales", nargs="+", type=float, default=[1.0, 1.25, 1.5], help="匹配缩放比例")
+    scales.add_argument("--display-scales", nargs="+", type=float, default=[1.0, 1.25, 1.5],
+                        help="模拟的显示缩放比例")
+    scales.add_argument("--threshold", type=float, default=0.8, help="相似度阈值")
+    scales.add_argument("--repeat", type=int, default=3, help="重复次数")
+    scales.set_defaults(func=bench_scales)
+
+    signature = subparsers.add_parser("signature", help="像素签名快速确认")
+    signature.add_argument("--frames", default=str(ROOT_DIR / "debug"), help="截图文件或目录")
+    signature.add_argument("--templates", nargs="+", default=DEFAULT_TEMPLATES, help="模板图片")
+    signature.add_argument("--threshold", type=float, default=0.8, help="相似度阈值")
+    signature.add_argument("--tolerance", type=int, default=8, help="签名容差")
+    signature.add_argument("--samples", type=int, default=10000, help="误确认检查的随机位置数")
+    signature.add_argument("--repeat", type=int, default=20, help="重复次数")
+    signature.set_defaults(func=bench_signature)
+
+    colorkey = subparsers.add_parser("colorkey", help="按按钮颜色预筛选候选位置")
+    colorkey.add_argument("--frames", default=str(ROOT_DIR / "debug"), help="截图文件或目录")
+    colorkey.add_argument("--templates", nargs="+", default=DEFAULT_TEMPLATES, help="模板图片")
+    colorkey.add_argument("--canvas", default="", help="嵌入到指定尺寸的画布，例如 3840x2160")
+    colorkey.add_argument("--repeat", type=int, default=10, help="重复次数")
+    colorkey.set_defaults(func=bench_colorkey)
+
+    exact = subparsers.add_parser("exact", help="行哈希精确匹配与 find_template_match 对比")
+    exact.add_argument("--frames", default=str(ROOT_DIR / "debug"), help="截图文件或目录")
+    exact.add_argument("--templates", nargs="+", default=DEFAULT_TEMPLATES, help="模板图片")
+    exact.add_argument("--size", type=int, default=48, help="裁剪模板的边长")
+    exact.add_argument("--count", type=int, default=8, help="从截图裁剪的模板数量")
+    exact.add_argument("--canvas", default="", help="嵌入到指定尺寸的画布，例如 3840x2160")
+    exact.add_argument("--repeat", type=int, default=5, help="重复次数")
+    exact.set_defaults(func=bench_exact)
+
+    compiled = subparsers.add_parser("compile", help="编译模板缓存的冷启动与热启动加载耗时")
+    compiled.add_argument("--templates", nargs="+", default=DEFAULT_TEMPLATES, help="模板图片")
+    compiled.add_argument("--repeat", type=int, default=20, help="重复次数")
+    compiled.set_defaults(func=bench_compile)
+
+    findall = subparsers.add_parser("findall", help="多目标模式一次找出所有堆叠目标")
+    findall.add_argument("--frames", default=str(ROOT_DIR / "debug"), help="截图文件或目录")
+    findall.add_argument("--templates", nargs="+", default=DEFAULT_TEMPLATES, help="模板图片")
+    findall.add_argument("--count", type=int, default=4, help="堆叠的目标数量")
+    findall.add_argument("--threshold", type=float, default=0.8, help="相似度阈值")
+    findall.add_argument("--canvas", default="", help="嵌入到指定尺寸的画布，例如 3840x2160")
+    findall.add_argument("--repeat", type=int, default=5, help="重复次数")
+    findall.set_defaults(func=bench_findall)
+
+    suite = subparsers.add_parser("suite", help="检测器和各匹配引擎的延迟分位数、吞吐量与准确率，可保存和对比基线")
+    suite.add_argument("--frames", default=str(ROOT_DIR / "debug"), help="截图文件或目录，screen_*.json 为标注")
+    suite.add_argument("--templates", nargs="+", default=DEFAULT_TEMPLATES, help="模板图片")
+    suite.add_argument("--variants", nargs="*", help=f"测试的变体，可选: {', '.join(SUITE_VARIANTS)}")
+    suite.add_argument("--threshold", type=float, default=0.8, help="相似度阈值")
+    suite.add_argument("--scales", nargs="+", type=float, default=[1.0], help="多尺度匹配的缩放比例")
+    suite.add_argument("--single", action="store_true", help="单目标模式，每帧只取最佳匹配")
+    suite.add_argument("--settings", default="", help="检测器加载的配置文件（settings.ini格式）")
+    suite.add_argument("--repeat", type=int, default=1, help="语料重复次数")
+    suite.add_argument("--save", default="", help="保存结果为基线JSON")
+    suite.add_argument("--compare", default="", help="与基线JSON对比，退化时返回非0")
+    suite.add_argument("--tolerance", type=float, default=0.2, help="允许的延迟退化比例")
+    suite.add_argument("--accuracy-tolerance", type=float, default=0.01, help="允许的精确率和召回率下降")
+    suite.set_defaults(func=bench_suite)
+
+    return parser
+
+
+if __name__ == "__main__":
+    parser = build_parser()
+    args = parser.parse_args()
+    if not hasattr(args, "func"):
+        parser.print_help()
+    else:
+        sys.exit(args.func(args))
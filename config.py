@@ -1,13 +1,42 @@
 import os
 from pathlib import Path
+from utils.region_utils import parse_rect, format_rect
+from core.matcher import MATCH_ENGINES, MATCH_ORDERS, ORDER_SCORE
+from core.scales import parse_scales, format_scales
+from core.template_spec import parse_spec, format_spec
 
 class Config:
     def __init__(self):
         # 基本设置
         self.window_title = "Claude"
+        self.capture_window = True  # 只截取目标窗口范围
+        self.capture_rect = (0.0, 0.0, 1.0, 1.0)  # 截取窗口的相对区域 (左, 上, 右, 下)
+        self.capture_backend = "pyautogui"  # 截图方式: pyautogui / imagegrab / mss / replay，推荐mss（只有mss和回放复用截图缓冲区）
+        self.replay_path = ""  # 回放截图的目录或zip压缩包
+        self.frame_buffer_slots = 2  # 预分配的截图缓冲区数量（只对mss和回放截图生效，pyautogui/imagegrab每帧仍会分配）
         self.confidence_threshold = 0.6  # 降低默认匹配阈值以提高成功率
-        self.algorithm = "TM_CCOEFF_NORMED"  # 使用最佳匹配算法
+        self.algorithm = "TM_CCOEFF_NORMED"  # 匹配引擎: TM_CCOEFF_NORMED 逐模板匹配 / FFT_NCC 共用帧频谱 / EXACT 行哈希精确匹配
         self.interval = 0.2
+        self.color_templates = []  # 使用彩色匹配的图片路径，其余图片使用灰度匹配
+        self.template_specs = {}  # {图片路径: TemplateSpec}，图片单独的阈值、偏移、搜索范围、缩放比例、优先级和检测间隔
+        self.match_workers = 1  # 并行匹配线程数，1为单线程逐个匹配
+        self.stop_on_first_hit = False  # 靠前的图片匹配成功后不再匹配后面的图片
+        self.find_all = False  # 多目标模式: 一次截图找出所有目标并全部点击
+        self.find_all_order = ORDER_SCORE  # 多目标点击顺序: score 按匹配度 / position 按位置从上到下
+        self.match_scales = [1.0]  # 多尺度匹配的缩放比例，例如 125%/150% 显示缩放可设为 1,1.25,1.5
+        self.scale_sweep_misses = 5  # 已学习比例连续未命中多少次后重新尝试全部比例
+        self.pyramid_levels = 0  # 金字塔层数，0为全分辨率穷举搜索
+        self.pyramid_candidates = 3  # 金字塔粗搜索后在原图确认的候选数
+        self.roi_tracking = True  # 优先在最近命中位置附近搜索
+        self.roi_padding = 40  # 搜索区域向外扩展的像素
+        self.roi_full_search_misses = 3  # 区域内连续未命中多少次后放弃跟踪该位置（每次未命中都会立即扩大搜索）
+        self.signature_check = True  # 在最近命中位置先用像素签名确认，确认后跳过完整匹配
+        self.signature_tolerance = 8  # 像素签名每个像素允许的灰度差
+        self.color_key = False  # 按模板主色预筛选候选位置，只在候选位置匹配
+        self.change_gating = True  # 画面未变化时跳过匹配
+        self.change_threshold = 4  # 缩略图灰度差超过该值才视为画面变化，越小越灵敏
+        self.dirty_regions = True  # 画面变化时只在变化区域内匹配
+        self.dirty_region_max_area = 0.5  # 变化区域超过整帧该比例时改为搜索整帧
         
         # 点击设置
         self.click_method = "auto"
@@ -38,10 +67,29 @@ class Config:
         """从GUI变量更新配置"""
         # 基本设置
         self.window_title = gui_vars.get('window_title_var', "Claude")
+        self.capture_window = gui_vars.get('capture_window_var', True)
+        self.capture_rect = parse_rect(gui_vars.get('capture_rect_var', "0,0,1,1"))
+        self.capture_backend = gui_vars.get('capture_backend_var', "pyautogui")
         self.confidence_threshold = gui_vars.get('confidence_var', 0.6)
-        # 固定使用最佳算法
-        self.algorithm = "TM_CCOEFF_NORMED"
+        self.algorithm = gui_vars.get('algorithm_var', "TM_CCOEFF_NORMED")
         self.interval = gui_vars.get('interval_var', 0.2)
+        self.match_workers = gui_vars.get('match_workers_var', 1)
+        self.stop_on_first_hit = gui_vars.get('stop_on_first_hit_var', False)
+        self.find_all = gui_vars.get('find_all_var', False)
+        self.find_all_order = gui_vars.get('find_all_order_var', ORDER_SCORE)
+        self.match_scales = parse_scales(gui_vars.get('match_scales_var', "1"))
+        self.scale_sweep_misses = gui_vars.get('scale_sweep_misses_var', 5)
+        self.pyramid_levels = gui_vars.get('pyramid_levels_var', 0)
+        self.pyramid_candidates = gui_vars.get('pyramid_candidates_var', 3)
+        self.roi_tracking = gui_vars.get('roi_tracking_var', True)
+        self.roi_padding = gui_vars.get('roi_padding_var', 40)
+        self.roi_full_search_misses = gui_vars.get('roi_full_search_misses_var', 3)
+        self.signature_check = gui_vars.get('signature_check_var', True)
+        self.signature_tolerance = gui_vars.get('signature_tolerance_var', 8)
+        self.color_key = gui_vars.get('color_key_var', False)
+        self.change_gating = gui_vars.get('change_gating_var', True)
+        self.change_threshold = gui_vars.get('change_threshold_var', 4)
+        self.dirty_regions = gui_vars.get('dirty_regions_var', True)
         
         # 点击设置
         self.click_method = gui_vars.get('click_method_var', "auto")
@@ -63,11 +111,37 @@ class Config:
         with open(path, 'w', encoding='utf-8') as f:
             f.write("[窗口设置]\n")
             f.write(f"窗口标题={self.window_title}\n")
+            f.write(f"只截取窗口={int(self.capture_window)}\n")
+            f.write(f"截取区域={format_rect(self.capture_rect)}\n")
+            f.write(f"截图方式={self.capture_backend}\n")
+            f.write(f"回放路径={self.replay_path}\n")
+            f.write(f"截图缓冲区数量={self.frame_buffer_slots}\n")
             
             f.write("\n[识别设置]\n")
             f.write(f"相似度阈值={self.confidence_threshold}\n")
             f.write(f"匹配算法={self.algorithm}\n")
             f.write(f"检测间隔={self.interval}\n")
+            f.write(f"彩色匹配图片={'|'.join(self.color_templates)}\n")
+            for path, spec in self.template_specs.items():
+                f.write(f"图片设置={path}|{format_spec(spec)}\n")
+            f.write(f"匹配线程数={self.match_workers}\n")
+            f.write(f"命中即停止={int(self.stop_on_first_hit)}\n")
+            f.write(f"多目标模式={int(self.find_all)}\n")
+            f.write(f"多目标点击顺序={self.find_all_order}\n")
+            f.write(f"匹配缩放比例={format_scales(self.match_scales)}\n")
+            f.write(f"缩放重新搜索间隔={self.scale_sweep_misses}\n")
+            f.write(f"金字塔层数={self.pyramid_levels}\n")
+            f.write(f"金字塔候选数={self.pyramid_candidates}\n")
+            f.write(f"区域跟踪={int(self.roi_tracking)}\n")
+            f.write(f"区域扩展={self.roi_padding}\n")
+            f.write(f"全屏搜索间隔={self.roi_full_search_misses}\n")
+            f.write(f"像素签名确认={int(self.signature_check)}\n")
+            f.write(f"像素签名容差={self.signature_tolerance}\n")
+            f.write(f"颜色预筛选={int(self.color_key)}\n")
+            f.write(f"跳过未变化画面={int(self.change_gating)}\n")
+            f.write(f"画面变化阈值={self.change_threshold}\n")
+            f.write(f"只搜索变化区域={int(self.dirty_regions)}\n")
+            f.write(f"变化区域面积上限={self.dirty_region_max_area}\n")
             
             f.write("\n[点击设置]\n")
             f.write(f"点击方式={self.click_method}\n")
@@ -104,13 +178,70 @@ class Config:
                 
                 if key == "窗口标题":
                     self.window_title = value
+                elif key == "只截取窗口":
+                    self.capture_window = bool(int(value))
+                elif key == "截取区域":
+                    self.capture_rect = parse_rect(value)
+                elif key == "截图方式":
+                    self.capture_backend = value
+                elif key == "回放路径":
+                    self.replay_path = value
+                elif key == "截图缓冲区数量":
+                    self.frame_buffer_slots = int(value)
                 elif key == "相似度阈值":
                     self.confidence_threshold = float(value)
                 elif key == "匹配算法":
-                    # 忽略从文件读取的算法，始终使用最佳算法
-                    pass
+                    # 只接受支持的匹配引擎，其他值保持默认算法
+                    if value in MATCH_ENGINES:
+                        self.algorithm = value
                 elif key == "检测间隔":
                     self.interval = float(value)
+                elif key == "彩色匹配图片":
+                    self.color_templates = [p for p in value.split("|") if p]
+                elif key == "图片设置":
+                    # 每张图片一行: 路径|阈值;X偏移;Y偏移;搜索范围;缩放比例;优先级;检测间隔
+                    path, _, spec = value.rpartition("|")
+                    try:
+                        self.template_specs[path] = parse_spec(path, spec)
+                    except ValueError:
+                        print(f"忽略无效的图片设置: {value}")
+                elif key == "匹配线程数":
+                    self.match_workers = max(1, int(value))
+                elif key == "命中即停止":
+                    self.stop_on_first_hit = bool(int(value))
+                elif key == "多目标模式":
+                    self.find_all = bool(int(value))
+                elif key == "多目标点击顺序":
+                    if value in MATCH_ORDERS:
+                        self.find_all_order = value
+                elif key == "匹配缩放比例":
+                    self.match_scales = parse_scales(value)
+                elif key == "缩放重新搜索间隔":
+                    self.scale_sweep_misses = int(value)
+                elif key == "金字塔层数":
+                    self.pyramid_levels = int(value)
+                elif key == "金字塔候选数":
+                    self.pyramid_candidates = int(value)
+                elif key == "区域跟踪":
+                    self.roi_tracking = bool(int(value))
+                elif key == "区域扩展":
+                    self.roi_padding = int(value)
+                elif key == "全屏搜索间隔":
+                    self.roi_full_search_misses = int(value)
+                elif key == "像素签名确认":
+                    self.signature_check = bool(int(value))
+                elif key == "像素签名容差":
+                    self.signature_tolerance = int(value)
+                elif key == "颜色预筛选":
+                    self.color_key = bool(int(value))
+                elif key == "跳过未变化画面":
+                    self.change_gating = bool(int(value))
+                elif key == "画面变化阈值":
+                    self.change_threshold = int(value)
+                elif key == "只搜索变化区域":
+                    self.dirty_regions = bool(int(value))
+                elif key == "变化区域面积上限":
+                    self.dirty_region_max_area = float(value)
                 elif key == "点击方式":
                     self.click_method = value
                 elif key == "点击次数":
@@ -0,0 +1,333 @@
+import os
+import glob
+import zipfile
+import time
+import threading
+import cv2
+import numpy as np
+from core.templates import decode_image, read_image_bytes
+from core.timing import STAGE_CONVERT
+from utils.region_utils import CaptureRegion
+
+# 回放支持的图片格式
+REPLAY_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+class FrameRing:
+    """预分配的截图缓冲区环
+
+    截图直接写入轮流使用的缓冲区，尺寸不变时不再分配新内存。
+    缓冲区数量至少为2，保证上一帧在下一次截图写入时仍然有效。
+    只有直接读取像素的截图方式（mss、回放、内存）能省掉每帧的分配，
+    pyautogui / ImageGrab 经过PIL图像，每帧仍会分配整帧内存，不使用缓冲区。
+    """
+
+    def __init__(self, slots=2):
+        self.slots = max(2, slots)
+        self._buffers = [None] * self.slots
+        self._index = 0
+        self._lock = threading.Lock()
+        self.allocations = 0  # 实际分配缓冲区的次数
+
+    def acquire(self, shape, dtype=np.uint8):
+        """取下一个缓冲区，尺寸变化时重新分配"""
+        with self._lock:
+            index = self._index
+            self._index = (index + 1) % self.slots
+            buffer = self._buffers[index]
+            if buffer is None or buffer.shape != tuple(shape) or buffer.dtype != dtype:
+                buffer = np.empty(shape, dtype)
+                self._buffers[index] = buffer
+                self.allocations += 1
+            return buffer
+
+
+def convert_into(image, code, out=None):
+    """颜色转换，out尺寸匹配时直接写入out，避免分配新数组"""
+    image = np.asarray(image)
+    if out is not None and out.shape[:2] == image.shape[:2]:
+        return cv2.cvtColor(image, code, dst=out)
+    return cv2.cvtColor(image, code)
+
+
+def copy_into(image, out=None):
+    """复制图像，out尺寸匹配时直接写入out"""
+    if out is not None and out.shape == image.shape:
+        np.copyto(out, image)
+        return out
+    return np.ascontiguousarray(image)
+
+
+class FrameSource:
+    """截图来源基类
+
+    grab() 返回指定屏幕区域的BGR截图（grayscale为True时返回单通道灰度图），
+    region为None时截取整个屏幕范围，传入尺寸匹配的out缓冲区时直接写入该缓冲区；
+    screen_rect() 返回可截图的屏幕范围 (left, top, right, bottom)。
+    """
+
+    name = "base"
+    uses_buffer = True  # 写入预分配缓冲区能否省掉每帧的内存分配
+    timer = None  # StageTimer，由检测器设置，记录截图后的颜色转换耗时
+
+    def _convert(self, image, code, out=None):
+        """颜色转换到输出缓冲区，并记录转换耗时"""
+        if self.timer is None:
+            return convert_into(image, code, out)
+        start = time.perf_counter()
+        try:
+            return convert_into(image, code, out)
+        finally:
+            self.timer.lap(STAGE_CONVERT, start)
+
+    def screen_rect(self):
+        """可截图的屏幕范围"""
+        raise NotImplementedError
+
+    def grab(self, region=None, out=None, grayscale=False):
+        """截取区域，失败返回None"""
+        raise NotImplementedError
+
+    def full_region(self):
+        """整个屏幕范围对应的截图区域"""
+        left, top, right, bottom = self.screen_rect()
+        return CaptureRegion(left, top, right - left, bottom - top)
+
+    def close(self):
+        """释放资源"""
+        pass
+
+
+class PyAutoGuiSource(FrameSource):
+    """pyautogui截图（主显示器）"""
+
+    name = "pyautogui"
+    uses_buffer = False  # PIL截图和转数组每帧都会分配，缓冲区只会多占常驻内存
+
+    def __init__(self):
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def screen_rect(self):
+        width, height = self._pyautogui.size()
+        return 0, 0, width, height
+
+    def grab(self, region=None, out=None, grayscale=False):
+        region = region or self.full_region()
+        screenshot = self._pyautogui.screenshot(region=(region.left, region.top, region.width, region.height))
+        return self._convert(screenshot, cv2.COLOR_RGB2GRAY if grayscale else cv2.COLOR_RGB2BGR, out)
+
+
+class ImageGrabSource(FrameSource):
+    """PIL ImageGrab截图，支持多显示器虚拟桌面"""
+
+    name = "imagegrab"
+    uses_buffer = False  # 同pyautogui，经过PIL图像
+
+    def __init__(self):
+        from PIL import ImageGrab
+        self._image_grab = ImageGrab
+        self._screen_rect = None
+
+    def screen_rect(self):
+        if self._screen_rect is None:
+            try:
+                import win32api
+                import win32con
+                left = win32api.GetSystemMetrics(win32con.SM_XVIRTUALSCREEN)
+                top = win32api.GetSystemMetrics(win32con.SM_YVIRTUALSCREEN)
+                width = win32api.GetSystemMetrics(win32con.SM_CXVIRTUALSCREEN)
+                height = win32api.GetSystemMetrics(win32con.SM_CYVIRTUALSCREEN)
+                self._screen_rect = (left, top, left + width, top + height)
+            except ImportError:
+                width, height = self._image_grab.grab().size
+                self._screen_rect = (0, 0, width, height)
+        return self._screen_rect
+
+    def grab(self, region=None, out=None, grayscale=False):
+        region = region or self.full_region()
+        screenshot = self._image_grab.grab(bbox=region.bbox, all_screens=True)
+        return self._convert(screenshot, cv2.COLOR_RGB2GRAY if grayscale else cv2.COLOR_RGB2BGR, out)
+
+
+class MssSource(FrameSource):
+    """mss快速截图，直接读取BGRA像素，不经过PIL图像"""
+
+    name = "mss"
+
+    def __init__(self):
+        import mss
+        self._mss = mss
+        # mss实例持有系统句柄，不能跨线程使用，每个线程单独创建
+        self._local = threading.local()
+
+    def _instance(self):
+        instance = getattr(self._local, 'instance', None)
+        if instance is None:
+            instance = self._mss.mss()
+            self._local.instance = instance
+        return instance
+
+    def screen_rect(self):
+        monitor = self._instance().monitors[0]  # 第0个为全部显示器组成的虚拟桌面
+        return (monitor['left'], monitor['top'],
+                monitor['left'] + monitor['width'], monitor['top'] + monitor['height'])
+
+    def grab(self, region=None, out=None, grayscale=False):
+        region = region or self.full_region()
+        shot = self._instance().grab({
+            'left': region.left,
+            'top': region.top,
+            'width': region.width,
+            'height': region.height
+        })
+        # mss的像素数据本身就是BGRA，直接转换到缓冲区
+        return self._convert(shot, cv2.COLOR_BGRA2GRAY if grayscale else cv2.COLOR_BGRA2BGR, out)
+
+    def close(self):
+        instance = getattr(self._local, 'instance', None)
+        if instance is not None:
+            instance.close()
+            self._local.instance = None
+
+
+class ReplaySource(FrameSource):
+    """回放录制的截图，来源可以是图片目录或zip压缩包
+
+    每次grab返回下一帧（按文件名排序），loop为True时循环播放。
+    截图按整个屏幕录制，截图区域从帧中裁剪。
+    """
+
+    name = "replay"
+
+    def __init__(self, path, loop=True):
+        self.path = path
+        self.loop = loop
+        self.index = 0
+        self._lock = threading.Lock()
+        self._archive = None
+        self._screen_rect = None
+
+        if os.path.isdir(path):
+            names = glob.glob(os.path.join(path, '*'))
+        elif zipfile.is_zipfile(path):
+            self._archive = zipfile.ZipFile(path)
+            names = self._archive.namelist()
+        else:
+            names = [path]
+        self.frames = self._select_frames(names)
+
+        if not self.frames:
+            raise ValueError(f"没有可回放的截图: {path}")
+
+    @staticmethod
+    def _select_frames(names):
+        """筛选截图文件；调试目录中同时有 screen_* 和 result_* 时只回放原始截图"""
+        frames = sorted(n for n in names if n.lower().endswith(REPLAY_EXTENSIONS))
+        screens = [n for n in frames if os.path.basename(n).startswith('screen_')]
+        return screens or frames
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def finished(self):
+        """不循环时是否已播放完所有帧"""
+        return not self.loop and self.index >= len(self.frames)
+
+    def _read(self, name):
+        """读取并解码一帧"""
+        if self._archive is not None:
+            data = self._archive.read(name)
+        else:
+            data = read_image_bytes(name)
+        return decode_image(data)
+
+    def screen_rect(self):
+        if self._screen_rect is None:
+            frame = self._read(self.frames[0])
+            self._screen_rect = (0, 0, frame.shape[1], frame.shape[0])
+        return self._screen_rect
+
+    def next_frame(self):
+        """读取下一帧，不循环且已播放完时返回None"""
+        with self._lock:
+            if self.index >= len(self.frames):
+                if not self.loop:
+                    return None
+                self.index = 0
+            name = self.frames[self.index]
+            self.index += 1
+        return self._read(name)
+
+    def grab(self, region=None, out=None, grayscale=False):
+        frame = self.next_frame()
+        if frame is None:
+            return None
+        if region is not None:
+            left, top, right, bottom = region.bbox
+            frame = frame[max(0, top):max(0, bottom), max(0, left):max(0, right)]
+        if grayscale:
+            return self._convert(frame, cv2.COLOR_BGR2GRAY, out)
+        return copy_into(frame, out)
+
+    def rewind(self):
+        """回到第一帧"""
+        with self._lock:
+            self.index = 0
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+
+class MemorySource(FrameSource):
+    """从内存中的当前帧截图，由调用方在每次检测前用 set_frame 更换画面
+
+    用于基准测试: 截图的读取和解码不计入检测耗时。
+    """
+
+    name = "memory"
+
+    def __init__(self, frame=None):
+        self.frame = frame
+
+    def set_frame(self, frame):
+        """更换当前帧"""
+        self.frame = frame
+
+    def screen_rect(self):
+        if self.frame is None:
+            return 0, 0, 0, 0
+        return 0, 0, self.frame.shape[1], self.frame.shape[0]
+
+    def grab(self, region=None, out=None, grayscale=False):
+        frame = self.frame
+        if frame is None:
+            return None
+        if region is not None:
+            left, top, right, bottom = region.bbox
+            frame = frame[max(0, top):max(0, bottom), max(0, left):max(0, right)]
+        if grayscale:
+            return self._convert(frame, cv2.COLOR_BGR2GRAY, out)
+        return copy_into(frame, out)
+
+
+# 可选的截图后端
+FRAME_SOURCES = {
+    PyAutoGuiSource.name: PyAutoGuiSource,
+    ImageGrabSource.name: ImageGrabSource,
+    MssSource.name: MssSource,
+    ReplaySource.name: ReplaySource,
+}
+
+
+def create_frame_source(name, replay_path=None):
+    """按名称创建截图来源，依赖库缺失时抛出ImportError"""
+    if name == ReplaySource.name:
+        return ReplaySource(replay_path)
+    source_class = FRAME_SOURCES.get(name)
+    if source_class is None:
+        raise ValueError(f"未知的截图方式: {name}")
+    return source_class()
@@ -0,0 +1,114 @@
+import math
+import threading
+import cv2
+import numpy as np
+from core.matcher import to_gray
+
+
+class FrameChangeDetector:
+    """帧变化检测
+
+    将每帧缩小为灰度缩略图（每个像素是原图 scale x scale 块的平均值），
+    与基准缩略图比较，最大差值不超过 threshold 时视为画面未变化。
+    基准为最近一次判定为变化的帧，跳过的帧不更新基准，缓慢的渐变累积超过阈值后也能检测到。
+    画面变化时同时计算相对基准的变化区域外接矩形，供匹配时只搜索这些区域。
+    """
+
+    def __init__(self, threshold=4, scale=8):
+        self.threshold = threshold
+        self.scale = scale
+        self._lock = threading.Lock()
+        self._previous = None  # 基准缩略图
+        self.changed_regions = None  # 最近一次比较得到的变化区域，None表示没有可比较的基准帧
+
+        # 统计信息
+        self.skipped_frames = 0
+        self.processed_frames = 0
+
+    def configure(self, config):
+        """从配置同步检测参数"""
+        self.threshold = config.change_threshold
+
+    def thumbnail(self, frame):
+        """生成缩略图，先缩小再转灰度以减少计算量"""
+        height, width = frame.shape[:2]
+        size = (max(1, width // self.scale), max(1, height // self.scale))
+        return to_gray(cv2.resize(frame, size, interpolation=cv2.INTER_AREA))
+
+    def difference(self, thumbnail, previous):
+        """两张缩略图的逐像素差值"""
+        return cv2.absdiff(thumbnail, previous)
+
+    def has_changed(self, frame):
+        """检查画面相对基准是否变化，变化时把当前帧记为新的基准"""
+        thumbnail = self.thumbnail(frame)
+        with self._lock:
+            previous = self._previous
+            if previous is None or previous.shape != thumbnail.shape:
+                self._previous = thumbnail
+                self.changed_regions = None
+                return True
+                
+            diff = self.difference(thumbnail, previous)
+            if int(diff.max()) <= self.threshold:
+                self.changed_regions = []
+                return False
+            self._previous = thumbnail
+        self.changed_regions = self.find_regions(diff > self.threshold, frame.shape)
+        return True
+
+    def find_regions(self, mask, frame_shape):
+        """将缩略图上的变化掩码转换为原图坐标下的区域列表 [(x0, y0, x1, y1)]"""
+        # 膨胀一格，使相邻的小块变化合并为同一区域
+        mask = cv2.dilate(mask.astype(np.uint8), np.ones((3, 3), np.uint8))
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+
+        # 缩略图每格对应原图的实际像素数（尺寸不能整除时略大于scale）
+        height, width = frame_shape[:2]
+        fx = width / float(mask.shape[1])
+        fy = height / float(mask.shape[0])
+        
+        regions = []
+        for index in range(1, count):
+            x, y, w, h = (int(v) for v in stats[index][:4])
+            regions.append((
+                int(x * fx),
+                int(y * fy),
+                min(width, int(math.ceil((x + w) * fx))),
+                min(height, int(math.ceil((y + h) * fy)))
+            ))
+        return regions
+
+    def changed_area(self, frame_shape):
+        """最近一次变化区域占整帧的比例"""
+        if self.changed_regions is None:
+            return 1.0
+        height, width = frame_shape[:2]
+        area = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in self.changed_regions)
+        return min(1.0, area / float(width * height))
+
+    def should_process(self, frame, force=False):
+        """判断是否需要对该帧做匹配，force为True时始终匹配（例如上一帧有待处理的命中）"""
+        changed = self.has_changed(frame)
+        with self._lock:
+            if changed or force:
+                self.processed_frames += 1
+                return True
+            self.skipped_frames += 1
+            return False
+
+    def reset(self):
+        """清除基准帧，下一帧必定匹配"""
+        with self._lock:
+            self._previous = None
+            self.changed_regions = None
+
+    def stats(self):
+        """返回跳过和处理的帧数"""
+        with self._lock:
+            total = self.skipped_frames + self.processed_frames
+            return {
+                'skipped_frames': self.skipped_frames,
+                'processed_frames': self.processed_frames,
+                'skip_rate': self.skipped_frames / total if total else 0.0,
+            }
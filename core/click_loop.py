@@ -0,0 +1,115 @@
+import time
+from utils.window_utils import check_window_status
+from core.timing import STAGE_TICK, STAGE_WINDOW_STATE, STAGE_CLICK, STAGE_SLEEP
+
+# 点击后等待的时间，给界面留出响应时间
+CLICK_DELAY = 0.5
+# 调试模式暂停时等待用户单步操作的时间
+DEBUG_STEP_DELAY = 0.1
+# 窗口未激活时的检测间隔
+INACTIVE_DELAY = 0.5
+# 出错后的等待时间
+ERROR_DELAY = 1.0
+
+
+class LoopStep:
+    """一轮检测的结果"""
+
+    def __init__(self, status, active, positions=None, hwnd=None, clicked=False, delay=0.0):
+        self.status = status  # 窗口状态描述
+        self.active = active  # 本轮是否进行了检测
+        self.positions = positions or []  # 找到的点击位置
+        self.hwnd = hwnd
+        self.clicked = clicked  # 是否执行了点击
+        self.delay = delay  # 下一轮检测前应等待的秒数
+
+    def __repr__(self):
+        return (f"LoopStep(status={self.status!r}, positions={self.positions}, "
+                f"clicked={self.clicked}, delay={self.delay})")
+
+
+class ClickLoop:
+    """点击循环: 检查窗口状态、定位目标、执行点击，与界面和操作系统无关
+
+    窗口状态查询和点击器可以替换为模拟实现，界面点击线程和无界面回放使用同一套逻辑。
+    step() 只执行一轮检测并返回应等待的时间，由调用方决定如何等待。
+    各阶段耗时记录到检测器的 StageTimer。
+    """
+
+    def __init__(self, config, detector, clicker, window_status=None, logger=None):
+        self.config = config
+        self.detector = detector
+        self.clicker = clicker  # 需要提供 perform_click(x, y, hwnd, 方式, 次数, 间隔)
+        self.window_status = window_status or check_window_status
+        self.logger = logger
+        self.timer = detector.timer
+
+        # 运行选项，界面线程每轮同步
+        self.ignore_window_state = True
+        self.debug_mode = False
+        self.pause = False
+
+    def log(self, message):
+        """记录日志"""
+        if self.logger:
+            self.logger(message)
+        else:
+            print(message)
+
+    def step(self, target_images):
+        """执行一轮检测和点击"""
+        started = time.perf_counter()
+        step = self._step(target_images)
+        self.timer.lap(STAGE_TICK, started)
+        return step
+
+    def _step(self, target_images):
+        """一轮检测和点击，不含总耗时记录"""
+        start = time.perf_counter()
+        is_active, status = self.window_status(self.config.window_title)
+        self.timer.lap(STAGE_WINDOW_STATE, start)
+        if not (self.ignore_window_state or is_active):
+            return LoopStep(status, False, delay=INACTIVE_DELAY)
+
+        if self.config.find_all:
+            # 多目标模式: 一次截图找出所有目标，依次点击
+            positions, hwnd = self.detector.locate_targets(target_images, self.debug_mode, self.pause)
+        else:
+            position, hwnd = self.detector.locate_target(target_images, self.debug_mode, self.pause)
+            positions = [position] if position else []
+
+        if not positions:
+            # 未找到按钮时使用设定的间隔
+            return LoopStep(status, True, hwnd=hwnd, delay=self.config.interval)
+        if self.debug_mode and self.pause:
+            # 调试模式下等待用户单步操作
+            return LoopStep(status, True, positions, hwnd, delay=DEBUG_STEP_DELAY)
+
+        start = time.perf_counter()
+        for x, y in positions:
+            self.clicker.perform_click(
+                x,
+                y,
+                hwnd,
+                self.config.click_method,
+                self.config.click_count,
+                self.config.click_interval
+            )
+        self.timer.lap(STAGE_CLICK, start)
+        # 点击成功后等待较长时间
+        return LoopStep(status, True, positions, hwnd, clicked=True, delay=CLICK_DELAY)
+
+    def run(self, get_target_images, is_running, sleep=time.sleep, on_step=None):
+        """循环执行直到 is_running() 返回False，每轮结束后调用 on_step(结果)"""
+        while is_running():
+            try:
+                step = self.step(get_target_images())
+            except Exception as e:
+                self.log(f"发生错误: {str(e)}")
+                sleep(ERROR_DELAY)
+                continue
+            if on_step is not None:
+                on_step(step)
+            start = time.perf_counter()
+            sleep(step.delay)
+            self.timer.lap(STAGE_SLEEP, start)
@@ -3,10 +3,12 @@ import win32gui
 import win32con
 import win32api
 from utils.window_utils import find_window, screen_to_client, make_long_param
+from core.tracer import get_tracer
 
 class MouseClicker:
     def __init__(self, logger=None):
         self.logger = logger
+        self.tracer = get_tracer()
     
     def log(self, message):
         """记录日志"""
@@ -17,6 +19,11 @@ class MouseClicker:
     
     def perform_click(self, x, y, hwnd, click_method="auto", click_count=2, click_interval=0.05):
         """执行点击操作"""
+        with self.tracer.span("perform_click", "click", x=int(x), y=int(y), method=click_method):
+            return self._perform_click(x, y, hwnd, click_method, click_count, click_interval)
+    
+    def _perform_click(self, x, y, hwnd, click_method, click_count, click_interval):
+        """选择点击方式并点击"""
         if not hwnd:
             self.log("无法获取目标窗口句柄")
             return False
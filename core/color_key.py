@@ -0,0 +1,147 @@
+import threading
+import cv2
+import numpy as np
+
+# 模板中属于主色的像素至少占该比例时才生成颜色键
+MIN_FILL_RATIO = 0.2
+# 统计主色时Lab各通道的量化步长
+LAB_BIN = 8
+
+
+class ColorKey:
+    """模板主色的Lab范围，以及主色区域在模板中的外接矩形
+
+    使用Lab而不是HSV，深灰等低饱和度的按钮底色在HSV中没有可靠的色相，在Lab中仍能准确区分。
+    """
+
+    def __init__(self, lower, upper, fill_box, template_size):
+        self.lower = lower  # (L, a, b) 下限
+        self.upper = upper
+        self.fill_box = fill_box  # 主色区域在模板中的 (x, y, 宽, 高)
+        self.template_size = template_size  # (宽, 高)
+
+    def mask(self, lab):
+        """帧中属于主色的像素掩码"""
+        return cv2.inRange(lab, np.array(self.lower, np.uint8), np.array(self.upper, np.uint8))
+
+    def __repr__(self):
+        return f"ColorKey(lower={self.lower}, upper={self.upper}, fill_box={self.fill_box})"
+
+
+def build_color_key(color, tolerance=6):
+    """从模板彩色图中提取主色的Lab范围，模板没有占比足够的主色时返回None"""
+    lab = cv2.cvtColor(color, cv2.COLOR_BGR2LAB)
+    pixels = lab.reshape(-1, 3)
+
+    # 量化后出现最多的颜色作为主色
+    quantized = (pixels // LAB_BIN).astype(np.int32)
+    codes = (quantized[:, 0] * 32 + quantized[:, 1]) * 32 + quantized[:, 2]
+    peak = int(np.bincount(codes).argmax())
+    center = np.array([peak // 1024, (peak // 32) % 32, peak % 32]) * LAB_BIN + LAB_BIN // 2
+
+    near = np.abs(pixels.astype(np.int32) - center).max(axis=1) <= LAB_BIN
+    if near.sum() < MIN_FILL_RATIO * len(pixels):
+        return None
+
+    selected = pixels[near]
+    lower = tuple(int(max(0, v - tolerance)) for v in selected.min(axis=0))
+    upper = tuple(int(min(255, v + tolerance)) for v in selected.max(axis=0))
+
+    # 主色区域取最大的连通域，按钮边框外的圆角背景不计入；
+    # 不做形态学闭运算，否则细边框会被填平，按钮底色与周围背景连成一片
+    fill = near.reshape(lab.shape[:2]).astype(np.uint8) * 255
+    count, _, stats, _ = cv2.connectedComponentsWithStats(fill, connectivity=8)
+    if count < 2:
+        return None
+    largest = 1 + int(stats[1:, cv2.CC_STAT_AREA].argmax())
+    fill_box = tuple(int(v) for v in stats[largest][:4])
+    height, width = color.shape[:2]
+    x, y, w, h = fill_box
+    if x == 0 or y == 0 or x + w == width or y + h == height:
+        # 主色区域碰到模板边缘，说明与周围背景相连，在帧中无法分离出独立的连通域
+        return None
+    return ColorKey(lower, upper, fill_box, (width, height))
+
+
+class ColorKeyFilter:
+    """颜色预筛选: 用模板主色在整帧上生成候选位置，只在候选位置做模板匹配
+
+    帧转换为Lab后按颜色键阈值化，取尺寸和宽高比与模板主色区域相近的连通域作为候选，
+    把整帧 matchTemplate 换成一次向量化的掩码计算加几个小窗口匹配。
+    """
+
+    def __init__(self, size_tolerance=0.25, padding=4):
+        self.size_tolerance = size_tolerance
+        self.padding = padding
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.components = 0  # 颜色匹配的连通域总数
+        self.rejected = 0  # 因尺寸或宽高比不符被排除的连通域
+        self.candidates = 0  # 送去模板匹配的候选位置
+        self.searches = 0  # 使用颜色预筛选的模板搜索次数
+        self.skipped = 0  # 模板没有明显主色、改为整帧搜索的次数
+
+    def find_candidates(self, lab, key):
+        """返回候选搜索区域 [(x0, y0, x1, y1)]"""
+        mask = key.mask(lab)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+
+        fill_x, fill_y, fill_w, fill_h = key.fill_box
+        template_w, template_h = key.template_size
+        frame_h, frame_w = lab.shape[:2]
+        low = 1.0 - self.size_tolerance
+        high = 1.0 + self.size_tolerance
+
+        # 向量化筛选尺寸与模板主色区域相近的连通域
+        boxes = stats[1:, :4]
+        widths = boxes[:, 2]
+        heights = boxes[:, 3]
+        keep = ((widths >= fill_w * low) & (widths <= fill_w * high)
+                & (heights >= fill_h * low) & (heights <= fill_h * high))
+        rejected = int(len(boxes) - keep.sum())
+
+        regions = []
+        for x, y, _, _ in boxes[keep]:
+            # 由主色区域位置推算模板左上角，再向外留出少量余量
+            left = int(x) - fill_x - self.padding
+            top = int(y) - fill_y - self.padding
+            regions.append((
+                max(0, left),
+                max(0, top),
+                min(frame_w, left + template_w + self.padding * 2),
+                min(frame_h, top + template_h + self.padding * 2)
+            ))
+
+        with self._lock:
+            self.searches += 1
+            self.components += count - 1
+            self.rejected += rejected
+            self.candidates += len(regions)
+        return regions
+
+    def record_skip(self):
+        """记录一次无法使用颜色预筛选的搜索"""
+        with self._lock:
+            self.skipped += 1
+
+    def reset(self):
+        """清空统计"""
+        with self._lock:
+            self.components = 0
+            self.rejected = 0
+            self.candidates = 0
+            self.searches = 0
+            self.skipped = 0
+
+    def stats(self):
+        """返回候选统计"""
+        with self._lock:
+            return {
+                'searches': self.searches,
+                'components': self.components,
+                'rejected': self.rejected,
+                'candidates': self.candidates,
+                'skipped': self.skipped,
+                'candidates_per_search': self.candidates / self.searches if self.searches else 0.0,
+            }
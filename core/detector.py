@@ -1,22 +1,74 @@
-import os
 import cv2
 import time
-import threading
 from datetime import datetime
 from pathlib import Path
-from utils.window_utils import find_window, check_window_status
-from utils.image_utils import capture_screen, find_template_match, draw_match_result, locate_on_screen
+from utils.window_utils import find_window, get_window_rect, get_window_monitor
+from utils.image_utils import draw_match_result
+from utils.region_utils import window_capture_region
+from core.capture import FrameRing, create_frame_source
+from core.matcher import TemplateMatcher
+from core.templates import TemplateRegistry
+from core.template_cache import TemplateCache
+from core.template_spec import format_spec
+from core.tracker import RoiTracker
+from core.scales import ScaleCache
+from core.color_key import ColorKeyFilter
+from core.change_detector import FrameChangeDetector
+from core.tracer import get_tracer
+from core.timing import StageTimer, STAGE_WINDOW, STAGE_CAPTURE, STAGE_CHANGE, STAGE_MATCH, STAGE_DECIDE
 
 class ImageDetector:
-    def __init__(self, config, logger=None):
+    def __init__(self, config, logger=None, registry=None, frame_source=None, window_geometry=None,
+                 window_finder=None):
         self.config = config
         self.logger = logger
         
+        # 截图来源和窗口查询，可替换为回放/模拟实现以便离线运行
+        self.frame_source = frame_source
+        self.window_geometry = window_geometry or get_window_rect
+        self.window_finder = window_finder or find_window
+        self._own_frame_source = frame_source is None
+        self.frame_ring = FrameRing(config.frame_buffer_slots)  # 截图写入预分配的缓冲区（仅mss和回放）
+        
         # 调试状态
         self.last_screen = None
         self.last_match_result = None
         self.last_match_location = None
         self.last_match_value = 0
+        self.last_region = None
+        self.last_window_rect = None  # 最近一次截图时目标窗口的屏幕范围
+        
+        # 检测引擎 - 所有模板在同一帧上匹配
+        self.tracker = RoiTracker(config.roi_padding, config.roi_full_search_misses)
+        self.scale_cache = ScaleCache(config.match_scales, config.scale_sweep_misses)
+        self.color_keys = ColorKeyFilter()
+        self.matcher = TemplateMatcher(
+            pyramid_levels=config.pyramid_levels,
+            pyramid_candidates=config.pyramid_candidates,
+            tracker=self.tracker if config.roi_tracking else None,
+            workers=config.match_workers,
+            scale_cache=self.scale_cache if len(config.match_scales) > 1 else None
+        )
+        self.registry = registry if registry is not None else TemplateRegistry(logger, TemplateCache())
+        
+        # 分阶段计时 - 点击循环和匹配引擎共用，调试面板显示各阶段耗时；开启跟踪时同时写入时间线
+        self.timer = StageTimer()
+        self.matcher.timer = self.timer
+        self.tracer = get_tracer()
+        self.timer.tracer = self.tracer
+        
+        # 画面变化检测 - 画面未变化且没有待处理的命中时跳过匹配
+        self.change_detector = FrameChangeDetector(config.change_threshold)
+        self.hit_pending = False
+        self.force_full_search = True
+        self._engine_key = None
+        
+        # 图片单独的检测间隔 - 按已处理的帧数计数；画面变化后还没轮到检测的图片记为待检测，
+        # 画面不再变化时也要继续处理，直到这些图片都检测过一次
+        self.tick = 0
+        self._deferred = set()
+        self._deferred_only = False
+        
         self.debug_dir = Path(__file__).parent.parent / "debug"
         self.debug_dir.mkdir(exist_ok=True)
     
@@ -27,86 +79,363 @@ class ImageDetector:
         else:
             print(message)
     
+    def grab_frame(self, target_images, debug_mode=False, pause=False):
+        """查找窗口并截取待匹配的画面，返回 (窗口句柄, 模板列表, 截图, 截图区域)，无需匹配时返回None"""
+        # 检查是否有图片需要识别
+        if not target_images:
+            self.log("错误: 没有设置识别图片")
+            return None
+            
+        # 调试模式暂停检查
+        if debug_mode and pause:
+            time.sleep(0.1)  # 短暂休眠，减少CPU占用
+            return None
+            
+        # 查找目标窗口
+        start = time.perf_counter()
+        hwnd = self.window_finder(self.config.window_title)
+        self.timer.lap(STAGE_WINDOW, start)
+        
+        self.configure_engine()
+        all_templates = self.get_templates(target_images)
+        # 全局或任一图片设置了多个缩放比例时才启用多尺度匹配
+        self.matcher.scale_cache = self.scale_cache if (
+            len(self.config.match_scales) > 1
+            or any(t.spec is not None and t.spec.scales for t in all_templates)
+        ) else None
+        
+        # 只截取目标窗口范围，匹配坐标再换算回屏幕坐标；
+        # 只有调试显示、保存截图、颜色预筛选或彩色匹配需要时才截取彩色图
+        need_color = (
+            debug_mode
+            or self.config.save_screenshots
+            or self.config.color_key
+            or any(not template.grayscale for template in all_templates)
+        )
+        start = time.perf_counter()
+        screen, region = self.capture(hwnd, grayscale=not need_color)
+        start = self.timer.lap(STAGE_CAPTURE, start)
+        if screen is None:
+            return None
+            
+        # 保存调试信息
+        self.last_screen = screen
+        self.last_region = region
+        
+        # 画面未变化时跳过匹配
+        process = self.should_process(screen, all_templates)
+        self.timer.lap(STAGE_CHANGE, start)
+        if not process:
+            if debug_mode:
+                self.log("画面未变化，跳过匹配")
+            return None
+        templates = self.due_templates(all_templates)
+        if not templates:
+            return None
+        return hwnd, templates, screen, region
+    
     def locate_target(self, target_images, debug_mode=False, pause=False):
         """定位目标图像"""
+        with self.tracer.span("locate_target"):
+            return self._locate_target(target_images, debug_mode, pause)
+    
+    def _locate_target(self, target_images, debug_mode, pause):
+        """定位目标图像，返回 (点击位置, 窗口句柄)"""
         try:
-            # 检查是否有图片需要识别
-            if not target_images:
-                self.log("错误: 没有设置识别图片")
-                return None, None
-                
-            # 调试模式暂停检查
-            if debug_mode and pause:
-                time.sleep(0.1)  # 短暂休眠，减少CPU占用
+            frame = self.grab_frame(target_images, debug_mode, pause)
+            if frame is None:
                 return None, None
-                
-            # 查找目标窗口
-            hwnd = find_window(self.config.window_title)
+            hwnd, templates, screen, region = frame
             
-            # 截取屏幕 - 用于调试显示
-            screen = capture_screen(hwnd)
-            if screen is None:
-                return None, None
-                
-            # 保存调试信息
-            self.last_screen = screen
+            # 所有模板在同一帧上匹配，取得分最高的结果；缩放比例按窗口所在显示器分别记录
+            regions = self.get_search_regions(screen)
+            monitor = get_window_monitor(hwnd) if hwnd else None
+            start = time.perf_counter()
+            best = self.matcher.find_best(
+                screen,
+                templates,
+                self.config.confidence_threshold,
+                regions,
+                self.config.stop_on_first_hit,
+                monitor,
+                self.window_in_frame(region)
+            )
+            start = self.timer.lap(STAGE_MATCH, start)
+            self.hit_pending = best is not None and best.score >= self.matcher.template_threshold(
+                best.template, self.config.confidence_threshold)
             
-            # 使用PyAutoGUI直接识别图像 - 尝试每个目标图片
-            for img_path in target_images:
-                if not os.path.exists(img_path):
-                    self.log(f"错误: 找不到图片文件 '{img_path}'")
-                    continue
+            if self.hit_pending:
+                position = region.to_screen(best.center)
+                x_offset, y_offset = self.click_offset(best.template)
                 
-                # 使用PyAutoGUI直接识别
-                found, position, confidence = locate_on_screen(
-                    img_path, 
-                    confidence=self.config.confidence_threshold
-                )
+                # 更新匹配信息
+                self.last_match_location = position
+                self.last_match_value = best.score
                 
-                if found:
-                    # 更新匹配信息
-                    self.last_match_location = position
-                    self.last_match_value = confidence
-                    
-                    # 在调试模式下显示匹配结果
-                    if debug_mode:
-                        # 在匹配结果图像上标记位置 - 创建可视化效果
-                        template = cv2.imread(img_path)
-                        if template is not None:
-                            marked_screen, click_point = draw_match_result(
-                                screen, 
-                                template, 
-                                (position[0] - template.shape[1]//2, position[1] - template.shape[0]//2),
-                                self.config.x_offset, 
-                                self.config.y_offset
-                            )
-                            
-                            # 保存匹配结果
-                            self.last_match_result = marked_screen
-                            
-                            # 显示匹配详情
-                            self.log(f"找到图片: {os.path.basename(img_path)}")
-                            self.log(f"匹配度: {confidence:.4f}, 点击位置: ({position[0]}, {position[1]})")
-                    
-                    # 添加偏移量
-                    click_x = position[0] + self.config.x_offset
-                    click_y = position[1] + self.config.y_offset
+                # 在调试模式下显示匹配结果
+                if debug_mode:
+                    # 在匹配结果图像上标记位置 - 创建可视化效果
+                    marked_screen, click_point = draw_match_result(
+                        screen, 
+                        best.template.color, 
+                        best.location,
+                        x_offset, 
+                        y_offset
+                    )
                     
-                    # 保存截图
-                    if self.config.save_screenshots:
-                        self.save_debug_info()
+                    # 保存匹配结果
+                    self.last_match_result = marked_screen
                     
-                    return (click_x, click_y), hwnd
+                    # 显示匹配详情
+                    if best.template.scale != 1.0:
+                        self.log(f"找到图片: {best.template.name} (缩放 {best.template.scale:g})")
+                    else:
+                        self.log(f"找到图片: {best.template.name}")
+                    self.log(f"匹配度: {best.score:.4f}, 点击位置: ({position[0]}, {position[1]})")
+                
+                # 添加偏移量
+                click_x = position[0] + x_offset
+                click_y = position[1] + y_offset
+                
+                # 保存截图
+                if self.config.save_screenshots:
+                    self.save_debug_info()
+                
+                self.timer.lap(STAGE_DECIDE, start)
+                return (click_x, click_y), hwnd
             
             # 如果所有图片都没有匹配成功
             if debug_mode:
-                self.log("没有找到匹配")
+                best_score = best.score if best is not None else 0.0
+                self.log(f"没有找到匹配 (最高匹配度: {best_score:.4f})")
+            self.timer.lap(STAGE_DECIDE, start)
             return None, None
                 
         except Exception as e:
             self.log(f"检测出错: {str(e)}")
             return None, None
     
+    def locate_targets(self, target_images, debug_mode=False, pause=False):
+        """多目标模式: 在同一帧上找出所有达到阈值的目标，返回 ([点击位置], 窗口句柄)"""
+        with self.tracer.span("locate_targets"):
+            return self._locate_targets(target_images, debug_mode, pause)
+    
+    def _locate_targets(self, target_images, debug_mode, pause):
+        """在同一帧上找出所有目标"""
+        try:
+            frame = self.grab_frame(target_images, debug_mode, pause)
+            if frame is None:
+                return [], None
+            hwnd, templates, screen, region = frame
+            
+            regions = self.get_search_regions(screen)
+            monitor = get_window_monitor(hwnd) if hwnd else None
+            start = time.perf_counter()
+            hits = self.matcher.find_all(
+                screen,
+                templates,
+                self.config.confidence_threshold,
+                regions,
+                monitor,
+                self.config.find_all_order,
+                window=self.window_in_frame(region)
+            )
+            start = self.timer.lap(STAGE_MATCH, start)
+            self.hit_pending = bool(hits)
+            if not hits:
+                if debug_mode:
+                    self.log("没有找到匹配")
+                self.timer.lap(STAGE_DECIDE, start)
+                return [], None
+                
+            positions = []
+            marked_screen = screen
+            for hit in hits:
+                position = region.to_screen(hit.center)
+                x_offset, y_offset = self.click_offset(hit.template)
+                positions.append((position[0] + x_offset, position[1] + y_offset))
+                if debug_mode:
+                    marked_screen, _ = draw_match_result(
+                        marked_screen,
+                        hit.template.color,
+                        hit.location,
+                        x_offset,
+                        y_offset
+                    )
+                    self.log(f"找到图片: {hit.template.name}, 匹配度: {hit.score:.4f}, "
+                             f"点击位置: ({position[0]}, {position[1]})")
+                    
+            # 调试信息记录得分最高的命中
+            best = max(hits, key=lambda hit: hit.score)
+            self.last_match_location = region.to_screen(best.center)
+            self.last_match_value = best.score
+            if debug_mode:
+                self.last_match_result = marked_screen
+                self.log(f"共找到 {len(hits)} 个目标")
+            if self.config.save_screenshots:
+                self.save_debug_info()
+            self.timer.lap(STAGE_DECIDE, start)
+            return positions, hwnd
+            
+        except Exception as e:
+            self.log(f"检测出错: {str(e)}")
+            return [], None
+    
+    def window_in_frame(self, region):
+        """目标窗口在截图中的范围，图片的搜索范围相对该范围；没有窗口时返回None（相对整张截图）"""
+        if not self.last_window_rect or region is None:
+            return None
+        return region.rect_to_frame(self.last_window_rect)
+    
+    def click_offset(self, template):
+        """模板的点击偏移，图片单独设置时优先"""
+        if template.spec is not None:
+            return template.spec.offset_or(self.config.x_offset, self.config.y_offset)
+        return self.config.x_offset, self.config.y_offset
+    
+    def capture(self, hwnd, grayscale=False):
+        """截取匹配用的画面，返回截图和截图区域"""
+        source = self.get_frame_source()
+        if source is None:
+            return None, None
+        source.timer = self.timer
+            
+        try:
+            # 窗口范围每轮只查询一次，截图区域和图片的搜索范围共用
+            window_rect = self.window_geometry(hwnd) if hwnd else None
+            self.last_window_rect = window_rect
+            if self.config.capture_window and hwnd:
+                region = window_capture_region(
+                    hwnd,
+                    lambda _: window_rect,
+                    source.screen_rect(),
+                    self.config.capture_rect
+                )
+                if region is None:
+                    return None, None
+            else:
+                region = source.full_region()
+            shape = (region.height, region.width) if grayscale else (region.height, region.width, 3)
+            # 经过PIL图像的截图方式每帧都会分配内存，写入缓冲区省不掉分配，反而多占常驻内存
+            buffer = self.frame_ring.acquire(shape) if source.uses_buffer else None
+            return source.grab(region, buffer, grayscale), region
+        except Exception as e:
+            self.log(f"截屏错误: {str(e)}")
+            return None, None
+    
+    def get_frame_source(self):
+        """获取截图来源，截图方式设置变化时重新创建"""
+        if not self._own_frame_source:
+            return self.frame_source
+            
+        backend = self.config.capture_backend
+        if self.frame_source is not None and self.frame_source.name == backend:
+            return self.frame_source
+            
+        try:
+            source = create_frame_source(backend, self.config.replay_path)
+        except Exception as e:
+            self.log(f"无法使用截图方式 {backend}: {str(e)}")
+            # 回退到默认的pyautogui截图
+            if self.frame_source is not None:
+                return self.frame_source
+            try:
+                source = create_frame_source("pyautogui")
+            except Exception as e:
+                self.log(f"截图不可用: {str(e)}")
+                return None
+                
+        if self.frame_source is not None:
+            self.frame_source.close()
+        self.frame_source = source
+        return source
+    
+    def configure_engine(self):
+        """从配置同步检测引擎参数"""
+        self.matcher.configure(self.config)
+        self.tracker.configure(self.config)
+        self.matcher.tracker = self.tracker if self.config.roi_tracking else None
+        self.scale_cache.configure(self.config)
+        self.matcher.color_keys = self.color_keys if self.config.color_key else None
+        self.change_detector.configure(self.config)
+    
+    def should_process(self, screen, templates):
+        """判断当前帧是否需要匹配"""
+        if not self.config.change_gating:
+            return True
+            
+        # 模板、阈值或图片设置变化后必须重新匹配
+        engine_key = (
+            self.config.confidence_threshold,
+            tuple((t.digest, format_spec(t.spec) if t.spec is not None else None) for t in templates)
+        )
+        # 跟踪的按钮在原位置消失后，画面不变也要继续搜索，直到重新找到或放弃跟踪
+        pending_misses = self.config.roi_tracking and self.tracker.has_pending_misses()
+        self.force_full_search = self.hit_pending or pending_misses or engine_key != self._engine_key
+        self._engine_key = engine_key
+        self._deferred_only = False
+        if self.change_detector.should_process(screen, self.force_full_search):
+            # 画面变化后每个图片都要至少检测一次
+            self._deferred.update(t.digest for t in templates)
+            return True
+        if self._deferred:
+            # 画面没有变化，但还有图片没轮到检测，只检测这些图片
+            self._deferred_only = True
+            self.force_full_search = True
+            return True
+        return False
+    
+    def due_templates(self, templates):
+        """本轮需要检测的模板，按优先级从高到低排列（优先级相同时保持图片顺序）"""
+        tick = self.tick
+        self.tick += 1
+        due = [t for t in templates if t.spec is None or t.spec.due(tick)]
+        if self.config.change_gating:
+            if self._deferred_only:
+                due = [t for t in due if t.digest in self._deferred]
+            self._deferred.difference_update(t.digest for t in due)
+        return sorted(due, key=lambda t: -(t.spec.priority if t.spec is not None else 0))
+    
+    def get_search_regions(self, screen):
+        """获取本帧需要搜索的区域，返回None表示搜索整帧"""
+        if not self.config.change_gating or not self.config.dirty_regions or self.force_full_search:
+            return None
+        regions = self.change_detector.changed_regions
+        if not regions:
+            return None
+        # 变化面积过大时直接搜索整帧
+        if self.change_detector.changed_area(screen.shape) > self.config.dirty_region_max_area:
+            return None
+        return regions
+    
+    def get_change_stats(self):
+        """获取画面变化检测的跳过统计"""
+        return self.change_detector.stats()
+    
+    def get_roi_stats(self):
+        """获取区域跟踪的命中统计"""
+        return self.tracker.stats()
+    
+    def get_scale_stats(self):
+        """获取多尺度匹配的缩放比例统计"""
+        return self.scale_cache.stats()
+    
+    def get_color_key_stats(self):
+        """获取颜色预筛选的候选统计"""
+        return self.color_keys.stats()
+
+    def get_exact_stats(self):
+        """获取精确匹配引擎的命中和回退统计"""
+        return self.matcher.exact_stats()
+    
+    def get_stage_stats(self):
+        """获取各检测阶段的耗时统计"""
+        return self.timer.stats()
+    
+    def get_templates(self, target_images):
+        """获取已解码的模板，内容相同的图片只保留一个"""
+        return self.registry.get_templates(target_images)
+    
     def save_debug_info(self):
         """保存当前调试信息"""
         if self.last_screen is not None:
@@ -128,11 +457,38 @@ class ImageDetector:
                 f.write(f"目标窗口: {self.config.window_title}\n")
                 f.write(f"相似度阈值: {self.config.confidence_threshold:.2f}\n")
                 f.write(f"匹配算法: {self.config.algorithm}\n")
+                f.write(f"截图区域: {self.last_region}\n")
                 f.write(f"匹配坐标: {self.last_match_location}\n")
                 f.write(f"匹配值: {self.last_match_value:.4f}\n")
                 f.write(f"点击方式: {self.config.click_method}\n")
                 f.write(f"点击偏移: X={self.config.x_offset}, Y={self.config.y_offset}\n")
                 
+                roi_stats = self.get_roi_stats()
+                f.write(f"区域跟踪: 命中={roi_stats['roi_hits']}, 未命中={roi_stats['roi_misses']}, "
+                        f"全屏搜索={roi_stats['full_searches']}, 签名确认={roi_stats['signature_hits']}\n")
+                
+                scale_stats = self.get_scale_stats()
+                f.write(f"多尺度匹配: 已学习={scale_stats['learned']}, 缓存命中={scale_stats['cached_hits']}, "
+                        f"全部比例搜索={scale_stats['sweeps']}\n")
+                
+                color_stats = self.get_color_key_stats()
+                f.write(f"颜色预筛选: 搜索={color_stats['searches']}, 连通域={color_stats['components']}, "
+                        f"排除={color_stats['rejected']}, 候选={color_stats['candidates']}, "
+                        f"无主色={color_stats['skipped']}\n")
+                
+                exact_stats = self.get_exact_stats()
+                f.write(f"精确匹配: 命中={exact_stats['exact_hits']}, "
+                        f"回退相关匹配={exact_stats['exact_fallbacks']}\n")
+                
+                change_stats = self.get_change_stats()
+                f.write(f"画面变化检测: 跳过={change_stats['skipped_frames']}, "
+                        f"处理={change_stats['processed_frames']}\n")
+
+                stage_stats = self.get_stage_stats()
+                f.write("阶段耗时(p50/p95): " + ", ".join(
+                    f"{stage}={stats['p50_ms']:.2f}/{stats['p95_ms']:.2f}ms"
+                    for stage, stats in stage_stats.items()) + "\n")
+
             self.log(f"调试信息已保存到 {self.debug_dir}")
             
         else:
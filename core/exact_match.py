@@ -0,0 +1,179 @@
+import threading
+import numpy as np
+
+# 多项式哈希的底数，uint32运算溢出即自动取模2^32
+HASH_BASE = 0x01000193
+# 锚定行哈希命中的候选过多时说明该行信息量不足，放弃精确匹配
+MAX_CANDIDATES = 256
+# 锚定行中最多允许多少个靠近量化桶边界的像素，每个这样的像素使要比较的哈希数翻倍
+MAX_EDGE_PIXELS = 4
+
+
+def quant_shift(tolerance):
+    """允许每像素差值为tolerance时的量化位数，量化桶宽为 2^位数 且不小于 4*tolerance"""
+    shift = 0
+    while tolerance > 0 and (1 << shift) < 4 * tolerance:
+        shift += 1
+    return shift
+
+
+def quantize(image, shift, offset):
+    """像素加上偏移后右移量化，相差不超过容差且都远离桶边界的像素落在同一个桶"""
+    if shift == 0:
+        return image
+    return ((image.astype(np.uint16) + offset) >> shift).astype(np.uint8)
+
+
+def edge_pixels(image, shift, offset, tolerance):
+    """离量化桶边界不足tolerance的像素（按通道）: 返回 (掩码, 相邻桶方向 -1/+1)
+
+    这些像素在容差内变化时可能落入相邻的桶，其余像素的量化结果不变。
+    """
+    if shift == 0:
+        return np.zeros(image.shape, bool), np.zeros(image.shape, np.int16)
+    bucket = 1 << shift
+    remainder = (image.astype(np.uint16) + offset) & (bucket - 1)
+    low = remainder < tolerance
+    high = remainder > bucket - 1 - tolerance
+    return low | high, np.where(low, -1, 1).astype(np.int16)
+
+
+def row_variants(row, shift, offset, tolerance):
+    """一行模板像素在容差内可能的所有量化结果（靠近桶边界的像素分别取本桶和相邻桶）"""
+    quantized = quantize(row, shift, offset).astype(np.int16)
+    edges, directions = edge_pixels(row, shift, offset, tolerance)
+    positions = np.flatnonzero(edges)
+    variants = []
+    for combination in range(1 << len(positions)):
+        variant = quantized.copy().reshape(-1)
+        for bit, position in enumerate(positions):
+            if combination >> bit & 1:
+                variant[position] += directions.reshape(-1)[position]
+        variants.append(variant.reshape(quantized.shape))
+    return variants
+
+
+def pack_pixels(image):
+    """将图像转换为每像素一个整数的二维数组，彩色像素合并三个通道"""
+    if image.ndim == 2:
+        return image.astype(np.uint32)
+    image = image.astype(np.uint32)
+    return image[:, :, 0] | (image[:, :, 1] << np.uint32(8)) | (image[:, :, 2] << np.uint32(16))
+
+
+def power_table(length, base):
+    """base的0~length-1次幂（模2^32）"""
+    powers = np.full(length, base, np.uint32)
+    powers[0] = 1
+    with np.errstate(over='ignore'):
+        return np.cumprod(powers, dtype=np.uint32)
+
+
+def row_hash(values):
+    """一行像素的多项式哈希 sum(v[k] * base^k)"""
+    with np.errstate(over='ignore'):
+        return np.uint32((values * power_table(len(values), HASH_BASE)).sum(dtype=np.uint32))
+
+
+def anchor_rows(template, shift, offset, tolerance):
+    """选出锚定行: 靠近桶边界的像素不超过 MAX_EDGE_PIXELS 的行中像素值种类最多的两行，
+    信息量越大误命中越少，种类相同时边界像素少的优先；没有可用的行时返回空列表"""
+    quantized = pack_pixels(quantize(template, shift, offset))
+    edges = edge_pixels(template, shift, offset, tolerance)[0].reshape(template.shape[0], -1).sum(axis=1)
+    rows = [index for index in range(template.shape[0]) if edges[index] <= MAX_EDGE_PIXELS]
+    order = sorted(rows, key=lambda index: (-len(np.unique(quantized[index])), edges[index], index))
+    return order[:2]
+
+
+class RowHashIndex:
+    """一帧的逐行前缀哈希，每帧只计算一次，所有模板共用
+
+    每行计算 S[j] = sum(f[i] * base^i, i < j)（cumsum 在uint32下自动取模），
+    宽度为w、起点为x的窗口满足 S[x+w] - S[x] = 行哈希 * base^x，整帧比较只需几次向量运算。
+    模板的锚定行在帧中哈希相等的位置才是候选，再逐个验证整个模板。
+
+    容差大于0时哈希建立在量化后的像素上（桶宽不小于4倍容差），使差值在容差内的窗口也能成为候选；
+    锚定行中靠近桶边界的少数像素分别按本桶和相邻桶计算哈希，任一哈希相等即为候选。
+    量化有偏移0和半个桶宽两种，取锚定行较好的一种，帧的前缀哈希按用到的量化方式分别计算。
+    """
+
+    def __init__(self, image):
+        self.image = image
+        self.height, self.width = image.shape[:2]
+        self._powers = power_table(self.width, HASH_BASE)
+        self._prefixes = {}  # {(量化位数, 偏移): 前缀哈希}
+        self._lock = threading.Lock()
+
+    def prefix(self, shift=0, offset=0):
+        """按量化方式计算的逐行前缀哈希，首次用到时才计算"""
+        key = (shift, offset)
+        with self._lock:
+            prefix = self._prefixes.get(key)
+            if prefix is None:
+                pixels = pack_pixels(quantize(self.image, shift, offset))
+                prefix = np.zeros((self.height, self.width + 1), np.uint32)
+                with np.errstate(over='ignore'):
+                    np.cumsum(pixels * self._powers, axis=1, dtype=np.uint32, out=prefix[:, 1:])
+                self._prefixes[key] = prefix
+            return prefix
+
+    def find(self, template, tolerance=0):
+        """查找模板的精确（或每像素差值不超过tolerance）出现位置，按行优先顺序返回 [(x, y, 平均差值)]
+
+        锚定行哈希命中过多，或容差下没有可用的锚定行时返回None，表示无法判断，应回退到相关匹配。
+        """
+        height, width = template.shape[:2]
+        if height > self.height or width > self.width:
+            return []
+
+        # 两种量化偏移中取锚定行信息量较大的一种
+        shift = quant_shift(tolerance)
+        offsets = (0, (1 << shift) // 2) if shift else (0,)
+        quantized = {offset: pack_pixels(quantize(template, shift, offset)) for offset in offsets}
+        candidates = [(offset, anchor_rows(template, shift, offset, tolerance)) for offset in offsets]
+        candidates = [(offset, anchors) for offset, anchors in candidates if anchors]
+        if not candidates:
+            return None
+        offset, anchors = max(candidates, key=lambda item: len(np.unique(quantized[item[0]][item[1][0]])))
+        first, second = anchors[0], anchors[-1]
+        prefix = self.prefix(shift, offset)
+        rows = self.height - height + 1
+        count = self.width - width + 1
+
+        def hashes(row):
+            """锚定行所有可能量化结果的行哈希"""
+            return [row_hash(pack_pixels(variant[np.newaxis])[0])
+                    for variant in row_variants(template[row], shift, offset, tolerance)]
+
+        # 不把窗口哈希乘以 base^-x 归一化，而是把模板行哈希乘以 base^x，
+        # 整帧只需一次减法和若干次比较，乘法只作用在一维数组上
+        with np.errstate(over='ignore'):
+            windows = prefix[first:first + rows, width:] - prefix[first:first + rows, :count]
+            matched = None
+            for value in hashes(first):
+                equal = windows == value * self._powers[:count]
+                matched = equal if matched is None else matched | equal
+        # flatnonzero 比二维 nonzero 快一个数量级，命中很少时几乎只剩比较的开销
+        positions = np.flatnonzero(matched)
+        if len(positions) > MAX_CANDIDATES:
+            return None
+        ys, xs = np.divmod(positions, count)
+
+        # 第二锚定行只在候选位置上计算
+        with np.errstate(over='ignore'):
+            rows_second = ys + second
+            actual = prefix[rows_second, xs + width] - prefix[rows_second, xs]
+            keep = np.zeros(len(ys), bool)
+            for value in hashes(second):
+                keep |= actual == value * self._powers[xs]
+        ys = ys[keep]
+        xs = xs[keep]
+
+        matches = []
+        template = template.astype(np.int16)
+        for y, x in zip(ys.tolist(), xs.tolist()):
+            window = self.image[y:y + height, x:x + width].astype(np.int16)
+            diff = np.abs(window - template)
+            if int(diff.max()) <= tolerance:
+                matches.append((x, y, float(diff.mean())))
+        return matches
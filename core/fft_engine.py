@@ -0,0 +1,125 @@
+import threading
+import cv2
+import numpy as np
+
+# 分母小于该值时视为平坦区域，得分记为0
+FLAT_EPSILON = 1e-6
+
+
+def channels_of(image):
+    """将图像拆分为单通道float32列表"""
+    image = image.astype(np.float32)
+    if image.ndim == 2:
+        return [image]
+    return list(cv2.split(image))
+
+
+def template_spectrum(image, dft_size):
+    """计算去均值模板在指定DFT尺寸下的频谱（每通道一个CCS压缩频谱）
+
+    返回 (频谱列表, 去均值模板的平方和)。
+    """
+    dft_height, dft_width = dft_size
+    spectra = []
+    norm = 0.0
+    for channel in channels_of(image):
+        channel = channel - float(channel.mean())
+        norm += float((channel * channel).sum())
+        padded = np.zeros((dft_height, dft_width), np.float32)
+        padded[:channel.shape[0], :channel.shape[1]] = channel
+        spectra.append(cv2.dft(padded))
+    return spectra, norm
+
+
+def window_sums(integral, height, width):
+    """用积分图计算每个 height x width 窗口内的和"""
+    return (integral[height:, width:] - integral[:-height, width:]
+            - integral[height:, :-width] + integral[:-height, :-width])
+
+
+class FrameSpectrum:
+    """一帧的频谱和积分图，每帧只计算一次，所有模板共用
+
+    归一化相关系数 (TM_CCOEFF_NORMED) 的分子是帧与去均值模板的互相关，
+    通过频谱相乘后做一次逆变换得到；分母用积分图计算每个窗口的方差。
+    帧按最优DFT尺寸补零，合法匹配位置不受循环卷积回绕影响。
+    """
+
+    def __init__(self, image):
+        self.height, self.width = image.shape[:2]
+        self.dft_size = (cv2.getOptimalDFTSize(self.height), cv2.getOptimalDFTSize(self.width))
+        self.spectra = []
+        self.integrals = []
+        for channel in channels_of(image):
+            padded = np.zeros(self.dft_size, np.float32)
+            padded[:self.height, :self.width] = channel
+            self.spectra.append(cv2.dft(padded))
+            self.integrals.append(cv2.integral2(channel, sdepth=cv2.CV_64F))
+        self._lock = threading.Lock()
+        self._window_norms = {}  # {(高, 宽): 每个窗口去均值后的L2范数}
+
+    @property
+    def channels(self):
+        return len(self.spectra)
+
+    def window_norm(self, height, width):
+        """每个窗口去均值后的L2范数，尺寸相同的模板共用"""
+        key = (height, width)
+        with self._lock:
+            norm = self._window_norms.get(key)
+        if norm is None:
+            count = float(height * width)
+            variance = None
+            for sums, squares in self.integrals:
+                window_sum = window_sums(sums, height, width)
+                channel_variance = window_sums(squares, height, width) - window_sum * window_sum / count
+                variance = channel_variance if variance is None else variance + channel_variance
+            norm = np.sqrt(np.maximum(variance, 0)).astype(np.float32)
+            with self._lock:
+                self._window_norms[key] = norm
+        return norm
+
+    def match(self, template_spectra, template_norm, height, width):
+        """返回与 cv2.matchTemplate(TM_CCOEFF_NORMED) 相同尺寸的结果图，模板比帧大时返回None"""
+        if height > self.height or width > self.width:
+            return None
+        result_height = self.height - height + 1
+        result_width = self.width - width + 1
+
+        numerator = None
+        for spectrum, template in zip(self.spectra, template_spectra):
+            product = cv2.mulSpectrums(spectrum, template, 0, conjB=True)
+            correlation = cv2.idft(product, flags=cv2.DFT_SCALE | cv2.DFT_REAL_OUTPUT)
+            correlation = correlation[:result_height, :result_width]
+            numerator = correlation if numerator is None else numerator + correlation
+
+        denominator = self.window_norm(height, width) * np.float32(np.sqrt(template_norm))
+        result = np.zeros((result_height, result_width), np.float32)
+        np.divide(numerator, denominator, out=result, where=denominator > FLAT_EPSILON)
+        return np.clip(result, -1.0, 1.0, out=result)
+
+
+class SpectrumCache:
+    """模板频谱缓存，按 (模板键, DFT尺寸, 是否灰度) 保存，帧尺寸不变时模板频谱只计算一次"""
+
+    def __init__(self, limit=64):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key, image, dft_size):
+        """获取模板频谱 (频谱列表, 平方和)"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            entry = template_spectrum(image, dft_size)
+            with self._lock:
+                if len(self._entries) >= self.limit:
+                    # 帧尺寸变化后旧尺寸的频谱不再使用，直接清空
+                    self._entries.clear()
+                self._entries[key] = entry
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
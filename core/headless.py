@@ -0,0 +1,146 @@
+import json
+import time
+from core.click_loop import ClickLoop
+from core.detector import ImageDetector
+from core.templates import TemplateRegistry
+
+
+class VirtualClock:
+    """虚拟时钟: 等待只推进时间而不真正休眠，检测本身的耗时按实际测量计入"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def advance(self, seconds):
+        self.now += max(0.0, seconds)
+
+    sleep = advance
+
+
+class FakeWindow:
+    """模拟的目标窗口，代替 find_window / check_window_status / get_window_rect
+
+    rect 为窗口在回放截图中的位置 (left, top, right, bottom)，None时为整张截图。
+    """
+
+    def __init__(self, title, rect=None, hwnd=1, active=True):
+        self.title = title
+        self.rect = rect
+        self.hwnd = hwnd
+        self.active = active
+        self.frame_rect = None  # 回放截图的范围，rect为None时使用
+
+    def find_window(self, title):
+        return self.hwnd if title == self.title else None
+
+    def window_rect(self, hwnd):
+        if hwnd != self.hwnd:
+            return None
+        return self.rect or self.frame_rect
+
+    def check_status(self, title):
+        """与 check_window_status 返回相同格式的 (是否激活, 状态描述)"""
+        if title != self.title:
+            return False, f"等待{title}窗口"
+        if not self.active:
+            return False, f"{title}窗口未激活"
+        return True, f"{title}窗口已激活"
+
+
+class RecordingClicker:
+    """记录点击而不操作鼠标，接口与 MouseClicker.perform_click 相同"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.clicks = []
+
+    def perform_click(self, x, y, hwnd, click_method="auto", click_count=2, click_interval=0.05):
+        self.clicks.append({
+            'time': round(self.clock.now, 4),
+            'x': int(x),
+            'y': int(y),
+            'hwnd': hwnd,
+            'method': click_method,
+            'count': click_count,
+        })
+        return True
+
+
+class HeadlessRunner:
+    """无界面运行完整的点击循环: 回放截图、模拟窗口、记录点击，输出检测和点击的时间线
+
+    与界面点击线程使用同一个 ClickLoop 和 ImageDetector，可以在Linux上重复运行和性能分析。
+    """
+
+    def __init__(self, config, frame_source, target_images, window=None, logger=None):
+        self.config = config
+        self.frame_source = frame_source
+        self.target_images = target_images
+        self.logger = logger or (lambda message: None)
+        self.clock = VirtualClock()
+        self.window = window or FakeWindow(config.window_title)
+        self.window.frame_rect = frame_source.screen_rect()
+        self.clicker = RecordingClicker(self.clock)
+        # 模板不写入磁盘缓存，回放运行不在工作目录中留下文件
+        self.detector = ImageDetector(
+            config,
+            self.logger,
+            registry=TemplateRegistry(self.logger),
+            frame_source=frame_source,
+            window_geometry=self.window.window_rect,
+            window_finder=self.window.find_window
+        )
+        self.loop = ClickLoop(config, self.detector, self.clicker, self.window.check_status, self.logger)
+        self.loop.ignore_window_state = False  # 由模拟窗口决定是否检测
+        self.timeline = []
+
+    def run(self, max_ticks=None):
+        """运行到回放结束（不循环回放时）或达到 max_ticks 轮，返回时间线"""
+        tick = 0
+        while max_ticks is None or tick < max_ticks:
+            if getattr(self.frame_source, 'finished', False):
+                break
+            clicks_before = len(self.clicker.clicks)
+            started = self.clock.now
+            start = time.perf_counter()
+            step = self.loop.step(self.target_images)
+            elapsed = time.perf_counter() - start
+            # 点击发生在检测完成之后
+            self.clock.advance(elapsed)
+            for click in self.clicker.clicks[clicks_before:]:
+                click['time'] = round(self.clock.now, 4)
+            self.timeline.append({
+                'tick': tick,
+                'time': round(started, 4),
+                'detect_ms': round(elapsed * 1000, 3),
+                'status': step.status,
+                'positions': [list(p) for p in step.positions],
+                'clicks': self.clicker.clicks[clicks_before:],
+                'delay': step.delay,
+            })
+            self.clock.sleep(step.delay)
+            tick += 1
+        return self.timeline
+
+    def summary(self):
+        """时间线统计"""
+        detect = sorted(event['detect_ms'] for event in self.timeline)
+        hits = [event for event in self.timeline if event['positions']]
+        return {
+            'ticks': len(self.timeline),
+            'detections': len(hits),
+            'clicks': len(self.clicker.clicks),
+            'virtual_seconds': round(self.clock.now, 3),
+            'detect_ms_median': detect[len(detect) // 2] if detect else 0.0,
+            'detect_ms_max': detect[-1] if detect else 0.0,
+            'first_click_time': self.clicker.clicks[0]['time'] if self.clicker.clicks else None,
+        }
+
+    def write_timeline(self, path):
+        """保存时间线为JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'summary': self.summary(),
+                'stages': self.detector.get_stage_stats(),
+                'timeline': self.timeline,
+            }, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,760 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from core.templates import build_pyramid
+from core.tracker import template_key
+from core.fft_engine import FrameSpectrum, SpectrumCache
+from core.exact_match import RowHashIndex
+from core.timing import STAGE_CONVERT, match_stage
+from utils.region_utils import intersect_rect
+from utils.tile_utils import match_tiled
+
+# 金字塔顶层模板的最小边长，过小的模板在粗搜索中无法可靠定位
+MIN_PYRAMID_TEMPLATE_SIZE = 12
+
+# 匹配引擎: 逐模板调用 cv2.matchTemplate，所有模板共用一次帧FFT，
+# 或用行哈希查找像素完全相同的位置（未找到时回退到 TM_CCOEFF_NORMED）
+ENGINE_TEMPLATE = "TM_CCOEFF_NORMED"
+ENGINE_FFT = "FFT_NCC"
+ENGINE_EXACT = "EXACT"
+MATCH_ENGINES = (ENGINE_TEMPLATE, ENGINE_FFT, ENGINE_EXACT)
+
+# 多目标模式: 每个模板最多取出的命中数，以及非极大值抑制的重叠比例（交并比）上限
+MAX_MATCHES_PER_TEMPLATE = 32
+NMS_OVERLAP = 0.3
+# 多目标结果的排序方式: 按得分从高到低，或按位置从上到下、从左到右
+ORDER_SCORE = "score"
+ORDER_POSITION = "position"
+MATCH_ORDERS = (ORDER_SCORE, ORDER_POSITION)
+
+
+def to_gray(frame):
+    """将BGR/BGRA帧转换为灰度图，已是灰度则原样返回"""
+    if frame.ndim == 2:
+        return frame
+    if frame.shape[2] == 4:
+        return cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def expand_regions(regions, width, height, frame_shape, bounds=None):
+    """将区域向外扩展模板尺寸并合并重叠区域，保证与变化区域部分重叠的模板也能被完整匹配
+
+    给定 bounds (x0, y0, x1, y1) 时扩展后的区域不超出该范围（模板的搜索范围），默认不超出整帧。
+    """
+    frame_height, frame_width = frame_shape[:2]
+    left, top, right, bottom = bounds if bounds is not None else (0, 0, frame_width, frame_height)
+    expanded = []
+    for x0, y0, x1, y1 in regions:
+        region = [
+            max(left, x0 - width),
+            max(top, y0 - height),
+            min(right, x1 + width),
+            min(bottom, y1 + height)
+        ]
+        if region[2] > region[0] and region[3] > region[1]:
+            expanded.append(region)
+
+    # 反复合并有重叠的区域，直到没有可合并的为止
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        for region in expanded:
+            for other in result:
+                if (region[0] <= other[2] and other[0] <= region[2]
+                        and region[1] <= other[3] and other[1] <= region[3]):
+                    other[0] = min(other[0], region[0])
+                    other[1] = min(other[1], region[1])
+                    other[2] = max(other[2], region[2])
+                    other[3] = max(other[3], region[3])
+                    merged = True
+                    break
+            else:
+                result.append(region)
+        expanded = result
+    return [tuple(region) for region in expanded]
+
+
+def box_overlap(a, b):
+    """两个 (x, y, 宽, 高) 矩形的交并比"""
+    width = min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0])
+    height = min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    intersection = width * height
+    return intersection / float(a[2] * a[3] + b[2] * b[3] - intersection)
+
+
+def non_max_suppression(results, overlap=NMS_OVERLAP):
+    """非极大值抑制: 按得分从高到低保留结果，与已保留结果重叠过多的丢弃，得分相同时靠前的优先"""
+    kept = []
+    for result in sorted(results, key=lambda r: -r.score):
+        if all(box_overlap(result.box, other.box) <= overlap for other in kept):
+            kept.append(result)
+    return kept
+
+
+def sort_results(results, order=ORDER_SCORE):
+    """按得分或位置排序匹配结果"""
+    if order == ORDER_POSITION:
+        return sorted(results, key=lambda r: (r.location[1], r.location[0]))
+    return sorted(results, key=lambda r: -r.score)
+
+
+class MatchResult:
+    """单个模板的匹配结果"""
+
+    def __init__(self, template, score, location):
+        self.template = template
+        self.score = float(score)
+        self.location = location  # 匹配区域左上角 (x, y)
+
+    @property
+    def center(self):
+        """匹配区域中心点"""
+        x, y = self.location
+        return x + self.template.width // 2, y + self.template.height // 2
+
+    @property
+    def box(self):
+        """匹配区域 (x, y, 宽, 高)"""
+        return self.location[0], self.location[1], self.template.width, self.template.height
+
+    def __repr__(self):
+        return f"MatchResult({self.template.name!r}, score={self.score:.4f}, location={self.location})"
+
+
+class PreparedFrame:
+    """同一帧的灰度图和彩色图，按需转换且每帧只转换一次，可在多个匹配线程间共用"""
+
+    def __init__(self, frame, timer=None, window=None):
+        self.frame = frame
+        self.timer = timer  # StageTimer，记录颜色转换耗时
+        self.window = window  # 目标窗口在帧中的范围 (x0, y0, x1, y1)，可超出帧；模板的搜索范围相对该窗口
+        self._gray = frame if frame.ndim == 2 else None
+        self._color = None
+        self._lab = None
+        self._pyramids = {}
+        self._spectra = {}
+        self._row_hashes = {}
+        self._lock = threading.Lock()
+
+    @property
+    def shape(self):
+        return self.frame.shape[:2]
+
+    @property
+    def gray(self):
+        """灰度图"""
+        if self._gray is None:
+            with self._lock:
+                if self._gray is None:
+                    start = time.perf_counter()
+                    self._gray = to_gray(self.frame)
+                    self._record_convert(start)
+        return self._gray
+
+    @property
+    def color(self):
+        """BGR彩色图，帧本身是灰度图时返回None"""
+        if self._color is None and self.frame.ndim == 3:
+            with self._lock:
+                if self._color is None:
+                    if self.frame.shape[2] == 4:
+                        start = time.perf_counter()
+                        self._color = cv2.cvtColor(self.frame, cv2.COLOR_BGRA2BGR)
+                        self._record_convert(start)
+                    else:
+                        self._color = self.frame
+        return self._color
+
+    @property
+    def lab(self):
+        """Lab彩色图，帧本身是灰度图时返回None"""
+        if self._lab is None:
+            color = self.color
+            if color is None:
+                return None
+            with self._lock:
+                if self._lab is None:
+                    start = time.perf_counter()
+                    self._lab = cv2.cvtColor(color, cv2.COLOR_BGR2LAB)
+                    self._record_convert(start)
+        return self._lab
+
+    def _record_convert(self, start):
+        """记录一次颜色转换耗时"""
+        if self.timer is not None:
+            self.timer.lap(STAGE_CONVERT, start)
+
+    def image_for(self, template):
+        """模板要求彩色匹配且帧为彩色时返回彩色图，否则返回灰度图"""
+        if not template.grayscale and self.color is not None:
+            return self.color
+        return self.gray
+
+    def pyramid(self, image, levels):
+        """帧金字塔，每种颜色模式只构造一次"""
+        key = image.ndim
+        with self._lock:
+            pyramid = self._pyramids.get(key)
+            if pyramid is None or len(pyramid) <= levels:
+                pyramid = build_pyramid(image, levels)
+                self._pyramids[key] = pyramid
+            return pyramid
+
+    def spectrum(self, image):
+        """帧频谱和积分图，每种颜色模式只计算一次"""
+        key = image.ndim
+        with self._lock:
+            spectrum = self._spectra.get(key)
+            if spectrum is None:
+                spectrum = FrameSpectrum(image)
+                self._spectra[key] = spectrum
+            return spectrum
+
+    def row_hashes(self, image):
+        """帧的逐行前缀哈希，每种颜色模式只计算一次"""
+        key = image.ndim
+        with self._lock:
+            index = self._row_hashes.get(key)
+            if index is None:
+                index = RowHashIndex(image)
+                self._row_hashes[key] = index
+            return index
+
+
+class TemplateMatcher:
+    """在同一帧截图上匹配全部模板的检测引擎
+
+    帧和模板都是NumPy数组，不依赖截图或窗口API，可以直接对保存的截图做基准测试。
+    workers 大于1时模板分配到线程池并行匹配（cv2.matchTemplate 执行时会释放GIL），
+    结果仍按模板顺序合并，与单线程匹配完全一致。
+    """
+
+    def __init__(self, method=cv2.TM_CCOEFF_NORMED, pyramid_levels=0, pyramid_candidates=3, tracker=None,
+                 workers=1, engine=ENGINE_TEMPLATE, scale_cache=None):
+        self.method = method
+        self.tracker = tracker  # RoiTracker，优先在最近命中位置附近搜索
+        self.scale_cache = scale_cache  # ScaleCache，多尺度搜索并记住每个模板命中的缩放比例
+        self.timer = None  # StageTimer，记录颜色转换和每个模板的匹配耗时
+        
+        # 颜色预筛选: ColorKeyFilter，按模板主色找出候选位置，只在候选位置匹配
+        self.color_keys = None
+        
+        # 像素签名: 在最近命中位置先验证少量像素，确认命中时跳过 matchTemplate
+        self.signature_check = False
+        self.signature_tolerance = 8
+        
+        # FFT引擎: 整帧搜索时每帧只做一次FFT，各模板只需频谱相乘和一次逆变换
+        self.engine = engine
+        self.spectrum_cache = SpectrumCache()
+        
+        # 精确匹配引擎: 每像素差值不超过该值视为命中，统计命中和回退次数
+        self.exact_tolerance = 2
+        self.exact_hits = 0
+        self.exact_fallbacks = 0
+        self._stats_lock = threading.Lock()
+        
+        # 金字塔模式: 先在缩小的帧上粗搜索，再在原图小窗口内确认候选位置
+        self.pyramid_levels = pyramid_levels
+        self.pyramid_candidates = pyramid_candidates
+        
+        # 并行匹配线程数，1为在调用线程中逐个匹配
+        self.workers = workers
+        self._executor = None
+        self._executor_workers = 0
+        self._executor_lock = threading.Lock()
+
+    def configure(self, config):
+        """从配置同步匹配参数"""
+        self.pyramid_levels = config.pyramid_levels
+        self.pyramid_candidates = config.pyramid_candidates
+        self.workers = config.match_workers
+        self.signature_check = config.signature_check
+        self.signature_tolerance = config.signature_tolerance
+        self.engine = config.algorithm if config.algorithm in MATCH_ENGINES else ENGINE_TEMPLATE
+
+    def _get_executor(self):
+        """获取匹配线程池，线程数变化时重新创建"""
+        with self._executor_lock:
+            if self._executor is None or self._executor_workers != self.workers:
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="matcher")
+                self._executor_workers = self.workers
+            return self._executor
+
+    def close(self):
+        """关闭匹配线程池"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def _best_in_result(self, result):
+        """从匹配结果图中取最佳值和位置"""
+        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+        # 平方差类算法值越小越好
+        if self.method in (cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED):
+            return 1.0 - min_val, min_loc
+        return max_val, max_loc
+
+    def match(self, frame, template, frame_pyramid=None, executor=None, spectrum=None):
+        """在帧上匹配单个模板，帧为灰度图时用灰度模板，模板比帧大时返回None
+
+        给定线程池时大帧分块并行匹配，结果位置与整帧匹配相同；
+        给定帧频谱时用FFT计算归一化相关系数。
+        """
+        image = template.image(frame.ndim == 2)
+        if image.shape[0] > frame.shape[0] or image.shape[1] > frame.shape[1]:
+            return None
+
+        level = self._pyramid_level(template)
+        if level > 0:
+            if frame_pyramid is None or len(frame_pyramid) <= level:
+                frame_pyramid = build_pyramid(frame, level)
+            return self._match_pyramid(frame_pyramid, template, level)
+
+        if spectrum is not None:
+            result = self._match_spectrum(spectrum, template, frame.ndim == 2)
+        elif executor is not None:
+            result = match_tiled(frame, image, self.method, executor)
+        else:
+            result = cv2.matchTemplate(frame, image, self.method)
+        score, location = self._best_in_result(result)
+        return MatchResult(template, score, location)
+
+    def _match_exact(self, index, frame, template):
+        """用行哈希查找模板的精确出现位置，多处命中时取行优先的第一个，未命中返回None
+
+        得分在命中位置上用匹配方法重新计算（只算一个位置），与其他引擎的得分可比较。
+        """
+        matches = index.find(template.image(frame.ndim == 2), self.exact_tolerance)
+        with self._stats_lock:
+            if matches:
+                self.exact_hits += 1
+            else:
+                self.exact_fallbacks += 1
+        if not matches:
+            return None
+        x, y, _ = matches[0]
+        return self.match_region(frame, template, (x, y, x + template.width, y + template.height))
+
+    def exact_stats(self):
+        """返回精确匹配引擎的命中和回退次数"""
+        with self._stats_lock:
+            return {'exact_hits': self.exact_hits, 'exact_fallbacks': self.exact_fallbacks}
+
+    def _match_spectrum(self, spectrum, template, grayscale):
+        """用帧频谱计算模板的归一化相关系数结果图"""
+        key = (template_key(template), spectrum.dft_size, grayscale)
+        spectra, norm = self.spectrum_cache.get(key, template.image(grayscale), spectrum.dft_size)
+        return spectrum.match(spectra, norm, template.height, template.width)
+
+    def match_region(self, frame, template, region):
+        """只在区域 (x0, y0, x1, y1) 内匹配，返回屏幕坐标下的结果"""
+        x0, y0, x1, y1 = region
+        image = template.image(frame.ndim == 2)
+        if x1 - x0 < image.shape[1] or y1 - y0 < image.shape[0]:
+            return None
+        result = cv2.matchTemplate(frame[y0:y1, x0:x1], image, self.method)
+        score, (x, y) = self._best_in_result(result)
+        return MatchResult(template, score, (x0 + x, y0 + y))
+
+    def _pyramid_level(self, template):
+        """计算模板可用的金字塔层数，顶层模板不能小于最小边长"""
+        level = 0
+        size = min(template.width, template.height)
+        while level < self.pyramid_levels and (size >> (level + 1)) >= MIN_PYRAMID_TEMPLATE_SIZE:
+            level += 1
+        return level
+
+    def _match_pyramid(self, frame_pyramid, template, level):
+        """金字塔匹配: 顶层找出前K个候选，再在原图的小窗口内逐个确认"""
+        frame = frame_pyramid[0]
+        grayscale = frame.ndim == 2
+        coarse_frame = frame_pyramid[level]
+        coarse_template = template.pyramid(level, grayscale)[level]
+        if (coarse_template.shape[0] > coarse_frame.shape[0]
+                or coarse_template.shape[1] > coarse_frame.shape[1]):
+            return None
+
+        coarse = cv2.matchTemplate(coarse_frame, coarse_template, self.method)
+        if self.method in (cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED):
+            coarse = -coarse
+
+        image = template.image(grayscale)
+        th, tw = image.shape[:2]
+        ch, cw = coarse_template.shape[:2]
+        scale = 1 << level
+        pad = scale * 2  # 降采样带来的位置误差
+        best = None
+
+        for _ in range(max(1, self.pyramid_candidates)):
+            _, _, _, (cx, cy) = cv2.minMaxLoc(coarse)
+
+            # 在原图中候选位置附近的小窗口内确认
+            x0 = max(0, cx * scale - pad)
+            y0 = max(0, cy * scale - pad)
+            x1 = min(frame.shape[1], cx * scale + pad + tw)
+            y1 = min(frame.shape[0], cy * scale + pad + th)
+            if x1 - x0 >= tw and y1 - y0 >= th:
+                result = cv2.matchTemplate(frame[y0:y1, x0:x1], image, self.method)
+                score, (x, y) = self._best_in_result(result)
+                if best is None or score > best.score:
+                    best = MatchResult(template, score, (x0 + x, y0 + y))
+
+            # 抑制该候选周围区域，寻找下一个候选
+            coarse[max(0, cy - ch // 2):cy + ch // 2 + 1, max(0, cx - cw // 2):cx + cw // 2 + 1] = -np.inf
+        return best
+
+    def match_regions(self, frame, template, regions, bounds=None):
+        """只在给定区域内搜索，区域先按模板尺寸扩展并合并，不超出 bounds（模板的搜索范围）"""
+        best = None
+        for region in expand_regions(regions, template.width, template.height, frame.shape, bounds):
+            result = self.match_region(frame, template, region)
+            if result is not None and (best is None or result.score > best.score):
+                best = result
+        return best
+
+    def _best_region_match(self, frame, template, regions):
+        """在多个区域内匹配，返回得分最高的结果"""
+        best = None
+        for region in regions:
+            result = self.match_region(frame, template, region)
+            if result is not None and (best is None or result.score > best.score):
+                best = result
+        return best
+
+    def _color_candidates(self, prepared, template):
+        """颜色预筛选的候选区域，帧为灰度图或模板没有主色时返回None"""
+        if self.color_keys is None:
+            return None
+        # 先取模板主色，没有主色的模板不需要把整帧转换为Lab
+        key = template.color_key()
+        lab = prepared.lab if key is not None else None
+        if lab is None or key is None:
+            self.color_keys.record_skip()
+            return None
+        return self.color_keys.find_candidates(lab, key)
+
+    def _match_signature(self, frame, template, threshold, roi=None):
+        """在最近命中位置验证像素签名，确认命中时返回结果，否则返回None
+
+        签名只判断是否命中，结果沿用该位置上一次完整匹配的得分，与其他模板的匹配得分可比较。
+        """
+        last_hit = self.tracker.last_hit(template)
+        if last_hit is None:
+            return None
+        location, score = last_hit
+        if score is None or score < threshold:
+            return None
+        x, y = location
+        if roi is not None and (x < roi[0] or y < roi[1]
+                                or x + template.width > roi[2] or y + template.height > roi[3]):
+            return None
+        signature = template.signature(frame.ndim == 2, self.signature_tolerance)
+        if signature.verify(frame, location) is None:
+            return None
+        self.tracker.record_signature_hit(template)
+        return MatchResult(template, score, location)
+
+    def _match_tracked(self, frame, template, threshold, roi=None):
+        """先在最近命中位置附近搜索，设置了搜索范围 roi 时不超出该范围
+
+        返回 (结果, 是否需要更大范围搜索)；区域内未命中时总是需要。
+        """
+        if self.signature_check:
+            result = self._match_signature(frame, template, threshold, roi)
+            if result is not None:
+                return result, False
+                
+        regions = self.tracker.regions(template, frame.shape)
+        if roi is not None:
+            regions = [r for r in (intersect_rect(region, roi) for region in regions) if r is not None]
+        if not regions:
+            return None, True
+
+        best = self._best_region_match(frame, template, regions)
+        if best is not None and best.score >= threshold:
+            self.tracker.record_hit(template, best.location, best.score, from_roi=True)
+            return best, False
+        self.tracker.record_miss(template)
+        return best, True
+
+    @staticmethod
+    def template_threshold(template, threshold):
+        """模板单独设置了阈值时使用该阈值，否则使用全局阈值"""
+        spec = template.spec
+        if threshold is None or spec is None:
+            return threshold
+        return spec.threshold_or(threshold)
+
+    @staticmethod
+    def _template_roi(template, prepared):
+        """模板设置的搜索范围在帧中的像素区域，未设置时返回None"""
+        spec = template.spec
+        return spec.roi_region(prepared.shape, prepared.window) if spec is not None else None
+
+    @staticmethod
+    def _template_regions(regions, roi):
+        """模板设置了搜索范围时，整帧搜索改为只搜索该范围；变化区域在扩展时限制在该范围内"""
+        if roi is None or regions is not None:
+            return regions
+        return [roi]
+
+    def _match_template(self, prepared, template, threshold, regions, executor=None):
+        """匹配单个模板，依次尝试最近命中区域、变化区域、颜色候选区域和整帧"""
+        image = prepared.image_for(template)
+        threshold = self.template_threshold(template, threshold)
+        roi = self._template_roi(template, prepared)
+        regions = self._template_regions(regions, roi)
+        tracking = self.tracker is not None and threshold is not None
+        tracked = None
+        if tracking:
+            tracked, full_search = self._match_tracked(image, template, threshold, roi)
+            if not full_search:
+                return tracked
+            # 区域内未命中时立即搜索变化区域或整帧，按钮移动后下一轮即可找到
+            self.tracker.record_full_search()
+            
+        candidates = None
+        if regions is None:
+            candidates = self._color_candidates(prepared, template)
+            
+        if regions is not None:
+            result = self.match_regions(image, template, regions, roi)
+        elif candidates is not None:
+            # 颜色预筛选没有候选时视为未找到，不再做整帧搜索
+            result = self._best_region_match(image, template, candidates)
+        else:
+            result = None
+            if self.engine == ENGINE_EXACT:
+                result = self._match_exact(prepared.row_hashes(image), image, template)
+            if result is None:
+                result = self._match_full(prepared, image, template, executor)
+        if tracked is not None and (result is None or tracked.score > result.score):
+            result = tracked
+        if result is not None and tracking and result.score >= threshold:
+            self.tracker.record_hit(template, result.location, result.score)
+        return result
+
+    def _match_full(self, prepared, image, template, executor=None):
+        """整帧搜索，帧金字塔和帧频谱每帧只构造一次，所有模板共用"""
+        frame_pyramid = None
+        spectrum = None
+        if self.pyramid_levels > 0:
+            frame_pyramid = prepared.pyramid(image, self.pyramid_levels)
+        if (self.engine == ENGINE_FFT and self.method == cv2.TM_CCOEFF_NORMED
+                and self._pyramid_level(template) == 0):
+            spectrum = prepared.spectrum(image)
+        return self.match(image, template, frame_pyramid, executor, spectrum)
+
+    def _timed(self, func, template, *args):
+        """调用单个模板的匹配函数，并记录该模板的匹配耗时"""
+        if self.timer is None:
+            return func(*args)
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.timer.lap(match_stage(template), start)
+
+    def _match_parallel(self, prepared, templates, threshold, regions, first_hit):
+        """在线程池中并行匹配，按模板顺序收集结果，命中后取消尚未开始的模板"""
+        executor = self._get_executor()
+        futures = [
+            executor.submit(self._timed, self._match_template, template, prepared, template, threshold, regions)
+            for template in templates
+        ]
+        results = []
+        try:
+            for future in futures:
+                result = future.result()
+                if result is None:
+                    continue
+                results.append(result)
+                if first_hit and threshold is not None and result.score >= self.template_threshold(
+                        result.template, threshold):
+                    break
+        finally:
+            for future in futures:
+                future.cancel()
+        return results
+
+    def match_all(self, frame, templates, threshold=None, regions=None, first_hit=False, monitor=None,
+                  window=None):
+        """对同一帧匹配全部模板，按模板顺序返回结果
+
+        设置了跟踪器和阈值时，先在最近命中区域内搜索，必要时才做全屏搜索。
+        给定 regions（画面变化区域）时，全屏搜索只在这些区域内进行。
+        first_hit 为True时，靠前的模板达到阈值后不再匹配后面的模板。
+        多线程时多个模板并行匹配；只有一个模板时改为将整帧分块并行匹配。
+        设置了缩放缓存和阈值时，每个模板按缩放比例匹配，返回各模板得分最高的比例的结果。
+        window 为目标窗口在帧中的范围，模板的搜索范围相对该窗口计算，None时相对整帧。
+        """
+        prepared = PreparedFrame(frame, self.timer, window)
+        if self.scale_cache is not None and threshold is not None:
+            return self._match_scaled(prepared, templates, threshold, regions, first_hit, monitor)
+        return self._match_templates(prepared, templates, threshold, regions, first_hit)
+
+    def _match_templates(self, prepared, templates, threshold, regions, first_hit):
+        """按模板顺序匹配，多线程时并行"""
+        if self.workers > 1 and len(templates) > 1:
+            return self._match_parallel(prepared, templates, threshold, regions, first_hit)
+            
+        executor = self._get_executor() if self.workers > 1 else None
+        results = []
+        for template in templates:
+            result = self._timed(self._match_template, template, prepared, template, threshold, regions, executor)
+            if result is None:
+                continue
+            results.append(result)
+            if first_hit and threshold is not None and result.score >= self.template_threshold(
+                    result.template, threshold):
+                break
+        return results
+
+    def _template_scales(self, template, monitor):
+        """本次要尝试的缩放比例，模板单独设置了缩放比例时只在这些比例中选择"""
+        scales = self.scale_cache.candidates(template, monitor)
+        allowed = template.spec.scales if template.spec is not None else None
+        if allowed is None:
+            return scales
+        return [scale for scale in scales if scale in allowed] or list(allowed)
+
+    def _match_scaled(self, prepared, templates, threshold, regions, first_hit, monitor):
+        """多尺度匹配: 已学习比例的模板只试该比例，其余模板试全部比例"""
+        variants = []
+        for template in templates:
+            for scale in self._template_scales(template, monitor):
+                variants.append(template.scaled(scale))
+                
+        # 每个原始模板只保留得分最高的比例，得分相同时靠前的比例优先
+        best = {}
+        for result in self._match_templates(prepared, variants, threshold, regions, first_hit):
+            base = result.template.base
+            current = best.get(id(base))
+            if current is None or result.score > current.score:
+                best[id(base)] = result
+                
+        results = []
+        for template in templates:
+            result = best.get(id(template))
+            if result is None:
+                continue
+            if result.score >= self.template_threshold(template, threshold):
+                self.scale_cache.record_hit(template, result.template.scale, monitor)
+            else:
+                self.scale_cache.record_miss(template, monitor)
+            results.append(result)
+        return results
+
+    def _result_scores(self, result):
+        """结果图转换为越大越好的得分图"""
+        if self.method in (cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED):
+            return 1.0 - result
+        return result
+
+    def _peaks(self, result, template, threshold, offset=(0, 0)):
+        """从结果图中取出所有达到阈值的峰值，每取出一个就抑制其周围模板大小的邻域"""
+        scores = self._result_scores(result).copy()
+        half_width = max(1, template.width // 2)
+        half_height = max(1, template.height // 2)
+        peaks = []
+        while len(peaks) < MAX_MATCHES_PER_TEMPLATE:
+            _, score, _, (x, y) = cv2.minMaxLoc(scores)
+            if score < threshold:
+                break
+            peaks.append(MatchResult(template, score, (offset[0] + x, offset[1] + y)))
+            scores[max(0, y - half_height):y + half_height + 1, max(0, x - half_width):x + half_width + 1] = -1.0
+        return peaks
+
+    def _match_every(self, prepared, template, threshold, regions, executor=None):
+        """在整帧（或变化区域）上取出模板的所有命中"""
+        image = prepared.image_for(template)
+        grayscale = image.ndim == 2
+        template_image = template.image(grayscale)
+        height, width = template_image.shape[:2]
+        threshold = self.template_threshold(template, threshold)
+        roi = self._template_roi(template, prepared)
+        regions = self._template_regions(regions, roi)
+        if regions is not None:
+            peaks = []
+            for x0, y0, x1, y1 in expand_regions(regions, width, height, image.shape, roi):
+                if x1 - x0 < width or y1 - y0 < height:
+                    continue
+                result = cv2.matchTemplate(image[y0:y1, x0:x1], template_image, self.method)
+                peaks.extend(self._peaks(result, template, threshold, (x0, y0)))
+            return peaks
+            
+        if height > image.shape[0] or width > image.shape[1]:
+            return []
+        if self.engine == ENGINE_FFT and self.method == cv2.TM_CCOEFF_NORMED:
+            result = self._match_spectrum(prepared.spectrum(image), template, grayscale)
+        elif executor is not None:
+            result = match_tiled(image, template_image, self.method, executor)
+        else:
+            result = cv2.matchTemplate(image, template_image, self.method)
+        return self._peaks(result, template, threshold)
+
+    def find_all(self, frame, templates, threshold, regions=None, monitor=None, order=ORDER_SCORE,
+                 overlap=NMS_OVERLAP, window=None):
+        """返回所有模板在帧上达到阈值的全部命中，经非极大值抑制后按得分或位置排序
+
+        同一按钮被多个模板（或多个缩放比例）命中时只保留得分最高的一个。
+        多目标模式始终在全分辨率上搜索整帧（或变化区域），不使用区域跟踪和金字塔。
+        """
+        prepared = PreparedFrame(frame, self.timer, window)
+        variants = []
+        for template in templates:
+            if self.scale_cache is not None:
+                variants.extend(template.scaled(scale) for scale in self._template_scales(template, monitor))
+            else:
+                variants.append(template)
+                
+        if self.workers > 1 and len(variants) > 1:
+            executor = self._get_executor()
+            groups = list(executor.map(
+                lambda variant: self._timed(self._match_every, variant, prepared, variant, threshold, regions),
+                variants))
+        else:
+            executor = self._get_executor() if self.workers > 1 else None
+            groups = [self._timed(self._match_every, variant, prepared, variant, threshold, regions, executor)
+                      for variant in variants]
+            
+        results = non_max_suppression([peak for group in groups for peak in group], overlap)
+        if self.scale_cache is not None:
+            hit_bases = set()
+            for result in results:
+                if id(result.template.base) not in hit_bases:
+                    hit_bases.add(id(result.template.base))
+                    self.scale_cache.record_hit(result.template.base, result.template.scale, monitor)
+            for template in templates:
+                if id(template) not in hit_bases:
+                    self.scale_cache.record_miss(template, monitor)
+        return sort_results(results, order)
+
+    def find_best(self, frame, templates, threshold=None, regions=None, first_hit=False, monitor=None,
+                  window=None):
+        """返回得分最高的匹配结果，得分相同时靠前的模板优先
+
+        给定阈值时达到各自阈值的结果优先，其中优先级高的模板优先，优先级相同再比较得分。
+        """
+        best = None
+        best_key = None
+        for result in self.match_all(frame, templates, threshold, regions, first_hit, monitor, window):
+            key = (result.score,)
+            if threshold is not None:
+                spec = result.template.spec
+                key = (result.score >= self.template_threshold(result.template, threshold),
+                       spec.priority if spec is not None else 0,
+                       result.score)
+            if best is None or key > best_key:
+                best = result
+                best_key = key
+        return best
@@ -0,0 +1,106 @@
+import threading
+from core.tracker import template_key
+
+
+def parse_scales(value):
+    """解析 "0.8,1,1.25" 格式的缩放比例列表，结果去重并保持顺序"""
+    scales = []
+    for part in str(value).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        scale = float(part)
+        if scale <= 0:
+            raise ValueError(f"无效的缩放比例: {part}")
+        if scale not in scales:
+            scales.append(scale)
+    if not scales:
+        raise ValueError(f"无效的缩放比例: {value}")
+    return scales
+
+
+def format_scales(scales):
+    """将缩放比例列表格式化为 "0.8,1,1.25" """
+    return ",".join(f"{scale:g}" for scale in scales)
+
+
+class ScaleCache:
+    """记录每个模板在每个显示器上命中的缩放比例
+
+    找到正确比例后只尝试该比例；连续未命中 sweep_misses 次后才重新尝试全部比例，
+    避免按钮不在屏幕上时每帧都做多尺度搜索。
+    """
+
+    def __init__(self, scales=(1.0,), sweep_misses=5):
+        self.scales = list(scales)
+        self.sweep_misses = sweep_misses
+        self._lock = threading.Lock()
+        self._learned = {}  # {(模板键, 显示器): 缩放比例}
+        self._misses = {}  # {(模板键, 显示器): 连续未命中次数}
+
+        # 统计信息
+        self.cached_hits = 0
+        self.sweeps = 0
+
+    def configure(self, config):
+        """从配置同步缩放参数，比例列表变化时清空已学习的比例"""
+        scales = list(config.match_scales)
+        if scales != self.scales:
+            self.reset()
+            self.scales = scales
+        self.sweep_misses = config.scale_sweep_misses
+
+    def candidates(self, template, monitor=None):
+        """返回本次要尝试的缩放比例，已学习的比例排在最前"""
+        key = (template_key(template), monitor)
+        with self._lock:
+            scale = self._learned.get(key)
+            if scale is not None and self._misses.get(key, 0) < self.sweep_misses:
+                return [scale]
+            self.sweeps += 1
+        if scale is None:
+            return list(self.scales)
+        return [scale] + [s for s in self.scales if s != scale]
+
+    def record_hit(self, template, scale, monitor=None):
+        """记录命中的缩放比例"""
+        key = (template_key(template), monitor)
+        with self._lock:
+            if self._learned.get(key) == scale and self._misses.get(key, 0) < self.sweep_misses:
+                self.cached_hits += 1
+            self._learned[key] = scale
+            self._misses[key] = 0
+
+    def record_miss(self, template, monitor=None):
+        """记录未命中，已学习比例的模板累计到 sweep_misses 次后下次重新全部搜索"""
+        key = (template_key(template), monitor)
+        with self._lock:
+            if key not in self._learned:
+                return
+            misses = self._misses.get(key, 0) + 1
+            if misses > self.sweep_misses:
+                # 全部比例都搜索过仍未命中，重新开始计数
+                misses = 0
+            self._misses[key] = misses
+
+    def learned_scale(self, template, monitor=None):
+        """已学习的缩放比例，没有时返回None"""
+        with self._lock:
+            return self._learned.get((template_key(template), monitor))
+
+    def reset(self):
+        """清空已学习的比例和统计"""
+        with self._lock:
+            self._learned.clear()
+            self._misses.clear()
+            self.cached_hits = 0
+            self.sweeps = 0
+
+    def stats(self):
+        """返回缩放搜索统计"""
+        with self._lock:
+            return {
+                'learned': len(self._learned),
+                'cached_hits': self.cached_hits,
+                'sweeps': self.sweeps,
+            }
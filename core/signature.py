@@ -0,0 +1,71 @@
+import math
+import cv2
+import numpy as np
+
+# 签名默认采样的像素数和每个像素允许的灰度差
+SIGNATURE_POINTS = 32
+SIGNATURE_TOLERANCE = 8
+
+
+class PixelSignature:
+    """模板的像素签名: 少量显著像素的偏移和期望值
+
+    在已知位置验证签名只需一次NumPy花式索引，比 matchTemplate 快几个数量级。
+    所有采样像素都在容差内时视为确认命中，否则结果不确定，需要完整匹配。
+    """
+
+    def __init__(self, ys, xs, values, size, tolerance=SIGNATURE_TOLERANCE):
+        self.ys = ys
+        self.xs = xs
+        self.values = values.astype(np.int16)
+        self.height, self.width = size
+        self.tolerance = tolerance
+
+    def __len__(self):
+        return len(self.ys)
+
+    def verify(self, frame, location):
+        """在位置 (x, y) 验证签名，确认命中时返回得分（1减去平均差值比例），否则返回None"""
+        x, y = location
+        if x < 0 or y < 0 or y + self.height > frame.shape[0] or x + self.width > frame.shape[1]:
+            return None
+        if frame.ndim != self.values.ndim + 1:
+            # 灰度签名只能在灰度帧上验证，彩色签名只能在彩色帧上验证
+            return None
+        diff = np.abs(frame[self.ys + y, self.xs + x].astype(np.int16) - self.values)
+        if int(diff.max()) > self.tolerance:
+            return None
+        return 1.0 - float(diff.mean()) / 255.0
+
+
+def build_signature(image, points=SIGNATURE_POINTS, tolerance=SIGNATURE_TOLERANCE):
+    """从模板中选出显著像素构成签名
+
+    模板划分为网格，每格取对比度和边缘强度最大的像素，使签名点分布在整个模板上。
+    """
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    gray = gray.astype(np.float32)
+    gx = cv2.Sobel(gray, cv2.CV_32F, 1, 0)
+    gy = cv2.Sobel(gray, cv2.CV_32F, 0, 1)
+    strength = np.abs(gray - gray.mean()) + 0.5 * cv2.magnitude(gx, gy)
+
+    height, width = gray.shape
+    cells = max(1, int(math.ceil(math.sqrt(points))))
+    ys = []
+    xs = []
+    for row in range(cells):
+        y0 = row * height // cells
+        y1 = (row + 1) * height // cells
+        for col in range(cells):
+            x0 = col * width // cells
+            x1 = (col + 1) * width // cells
+            if y1 <= y0 or x1 <= x0:
+                continue
+            block = strength[y0:y1, x0:x1]
+            y, x = np.unravel_index(int(block.argmax()), block.shape)
+            ys.append(y0 + y)
+            xs.append(x0 + x)
+
+    ys = np.array(ys, np.intp)
+    xs = np.array(xs, np.intp)
+    return PixelSignature(ys, xs, image[ys, xs], (height, width), tolerance)
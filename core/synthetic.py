@@ -0,0 +1,281 @@
+import os
+import json
+import string
+import cv2
+import numpy as np
+from core.matcher import TemplateMatcher, to_gray
+
+# 可选的合成分辨率 {名称: (宽, 高, 显示器数量)}，双显示器为两块同尺寸屏幕横向拼接
+RESOLUTIONS = {
+    "1080p": (1920, 1080, 1),
+    "1440p": (2560, 1440, 1),
+    "4k": (3840, 2160, 1),
+    "dual-1080p": (3840, 1080, 2),
+    "dual-1440p": (5120, 1440, 2),
+}
+DEFAULT_RESOLUTIONS = ("1080p", "1440p", "4k", "dual-1080p")
+# 常见的DPI缩放比例
+DEFAULT_SCALES = (1.0, 1.25, 1.5)
+# 在录制背景中识别已有按钮的阈值，已有按钮同样记入标注
+BACKGROUND_THRESHOLD = 0.9
+# 摆放目标时的最少间距（像素）
+TARGET_GAP = 12
+# 随机摆放目标的最大尝试次数
+PLACE_ATTEMPTS = 50
+# 标注文件的格式版本
+TRUTH_VERSION = 1
+
+
+def truth_path(frame_path):
+    """截图对应的标注文件路径（同名 .json）"""
+    return os.path.splitext(frame_path)[0] + ".json"
+
+
+def load_ground_truth(frame_path):
+    """读取截图对应的标注，没有标注文件时返回None"""
+    path = truth_path(frame_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _color(rng, low=0, high=256):
+    """随机BGR颜色"""
+    return tuple(int(v) for v in rng.integers(low, high, 3))
+
+
+def _random_text(rng, length):
+    """随机的单行文字，模拟窗口中的文本"""
+    letters = string.ascii_letters + string.digits + "     "
+    return "".join(letters[i] for i in rng.integers(0, len(letters), length))
+
+
+def synthetic_monitor(rng, width, height):
+    """合成一块显示器的桌面: 渐变壁纸、若干带标题栏和文字的窗口、底部任务栏"""
+    top, bottom = np.array(_color(rng, 0, 160)), np.array(_color(rng, 60, 256))
+    ramp = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None, None]
+    canvas = (top * (1 - ramp) + bottom * ramp).astype(np.uint8)
+    canvas = np.ascontiguousarray(np.broadcast_to(canvas, (height, width, 3)))
+
+    for _ in range(int(rng.integers(3, 9))):
+        w = int(rng.integers(width // 6, width // 2))
+        h = int(rng.integers(height // 6, height // 2))
+        x = int(rng.integers(0, width - w))
+        y = int(rng.integers(0, height - h))
+        dark = rng.random() < 0.5
+        fill = _color(rng, 20, 70) if dark else _color(rng, 200, 256)
+        ink = _color(rng, 180, 256) if dark else _color(rng, 0, 80)
+        cv2.rectangle(canvas, (x, y), (x + w, y + h), fill, -1)
+        cv2.rectangle(canvas, (x, y), (x + w, y + 30), _color(rng, 40, 200), -1)
+        cv2.putText(canvas, _random_text(rng, 20), (x + 8, y + 21), cv2.FONT_HERSHEY_SIMPLEX, 0.55,
+                    (255, 255, 255), 1, cv2.LINE_AA)
+        line = y + 60
+        while line < y + h - 10:
+            cv2.putText(canvas, _random_text(rng, int(rng.integers(10, 60))), (x + 12, line),
+                        cv2.FONT_HERSHEY_SIMPLEX, float(rng.uniform(0.4, 0.7)), ink, 1, cv2.LINE_AA)
+            line += int(rng.integers(20, 34))
+
+    cv2.rectangle(canvas, (0, height - 40), (width, height), _color(rng, 10, 60), -1)
+    for index in range(int(rng.integers(4, 12))):
+        x = 60 + index * 48
+        cv2.rectangle(canvas, (x, height - 34), (x + 28, height - 6), _color(rng), -1)
+    return canvas
+
+
+def synthetic_desktop(rng, width, height, monitors=1):
+    """合成整张桌面截图，多显示器时每块屏幕单独生成后横向拼接"""
+    monitor_width = width // monitors
+    parts = [synthetic_monitor(rng, monitor_width, height) for _ in range(monitors)]
+    return np.ascontiguousarray(np.hstack(parts))
+
+
+def adjust_brightness(image, alpha, beta):
+    """按 image * alpha + beta 调整亮度和对比度"""
+    return cv2.convertScaleAbs(image, alpha=alpha, beta=beta)
+
+
+def jpeg_noise(image, quality):
+    """经过一次JPEG编码和解码，加入压缩噪声"""
+    ok, data = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+    if not ok:
+        return image
+    return cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+
+def _overlaps(box, boxes, gap=TARGET_GAP):
+    """box 与已有区域是否重叠（包含间距）"""
+    x, y, w, h = box
+    for bx, by, bw, bh in boxes:
+        if x < bx + bw + gap and bx < x + w + gap and y < by + bh + gap and by < y + h + gap:
+            return True
+    return False
+
+
+class SceneGenerator:
+    """把识别模板合成到合成桌面或录制截图上，生成带标注的测试截图
+
+    每个目标随机变化位置、缩放比例、亮度和遮挡比例，整帧随机加入JPEG压缩噪声，
+    标注记录每个目标的模板、区域和点击中心，用于评估各匹配引擎的速度和准确率。
+    同一序号的截图总是生成相同的内容。
+    """
+
+    def __init__(self, templates, backgrounds=None, resolutions=DEFAULT_RESOLUTIONS, scales=DEFAULT_SCALES,
+                 seed=0, max_targets=3, brightness=0.15, occlusion=0.3, jpeg=0.5):
+        # 内容相同的模板（如 1.png 与 allow_button.png）只保留一个
+        self.templates = []
+        digests = set()
+        for template in templates:
+            if template.digest not in digests:
+                digests.add(template.digest)
+                self.templates.append(template)
+        self.backgrounds = list(backgrounds or [])  # 录制的截图，为空时只使用合成桌面
+        self.resolutions = list(resolutions)
+        self.scales = list(scales)
+        self.seed = seed
+        self.max_targets = max_targets
+        self.brightness = brightness  # 亮度变化幅度，0为不变化
+        self.occlusion = occlusion  # 目标被部分遮挡的概率，遮挡比例不超过一半
+        self.jpeg = jpeg  # 整帧加入JPEG噪声的概率
+        self._existing = {}  # 录制背景中已有的按钮 {背景序号: [(模板, x, y)]}
+
+        for name in self.resolutions:
+            if name not in RESOLUTIONS:
+                raise ValueError(f"未知的分辨率: {name}，可选: {', '.join(RESOLUTIONS)}")
+
+    def _existing_targets(self, index):
+        """录制背景中原有的按钮，作为标注的一部分"""
+        found = self._existing.get(index)
+        if found is None:
+            matcher = TemplateMatcher()
+            hits = matcher.find_all(to_gray(self.backgrounds[index]), self.templates, BACKGROUND_THRESHOLD)
+            found = [(hit.template, hit.location[0], hit.location[1]) for hit in hits]
+            self._existing[index] = found
+        return found
+
+    def _background(self, rng, width, height, monitors):
+        """生成背景，返回 (图像, 背景描述, 背景中已有的目标)"""
+        canvas = synthetic_desktop(rng, width, height, monitors)
+        if not self.backgrounds or rng.random() < 0.5:
+            return canvas, "synthetic", []
+
+        index = int(rng.integers(0, len(self.backgrounds)))
+        frame = self.backgrounds[index]
+        # 录制截图比画布小时随机放在画布中，比画布大时随机裁剪
+        crop_w, crop_h = min(width, frame.shape[1]), min(height, frame.shape[0])
+        fx = int(rng.integers(0, frame.shape[1] - crop_w + 1))
+        fy = int(rng.integers(0, frame.shape[0] - crop_h + 1))
+        cx = int(rng.integers(0, width - crop_w + 1))
+        cy = int(rng.integers(0, height - crop_h + 1))
+        canvas[cy:cy + crop_h, cx:cx + crop_w] = frame[fy:fy + crop_h, fx:fx + crop_w]
+
+        targets = []
+        for template, x, y in self._existing_targets(index):
+            if fx <= x and fy <= y and x + template.width <= fx + crop_w and y + template.height <= fy + crop_h:
+                targets.append(self._truth(template, x - fx + cx, y - fy + cy, source="background"))
+        return canvas, f"recorded:{index}", targets
+
+    @staticmethod
+    def _truth(template, x, y, source="composited", alpha=1.0, beta=0.0, occlusion=0.0, side=None):
+        """单个目标的标注"""
+        return {
+            'template': template.name,
+            'digest': template.base.digest,
+            'source': source,
+            'x': int(x),
+            'y': int(y),
+            'width': template.width,
+            'height': template.height,
+            'center': [int(x) + template.width // 2, int(y) + template.height // 2],
+            'scale': template.scale,
+            'brightness': [round(alpha, 3), round(beta, 1)],
+            'occlusion': round(occlusion, 3),
+            'occluded_side': side,
+        }
+
+    def _occlude(self, rng, canvas, x, y, w, h):
+        """用纯色窗口边缘遮住目标的一侧，返回 (遮挡比例, 方向)"""
+        fraction = float(rng.uniform(0.1, 0.5))
+        side = ["left", "right", "top", "bottom"][int(rng.integers(0, 4))]
+        if side == "left":
+            box = (x, y, x + int(w * fraction), y + h)
+        elif side == "right":
+            box = (x + w - int(w * fraction), y, x + w, y + h)
+        elif side == "top":
+            box = (x, y, x + w, y + int(h * fraction))
+        else:
+            box = (x, y + h - int(h * fraction), x + w, y + h)
+        cv2.rectangle(canvas, box[:2], (box[2] - 1, box[3] - 1), _color(rng, 30, 230), -1)
+        return fraction, side
+
+    def generate(self, index):
+        """生成第 index 张截图，返回 (BGR图像, 标注)"""
+        rng = np.random.default_rng([self.seed, index])
+        resolution = self.resolutions[int(rng.integers(0, len(self.resolutions)))]
+        width, height, monitors = RESOLUTIONS[resolution]
+        canvas, background, targets = self._background(rng, width, height, monitors)
+
+        boxes = [(t['x'], t['y'], t['width'], t['height']) for t in targets]
+        for _ in range(int(rng.integers(0, self.max_targets + 1))):
+            base = self.templates[int(rng.integers(0, len(self.templates)))]
+            template = base.scaled(self.scales[int(rng.integers(0, len(self.scales)))])
+            w, h = template.width, template.height
+            for _ in range(PLACE_ATTEMPTS):
+                x = int(rng.integers(0, width - w + 1))
+                y = int(rng.integers(0, height - h + 1))
+                if not _overlaps((x, y, w, h), boxes):
+                    break
+            else:
+                continue
+
+            alpha = float(rng.uniform(1 - self.brightness, 1 + self.brightness))
+            beta = float(rng.uniform(-100, 100) * self.brightness)
+            canvas[y:y + h, x:x + w] = adjust_brightness(template.color, alpha, beta)
+            occlusion, side = 0.0, None
+            if rng.random() < self.occlusion:
+                occlusion, side = self._occlude(rng, canvas, x, y, w, h)
+            boxes.append((x, y, w, h))
+            targets.append(self._truth(template, x, y, alpha=alpha, beta=beta, occlusion=occlusion, side=side))
+
+        quality = None
+        if rng.random() < self.jpeg:
+            quality = int(rng.integers(60, 96))
+            canvas = jpeg_noise(canvas, quality)
+
+        truth = {
+            'version': TRUTH_VERSION,
+            'seed': self.seed,
+            'index': index,
+            'resolution': resolution,
+            'width': width,
+            'height': height,
+            'monitors': monitors,
+            'background': background,
+            'jpeg_quality': quality,
+            'targets': targets,
+        }
+        return canvas, truth
+
+    def write(self, directory, count, start=0, logger=None):
+        """生成 count 张截图及同名标注写入目录，返回截图路径列表
+
+        文件名为 screen_*.png，可直接用于回放（ReplaySource）和基准测试。
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for index in range(start, start + count):
+            frame, truth = self.generate(index)
+            path = os.path.join(directory, f"screen_{index:05d}.png")
+            truth['frame'] = os.path.basename(path)
+            ok, data = cv2.imencode('.png', frame)
+            if not ok:
+                raise ValueError(f"截图编码失败: {path}")
+            with open(path, 'wb') as f:
+                f.write(data.tobytes())
+            with open(truth_path(path), 'w', encoding='utf-8') as f:
+                json.dump(truth, f, ensure_ascii=False, indent=2)
+            paths.append(path)
+            if logger:
+                logger(f"{truth['frame']}: {truth['resolution']} {truth['background']}, "
+                       f"目标 {len(truth['targets'])} 个")
+        return paths
@@ -0,0 +1,140 @@
+import os
+import threading
+from pathlib import Path
+import numpy as np
+from core.templates import Template
+from core.signature import PixelSignature, SIGNATURE_TOLERANCE
+from core.color_key import ColorKey
+
+# 编译格式版本，预计算内容变化时递增，旧文件自动失效
+CACHE_VERSION = 1
+# 预先生成的金字塔层数（与设置面板中金字塔层数的上限一致）
+COMPILED_PYRAMID_LEVELS = 2
+# 默认的缓存目录
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / "template_cache"
+
+
+def compile_template(template, levels=COMPILED_PYRAMID_LEVELS):
+    """预先计算模板的金字塔、像素签名和颜色键"""
+    for grayscale in (True, False):
+        template.pyramid(levels, grayscale)
+        template.signature(grayscale, SIGNATURE_TOLERANCE)
+    template.color_key()
+    return template
+
+
+def template_arrays(template, levels=COMPILED_PYRAMID_LEVELS):
+    """将编译后的模板转换为可保存到 .npz 的数组字典"""
+    arrays = {
+        'version': np.array([CACHE_VERSION]),
+        'levels': np.array([levels]),
+        'color': template.color,
+        'gray': template.gray,
+        'stats': np.array([template.mean, template.std, template.norm]),
+    }
+    for grayscale, prefix in ((True, 'gray'), (False, 'color')):
+        for level, image in enumerate(template.pyramid(levels, grayscale)[1:], 1):
+            arrays[f'{prefix}_pyramid_{level}'] = image
+        signature = template.signature(grayscale, SIGNATURE_TOLERANCE)
+        arrays[f'{prefix}_signature_ys'] = signature.ys
+        arrays[f'{prefix}_signature_xs'] = signature.xs
+        arrays[f'{prefix}_signature_values'] = signature.values
+    key = template.color_key()
+    if key is not None:
+        arrays['color_key'] = np.array(key.lower + key.upper + key.fill_box + key.template_size)
+    return arrays
+
+
+def template_from_arrays(path, digest, arrays):
+    """从 .npz 数组恢复模板及其预计算结果，版本不符时返回None"""
+    if int(arrays['version'][0]) != CACHE_VERSION:
+        return None
+    levels = int(arrays['levels'][0])
+    template = Template(path, arrays['color'], arrays['gray'], digest, stats=tuple(arrays['stats']))
+    size = template.gray.shape[:2]
+    for grayscale, prefix in ((True, 'gray'), (False, 'color')):
+        pyramid = [template.image(grayscale)]
+        pyramid.extend(arrays[f'{prefix}_pyramid_{level}'] for level in range(1, levels + 1))
+        template._pyramids[(grayscale, levels)] = pyramid
+        template._signatures[(grayscale, SIGNATURE_TOLERANCE)] = PixelSignature(
+            arrays[f'{prefix}_signature_ys'], arrays[f'{prefix}_signature_xs'],
+            arrays[f'{prefix}_signature_values'], size, SIGNATURE_TOLERANCE)
+    if 'color_key' in arrays:
+        values = [int(v) for v in arrays['color_key']]
+        template._color_key = ColorKey(tuple(values[0:3]), tuple(values[3:6]),
+                                       tuple(values[6:10]), tuple(values[10:12]))
+    template._color_key_built = True
+    return template
+
+
+class TemplateCache:
+    """编译后模板的磁盘缓存
+
+    每个模板按文件内容哈希保存为一个 .npz 文件，内含灰度图、彩色图、金字塔、
+    灰度统计量、像素签名和颜色键。图片内容变化后哈希不同，自然读取不到旧文件；
+    再次启动时跳过PNG解码和所有预计算。
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.hits = 0  # 从缓存加载的次数
+        self.misses = 0  # 缓存中没有、重新编译的次数
+        self.errors = 0  # 缓存文件损坏或写入失败的次数
+
+    def _file(self, digest):
+        return self.directory / f"{digest}.npz"
+
+    def load(self, path, digest):
+        """按内容哈希加载编译后的模板，缓存中没有或文件无效时返回None"""
+        file = self._file(digest)
+        if not file.exists():
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            with np.load(str(file)) as arrays:
+                template = template_from_arrays(path, digest, arrays)
+        except (OSError, ValueError, KeyError):
+            template = None
+            with self._lock:
+                self.errors += 1
+        with self._lock:
+            if template is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return template
+
+    def store(self, template):
+        """编译模板并写入缓存，写入失败不影响使用"""
+        compile_template(template)
+        file = self._file(template.digest)
+        temp = file.with_name(f"{file.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npz")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            np.savez(str(temp), **template_arrays(template))
+            # 先写临时文件再替换，另一个进程不会读到写了一半的文件
+            os.replace(str(temp), str(file))
+        except OSError:
+            with self._lock:
+                self.errors += 1
+            try:
+                os.remove(str(temp))
+            except OSError:
+                pass
+
+    def clear(self):
+        """删除所有缓存文件"""
+        for file in self.directory.glob("*.npz"):
+            try:
+                file.unlink()
+            except OSError:
+                pass
+
+    def stats(self):
+        """返回缓存命中统计"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'errors': self.errors}
@@ -0,0 +1,93 @@
+from utils.region_utils import parse_rect, format_rect, sub_rect_of, intersect_rect
+from core.scales import parse_scales, format_scales
+
+
+class TemplateSpec:
+    """单张识别图片的检测设置，未设置（None）的项使用全局配置
+
+    roi 为相对目标窗口的比例 (左, 上, 右, 下)，目标必须完整位于该范围内；
+    与截图区域无关，只截取窗口的一部分时，范围超出截图的部分不搜索；
+    priority 越大越先匹配，多个图片同时命中时优先点击；every 为每隔几轮检测匹配一次。
+    """
+
+    def __init__(self, path, threshold=None, x_offset=None, y_offset=None, roi=None, scales=None,
+                 priority=0, every=1):
+        self.path = path
+        self.threshold = threshold
+        self.x_offset = x_offset
+        self.y_offset = y_offset
+        self.roi = roi
+        self.scales = scales
+        self.priority = priority
+        self.every = max(1, every)
+
+    def threshold_or(self, default):
+        """图片的相似度阈值"""
+        return self.threshold if self.threshold is not None else default
+
+    def offset_or(self, x_offset, y_offset):
+        """图片的点击偏移"""
+        return (self.x_offset if self.x_offset is not None else x_offset,
+                self.y_offset if self.y_offset is not None else y_offset)
+
+    def roi_region(self, frame_shape, window=None):
+        """搜索范围在截图中的像素区域 (x0, y0, x1, y1)，未设置时返回None
+
+        window 为目标窗口在截图中的范围（可超出截图），None时相对整张截图；
+        结果限制在截图内，范围完全在截图外时返回空区域。
+        """
+        if self.roi is None:
+            return None
+        height, width = frame_shape[:2]
+        frame_rect = (0, 0, width, height)
+        return intersect_rect(sub_rect_of(window or frame_rect, self.roi), frame_rect) or (0, 0, 0, 0)
+
+    def due(self, tick):
+        """本轮检测是否需要匹配该图片"""
+        return tick % self.every == 0
+
+    @property
+    def is_default(self):
+        """是否所有设置都使用全局配置"""
+        return (self.threshold is None and self.x_offset is None and self.y_offset is None
+                and self.roi is None and self.scales is None and self.priority == 0 and self.every == 1)
+
+    def __repr__(self):
+        return f"TemplateSpec({self.path!r}, {format_spec(self)})"
+
+
+def _optional(value, parse):
+    """空字符串表示使用全局配置"""
+    value = value.strip()
+    return parse(value) if value else None
+
+
+def format_spec(spec):
+    """格式化为 "阈值;X偏移;Y偏移;搜索范围;缩放比例;优先级;检测间隔"，空项表示使用全局配置"""
+    fields = [
+        "" if spec.threshold is None else f"{spec.threshold:g}",
+        "" if spec.x_offset is None else str(spec.x_offset),
+        "" if spec.y_offset is None else str(spec.y_offset),
+        "" if spec.roi is None else format_rect(spec.roi),
+        "" if spec.scales is None else format_scales(spec.scales),
+        str(spec.priority),
+        str(spec.every),
+    ]
+    return ";".join(fields)
+
+
+def parse_spec(path, value):
+    """解析 format_spec 格式的设置，格式无效时抛出ValueError"""
+    fields = value.split(";")
+    if len(fields) != 7:
+        raise ValueError(f"无效的图片设置: {value}")
+    return TemplateSpec(
+        path,
+        threshold=_optional(fields[0], float),
+        x_offset=_optional(fields[1], int),
+        y_offset=_optional(fields[2], int),
+        roi=_optional(fields[3], parse_rect),
+        scales=_optional(fields[4], parse_scales),
+        priority=int(fields[5] or 0),
+        every=int(fields[6] or 1),
+    )
@@ -0,0 +1,299 @@
+import os
+import hashlib
+import threading
+import cv2
+import numpy as np
+from core.signature import build_signature
+from core.color_key import build_color_key
+
+
+class Template:
+    """已解码到内存中的识别模板"""
+
+    def __init__(self, path, color, gray, digest=None, stats=None):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.digest = digest  # 文件内容哈希
+        self.color = color  # BGR三通道
+        self.gray = gray    # 单通道灰度
+        self.height, self.width = gray.shape[:2]
+        self.grayscale = True  # 是否使用灰度匹配，False时在彩色帧上做彩色匹配
+        self.scale = 1.0  # 相对原图的缩放比例
+        self.base = self  # 缩放前的原始模板
+        self.spec = None  # TemplateSpec，图片单独的阈值、搜索范围等设置，None为全部使用全局配置
+        
+        # 预计算的灰度统计量，供归一化相关计算复用；从编译缓存加载时直接传入 (均值, 标准差, 范数)
+        if stats is not None:
+            self.mean, self.std, self.norm = (float(v) for v in stats)
+        else:
+            mean, std = cv2.meanStdDev(gray)
+            self.mean = float(mean[0][0])
+            self.std = float(std[0][0])
+            self.norm = self.std * np.sqrt(gray.size)  # 去均值后的L2范数
+        
+        self._pyramids = {}  # 按需生成的金字塔缓存 {(是否灰度, 层数): [各层图像]}
+        self._scaled = {}  # 按需生成的缩放模板缓存 {缩放比例: 模板}
+        self._signatures = {}  # 按需生成的像素签名缓存 {(是否灰度, 容差): 签名}
+        self._color_key = None  # 按需生成的主色颜色键
+        self._color_key_built = False
+
+    def image(self, grayscale=True):
+        """获取用于匹配的模板图像"""
+        return self.gray if grayscale else self.color
+
+    def pyramid(self, levels, grayscale=True):
+        """获取模板金字塔，第0层为原图"""
+        key = (grayscale, levels)
+        pyramid = self._pyramids.get(key)
+        if pyramid is None:
+            # 已有层数更多的金字塔时直接截取前几层
+            for (cached_grayscale, cached_levels), cached in self._pyramids.items():
+                if cached_grayscale == grayscale and cached_levels > levels:
+                    return cached[:levels + 1]
+            pyramid = build_pyramid(self.image(grayscale), levels)
+            self._pyramids[key] = pyramid
+        return pyramid
+
+    def signature(self, grayscale=True, tolerance=8):
+        """获取像素签名，用于在已知位置快速确认命中"""
+        key = (grayscale, tolerance)
+        signature = self._signatures.get(key)
+        if signature is None:
+            signature = build_signature(self.image(grayscale), tolerance=tolerance)
+            self._signatures[key] = signature
+        return signature
+
+    def color_key(self):
+        """获取模板主色的颜色键，模板没有明显主色时返回None"""
+        if not self._color_key_built:
+            self._color_key = build_color_key(self.color)
+            self._color_key_built = True
+        return self._color_key
+
+    def scaled(self, scale):
+        """获取按比例缩放的模板（用于不同DPI缩放的显示器），缩放结果会缓存"""
+        if scale == 1.0:
+            return self
+        template = self._scaled.get(scale)
+        if template is None:
+            width = max(1, int(round(self.width * scale)))
+            height = max(1, int(round(self.height * scale)))
+            # 缩小用区域插值避免锯齿，放大用三次插值保持边缘清晰
+            interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+            color = cv2.resize(self.color, (width, height), interpolation=interpolation)
+            gray = cv2.cvtColor(color, cv2.COLOR_BGR2GRAY)
+            digest = f"{self.digest}@{scale:g}" if self.digest else None
+            template = Template(self.path, color, gray, digest)
+            template.scale = scale
+            template.base = self
+            self._scaled[scale] = template
+        template.grayscale = self.grayscale
+        template.spec = self.spec
+        return template
+
+    @property
+    def size(self):
+        """模板尺寸 (宽, 高)"""
+        return self.width, self.height
+
+    def __repr__(self):
+        if self.scale != 1.0:
+            return f"Template({self.name!r}, {self.width}x{self.height}, scale={self.scale:g})"
+        return f"Template({self.name!r}, {self.width}x{self.height})"
+
+
+def build_pyramid(image, levels):
+    """构造高斯金字塔，第0层为原图，每层边长减半"""
+    pyramid = [image]
+    for _ in range(levels):
+        pyramid.append(cv2.pyrDown(pyramid[-1]))
+    return pyramid
+
+
+def read_image_bytes(path):
+    """读取图片文件的原始字节"""
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def decode_image(data, flags=cv2.IMREAD_COLOR):
+    """从字节解码图片（支持中文路径读取后的数据）"""
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    return cv2.imdecode(buffer, flags)
+
+
+def content_hash(data):
+    """计算文件内容哈希"""
+    return hashlib.sha1(data).hexdigest()
+
+
+def template_from_bytes(path, data):
+    """从已读取的字节构造模板，解码失败返回None"""
+    color = decode_image(data, cv2.IMREAD_COLOR)
+    if color is None:
+        return None
+    gray = cv2.cvtColor(color, cv2.COLOR_BGR2GRAY)
+    return Template(path, color, gray, content_hash(data))
+
+
+def load_template(path):
+    """从文件加载模板，失败返回None"""
+    try:
+        return template_from_bytes(path, read_image_bytes(path))
+    except OSError:
+        return None
+
+
+class TemplateRegistry:
+    """模板注册表
+
+    每个文件只解码一次，文件的修改时间或大小变化时才重新加载；
+    内容完全相同的文件共享同一个模板，每帧只匹配一次。
+    给定 TemplateCache 时优先加载按内容哈希保存的编译结果，新模板编译后写入缓存。
+    """
+
+    def __init__(self, logger=None, cache=None):
+        self.logger = logger
+        self.cache = cache  # TemplateCache，编译后模板的磁盘缓存
+        self._lock = threading.Lock()
+        self._entries = {}  # {路径: (修改时间, 文件大小, 内容哈希)}
+        self._by_hash = {}  # {内容哈希: Template}
+        self._missing = set()  # 已报告缺失的路径，避免每帧重复日志
+        self._color_paths = set()  # 使用彩色匹配的图片路径
+        self._specs = {}  # {路径: TemplateSpec}
+        
+        # 统计信息
+        self.load_count = 0
+        self.reuse_count = 0
+
+    def log(self, message):
+        """记录日志"""
+        if self.logger:
+            self.logger(message)
+        else:
+            print(message)
+
+    def get(self, path):
+        """获取路径对应的模板，文件不存在或无法解码时返回None"""
+        template = self._load(path)
+        if template is not None:
+            self._apply(path, template)
+        return template
+
+    def _apply(self, path, template):
+        """把路径对应的匹配设置应用到模板"""
+        template.grayscale = path not in self._color_paths
+        template.spec = self._specs.get(path)
+
+    def set_grayscale(self, path, grayscale):
+        """设置图片使用灰度匹配还是彩色匹配"""
+        with self._lock:
+            if grayscale:
+                self._color_paths.discard(path)
+            else:
+                self._color_paths.add(path)
+
+    def is_grayscale(self, path):
+        """图片是否使用灰度匹配"""
+        return path not in self._color_paths
+
+    def set_spec(self, path, spec):
+        """设置图片单独的检测设置，spec为None时恢复全局配置"""
+        with self._lock:
+            if spec is None:
+                self._specs.pop(path, None)
+            else:
+                self._specs[path] = spec
+
+    def get_spec(self, path):
+        """图片单独的检测设置，没有时返回None"""
+        return self._specs.get(path)
+
+    def _load(self, path):
+        """加载或复用路径对应的模板"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.remove(path)
+            if path not in self._missing:
+                self._missing.add(path)
+                self.log(f"错误: 找不到图片文件 '{path}'")
+            return None
+        self._missing.discard(path)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == stat.st_mtime and entry[1] == stat.st_size:
+                template = self._by_hash.get(entry[2])
+                if template is not None:
+                    return template
+
+        # 文件为新增或已修改，重新读取
+        try:
+            data = read_image_bytes(path)
+        except OSError:
+            return None
+        digest = content_hash(data)
+
+        with self._lock:
+            template = self._by_hash.get(digest)
+            if template is not None:
+                self.reuse_count += 1
+                if template.path != path:
+                    self.log(f"图片 {os.path.basename(path)} 与 {template.name} 内容相同，已合并")
+            else:
+                template = self._compile(path, data, digest)
+                if template is None:
+                    return None
+                self.load_count += 1
+                self._by_hash[digest] = template
+            self._entries[path] = (stat.st_mtime, stat.st_size, digest)
+            self._prune()
+        return template
+
+    def _compile(self, path, data, digest):
+        """从编译缓存加载模板，缓存中没有时解码图片并写入缓存"""
+        if self.cache is not None:
+            template = self.cache.load(path, digest)
+            if template is not None:
+                return template
+        template = template_from_bytes(path, data)
+        if template is not None and self.cache is not None:
+            self.cache.store(template)
+        return template
+
+    def get_templates(self, paths):
+        """按顺序获取模板列表，内容相同的模板只保留第一个"""
+        templates = []
+        seen = set()
+        for path in paths:
+            template = self._load(path)
+            if template is None or template.digest in seen:
+                continue
+            # 内容相同的图片只保留第一个，设置也取第一个路径的
+            self._apply(path, template)
+            seen.add(template.digest)
+            templates.append(template)
+        return templates
+
+    def remove(self, path):
+        """移除路径对应的条目"""
+        with self._lock:
+            if self._entries.pop(path, None) is not None:
+                self._prune()
+
+    def clear(self):
+        """清空注册表"""
+        with self._lock:
+            self._entries.clear()
+            self._by_hash.clear()
+
+    def _prune(self):
+        """丢弃不再被任何路径引用的模板"""
+        used = {entry[2] for entry in self._entries.values()}
+        for digest in list(self._by_hash):
+            if digest not in used:
+                del self._by_hash[digest]
+
+    def __len__(self):
+        return len(self._by_hash)
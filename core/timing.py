@@ -0,0 +1,136 @@
+import time
+import bisect
+import threading
+from collections import deque
+
+# 检测循环的各个阶段
+STAGE_TICK = "tick"  # 一轮检测的总耗时（不含等待）
+STAGE_WINDOW_STATE = "window_state"  # 点击循环检查窗口是否激活
+STAGE_WINDOW = "window"  # 查找目标窗口句柄
+STAGE_CAPTURE = "capture"  # 截图
+STAGE_CONVERT = "convert"  # 截图和匹配中的颜色转换，同时计入所在的截图或模板匹配阶段
+STAGE_CHANGE = "change"  # 画面变化检测
+STAGE_MATCH = "match"  # 全部模板匹配的总耗时
+STAGE_DECIDE = "decide"  # 根据匹配结果确定点击位置（含调试标记和保存截图）
+STAGE_CLICK = "click"  # 执行点击
+STAGE_SLEEP = "sleep"  # 两轮检测之间的等待
+STAGES = (STAGE_TICK, STAGE_WINDOW_STATE, STAGE_WINDOW, STAGE_CAPTURE, STAGE_CONVERT, STAGE_CHANGE,
+          STAGE_MATCH, STAGE_DECIDE, STAGE_CLICK, STAGE_SLEEP)
+
+# 直方图的桶上界（秒），从16微秒到约16秒按2倍递增
+BUCKET_BOUNDS = tuple(2.0 ** exponent / 1e6 for exponent in range(4, 25))
+# 每个阶段保留最近多少次耗时用于统计
+DEFAULT_WINDOW = 256
+
+
+def match_stage(template):
+    """单个模板的匹配阶段名，缩放后的模板计入原图"""
+    return f"match:{template.name}"
+
+
+class RollingHistogram:
+    """最近 window 次耗时的滚动直方图
+
+    记录时只做一次二分查找和计数增减，分位数在查询时才对窗口内的耗时排序。
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)  # 最后一个桶为超出上界的耗时
+        self.total_count = 0  # 累计记录次数
+        self.total_seconds = 0.0  # 累计耗时
+
+    def record(self, seconds):
+        if len(self.samples) == self.samples.maxlen:
+            self.counts[bisect.bisect_left(BUCKET_BOUNDS, self.samples[0])] -= 1
+        self.samples.append(seconds)
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.total_count += 1
+        self.total_seconds += seconds
+
+    def percentile(self, q, ordered=None):
+        """窗口内耗时的百分位数（秒）"""
+        ordered = ordered if ordered is not None else sorted(self.samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(q / 100.0 * len(ordered)))]
+
+    def buckets(self):
+        """窗口内的直方图 [(桶上界毫秒, 次数)]，最后一个桶的上界为None"""
+        bounds = [bound * 1000 for bound in BUCKET_BOUNDS] + [None]
+        return list(zip(bounds, self.counts))
+
+    def summary(self):
+        """窗口内耗时统计（毫秒）"""
+        ordered = sorted(self.samples)
+        count = len(ordered)
+        return {
+            'count': count,
+            'total_count': self.total_count,
+            'mean_ms': sum(ordered) * 1000 / count if count else 0.0,
+            'p50_ms': self.percentile(50, ordered) * 1000,
+            'p95_ms': self.percentile(95, ordered) * 1000,
+            'p99_ms': self.percentile(99, ordered) * 1000,
+            'max_ms': ordered[-1] * 1000 if count else 0.0,
+            'last_ms': self.samples[-1] * 1000 if count else 0.0,
+        }
+
+
+class StageTimer:
+    """检测循环的分阶段计时，每个阶段一个滚动直方图
+
+    使用 time.perf_counter（单调、高精度）计时，调用方自己取起始时间:
+
+        start = time.perf_counter()
+        ...
+        start = timer.lap(STAGE_CAPTURE, start)
+
+    每次记录只有一次加锁和一次二分查找，可以在正常运行时一直开启。
+    设置了 tracer（Tracer）时，lap 记录的每个阶段同时写入跟踪时间线。
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.enabled = True
+        self.tracer = None
+        self._lock = threading.Lock()
+        self._stages = {}  # {阶段名: RollingHistogram}
+
+    def record(self, stage, seconds):
+        """记录一次阶段耗时（秒）"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = RollingHistogram(self.window)
+                self._stages[stage] = histogram
+            histogram.record(seconds)
+
+    def lap(self, stage, start):
+        """记录从 start 到现在的耗时，返回当前时间作为下一阶段的起点"""
+        now = time.perf_counter()
+        self.record(stage, now - start)
+        if self.tracer is not None:
+            self.tracer.complete(stage, start, now, "stage")
+        return now
+
+    def histogram(self, stage):
+        """阶段的直方图 [(桶上界毫秒, 次数)]，没有记录时返回None"""
+        with self._lock:
+            histogram = self._stages.get(stage)
+            return histogram.buckets() if histogram is not None else None
+
+    def stats(self):
+        """各阶段耗时统计 {阶段名: 统计}，固定阶段在前，各模板的匹配阶段在后"""
+        with self._lock:
+            summaries = {stage: histogram.summary() for stage, histogram in self._stages.items()}
+        ordered = {stage: summaries[stage] for stage in STAGES if stage in summaries}
+        for stage in sorted(summaries):
+            ordered.setdefault(stage, summaries[stage])
+        return ordered
+
+    def reset(self):
+        """清空所有统计"""
+        with self._lock:
+            self._stages.clear()
@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import nullcontext
+
+# 环形缓冲区最多保留的事件数，超出后丢弃最早的事件
+TRACE_CAPACITY = 200000
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """获取全局跟踪器，检测线程、点击、托盘和界面线程共用"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+        return _tracer
+
+
+class _Span:
+    """记录一段代码耗时的上下文管理器"""
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.tracer.complete(self.name, self.start, time.perf_counter(), self.category, self.args)
+        return False
+
+
+class Tracer:
+    """记录检测和点击过程的时间线，可导出为 Chrome trace-event JSON
+
+    事件保存在有上限的环形缓冲区中，关闭时不记录任何事件；每个事件记录所在线程，
+    导出后在 chrome://tracing 或 Perfetto 中按线程（检测线程、托盘线程、界面线程等）分行显示。
+    """
+
+    def __init__(self, capacity=TRACE_CAPACITY):
+        self.enabled = False
+        self._events = deque(maxlen=capacity)  # (名称, 类别, 开始, 结束, 线程ID, 参数)
+        self._threads = {}  # {线程ID: 线程名}
+        self._origin = time.perf_counter()
+
+    def set_enabled(self, enabled):
+        """开启或关闭记录"""
+        self.enabled = bool(enabled)
+
+    def _thread_id(self):
+        """当前线程ID，首次出现时记录线程名"""
+        tid = threading.get_native_id()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        return tid
+
+    def complete(self, name, start, end, category="detect", args=None):
+        """记录一个已结束的时间段，start/end 为 time.perf_counter() 的值"""
+        if self.enabled:
+            self._events.append((name, category, start, end, self._thread_id(), args))
+
+    def instant(self, name, category="event", args=None):
+        """记录一个瞬时事件"""
+        if self.enabled:
+            now = time.perf_counter()
+            self._events.append((name, category, now, None, self._thread_id(), args))
+
+    def span(self, name, category="detect", **args):
+        """记录 with 代码块的耗时，关闭时不做任何事"""
+        if not self.enabled:
+            return nullcontext()
+        return _Span(self, name, category, args or None)
+
+    def __len__(self):
+        return len(self._events)
+
+    def clear(self):
+        """清空已记录的事件"""
+        self._events.clear()
+
+    def trace_events(self):
+        """转换为 trace-event 格式的事件列表，时间单位为微秒"""
+        pid = os.getpid()
+        events = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+            for tid, name in list(self._threads.items())
+        ]
+        for name, category, start, end, tid, args in list(self._events):
+            event = {
+                'name': name,
+                'cat': category,
+                'pid': pid,
+                'tid': tid,
+                'ts': round((start - self._origin) * 1e6, 3),
+            }
+            if end is None:
+                event['ph'] = 'i'
+                event['s'] = 't'
+            else:
+                event['ph'] = 'X'
+                event['dur'] = round((end - start) * 1e6, 3)
+            if args:
+                event['args'] = args
+            events.append(event)
+        return events
+
+    def export(self, path):
+        """导出为 Chrome trace-event JSON，返回导出的事件数"""
+        events = self.trace_events()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        return len(events)
@@ -0,0 +1,129 @@
+import threading
+from collections import deque
+
+
+def template_key(template):
+    """模板的跟踪键，内容相同的模板共用同一记录，不同缩放比例分开记录"""
+    if template.digest:
+        return template.digest
+    if template.scale != 1.0:
+        return f"{template.path}@{template.scale:g}"
+    return template.path
+
+
+class RoiTracker:
+    """记录每个模板最近的命中位置，优先在其附近的区域内搜索
+
+    区域内未命中时立即回退到变化区域或全屏搜索（按钮可能移动到了别处）；
+    连续 full_search_misses 次未命中后放弃该位置，不再先搜索该区域。
+    """
+
+    def __init__(self, padding=40, full_search_misses=3, history=3):
+        self.padding = padding
+        self.full_search_misses = full_search_misses
+        self.history = history
+        self._lock = threading.Lock()
+        self._locations = {}  # {模板键: 最近命中位置}
+        self._misses = {}  # {模板键: 连续未命中次数}
+        self._scores = {}  # {模板键: 最近一次完整匹配的得分}
+
+        # 统计信息
+        self.roi_hits = 0
+        self.roi_misses = 0
+        self.full_searches = 0
+        self.signature_hits = 0
+
+    def configure(self, config):
+        """从配置同步跟踪参数"""
+        self.padding = config.roi_padding
+        self.full_search_misses = config.roi_full_search_misses
+
+    def regions(self, template, frame_shape):
+        """返回模板的候选搜索区域 [(x0, y0, x1, y1)]，没有历史位置时返回空列表"""
+        with self._lock:
+            locations = list(self._locations.get(template_key(template), ()))
+
+        height, width = frame_shape[:2]
+        regions = []
+        for x, y in locations:
+            x0 = max(0, x - self.padding)
+            y0 = max(0, y - self.padding)
+            x1 = min(width, x + template.width + self.padding)
+            y1 = min(height, y + template.height + self.padding)
+            if x1 - x0 >= template.width and y1 - y0 >= template.height:
+                regions.append((x0, y0, x1, y1))
+        return regions
+
+    def last_hit(self, template):
+        """最近一次命中的 (位置, 完整匹配得分)，没有时返回None"""
+        key = template_key(template)
+        with self._lock:
+            locations = self._locations.get(key)
+            return (locations[0], self._scores.get(key)) if locations else None
+
+    def record_signature_hit(self, template):
+        """记录一次像素签名确认的命中，位置不变"""
+        key = template_key(template)
+        with self._lock:
+            self._misses[key] = 0
+            self.signature_hits += 1
+
+    def record_hit(self, template, location, score=None, from_roi=False):
+        """记录命中位置和得分，签名确认时沿用该得分，与其他模板的匹配得分可比较"""
+        key = template_key(template)
+        with self._lock:
+            locations = self._locations.setdefault(key, deque(maxlen=self.history))
+            if location in locations:
+                locations.remove(location)
+            locations.appendleft(location)
+            self._misses[key] = 0
+            self._scores[key] = score
+            if from_roi:
+                self.roi_hits += 1
+
+    def record_miss(self, template):
+        """记录区域内未命中，连续未命中达到 full_search_misses 次时放弃该模板的历史位置，返回是否已放弃"""
+        key = template_key(template)
+        with self._lock:
+            self.roi_misses += 1
+            misses = self._misses.get(key, 0) + 1
+            if misses >= self.full_search_misses:
+                self._misses.pop(key, None)
+                self._locations.pop(key, None)
+                self._scores.pop(key, None)
+                return True
+            self._misses[key] = misses
+            return False
+
+    def has_pending_misses(self):
+        """是否有模板在最近命中位置附近未命中、还没有重新找到"""
+        with self._lock:
+            return any(self._misses.values())
+
+    def record_full_search(self):
+        """记录一次全屏搜索"""
+        with self._lock:
+            self.full_searches += 1
+
+    def reset(self):
+        """清空历史位置和统计"""
+        with self._lock:
+            self._locations.clear()
+            self._misses.clear()
+            self._scores.clear()
+            self.roi_hits = 0
+            self.roi_misses = 0
+            self.full_searches = 0
+            self.signature_hits = 0
+
+    def stats(self):
+        """返回命中统计"""
+        with self._lock:
+            total = self.roi_hits + self.roi_misses
+            return {
+                'roi_hits': self.roi_hits,
+                'roi_misses': self.roi_misses,
+                'full_searches': self.full_searches,
+                'signature_hits': self.signature_hits,
+                'roi_hit_rate': self.roi_hits / total if total else 0.0,
+            }
@@ -4,6 +4,7 @@ import threading
 from PIL import Image
 import pystray
 from pystray import MenuItem as item
+from core.tracer import get_tracer
 
 class TrayIconHandler:
     def __init__(self, icon_path, title="Auto Clicker", on_show=None, on_toggle=None, on_quit=None):
@@ -26,21 +27,29 @@ class TrayIconHandler:
                 
             # 创建系统托盘图标
             menu = (
-                item('显示', self.on_show if self.on_show else self._dummy_action),
-                item('开始/停止', self.on_toggle if self.on_toggle else self._dummy_action),
-                item('退出', self.on_quit if self.on_quit else self._quit_app)
+                item('显示', self._traced("tray_show", self.on_show or self._dummy_action)),
+                item('开始/停止', self._traced("tray_toggle", self.on_toggle or self._dummy_action)),
+                item('退出', self._traced("tray_quit", self.on_quit or self._quit_app))
             )
             
             self.tray_icon = pystray.Icon(self.title, tray_image, self.title, menu)
             
             # 在单独的线程中运行系统托盘图标
-            threading.Thread(target=self.tray_icon.run, daemon=True).start()
+            threading.Thread(target=self.tray_icon.run, daemon=True, name="tray").start()
             return True
         except Exception as e:
             # 如果创建托盘图标失败，记录错误但不中断程序
             print(f"创建系统托盘图标失败: {str(e)}")
             return False
     
+    @staticmethod
+    def _traced(name, action):
+        """菜单操作在跟踪时间线上记录为托盘线程中的一段"""
+        def traced_action():
+            with get_tracer().span(name, "tray"):
+                action()
+        return traced_action
+        
     def _dummy_action(self):
         """空操作"""
         pass
@@ -1,6 +1,5 @@
 import os
 import sys
-import time
 import threading
 import keyboard
 from datetime import datetime
@@ -20,6 +19,7 @@ from gui.panels.debug_panel import DebugPanel
 # 导入功能模块
 from core.detector import ImageDetector
 from core.clicker import MouseClicker
+from core.click_loop import ClickLoop
 from core.tray_handler import TrayIconHandler
 
 class AutoClickerGUI:
@@ -64,7 +64,7 @@ class AutoClickerGUI:
         self.setup_tray()
         
         # 创建功能组件
-        self.detector = ImageDetector(self.config, self.log)
+        self.detector = ImageDetector(self.config, self.log, self.image_panel.registry)
         self.clicker = MouseClicker(self.log)
         
         # 设置ESC键停止监听
@@ -225,6 +225,12 @@ class AutoClickerGUI:
             self.status_label.config(text="状态: 已强制停止")
             self.log_panel.enable_interval_entry(True)
             self.log("强制停止点击 (ESC键被按下)")
+            self.export_trace_on_stop()
+
+    def export_trace_on_stop(self):
+        """开启了跟踪记录时，停止点击后导出时间线"""
+        if self.debug_panel.tracer.enabled:
+            self.debug_panel.export_trace()
 
     def log(self, message):
         """添加日志"""
@@ -309,7 +315,7 @@ class AutoClickerGUI:
             self.status_label.config(text="状态: 等待目标窗口")
             self.log_panel.enable_interval_entry(False)  # 禁用输入
             self.log(f"开始自动点击，检测间隔: {self.config.interval}秒")
-            threading.Thread(target=self.clicking_thread, daemon=True).start()
+            threading.Thread(target=self.clicking_thread, daemon=True, name="clicking_thread").start()
         else:
             # 停止点击
             self.running = False
@@ -317,62 +323,36 @@ class AutoClickerGUI:
             self.status_label.config(text="状态: 已停止")
             self.log_panel.enable_interval_entry(True)  # 启用输入
             self.log("停止自动点击")
+            self.export_trace_on_stop()
 
     def clicking_thread(self):
         """点击线程"""
         last_status = ""
-        
-        while self.running:
-            try:
-                # 获取目标图片
-                target_images = self.image_panel.get_target_images()
-                
-                # 检查窗口状态
-                from utils.window_utils import check_window_status
-                is_active, status = check_window_status(self.config.window_title)
-                
-                # 状态发生变化时更新UI
-                if status != last_status:
-                    self.update_status(f"状态: {status}")
-                    last_status = status
+        loop = ClickLoop(self.config, self.detector, self.clicker, logger=self.log)
+        
+        def get_target_images():
+            # 每轮检测前同步界面上的选项
+            loop.ignore_window_state = self.ignore_window_state.get()
+            loop.debug_mode = self.debug_mode.get()
+            loop.pause = self.pause
+            return self.image_panel.get_target_images()
+        
+        def on_step(step):
+            nonlocal last_status
+            # 状态发生变化时更新UI
+            if step.status != last_status:
+                self.update_status(f"状态: {step.status}")
+                last_status = step.status
                 
-                # 检查是否忽略窗口状态
-                if self.ignore_window_state.get() or is_active:
-                    # 定位目标
-                    result = self.detector.locate_target(
-                        target_images, 
-                        self.debug_mode.get(), 
-                        self.pause
-                    )
-                    
-                    if result and result[0]:
-                        click_pos, hwnd = result
-                        
-                        # 执行点击操作
-                        if not self.debug_mode.get() or not self.pause:
-                            self.clicker.perform_click(
-                                click_pos[0], 
-                                click_pos[1], 
-                                hwnd, 
-                                self.config.click_method, 
-                                self.config.click_count, 
-                                self.config.click_interval
-                            )
-                            # 点击成功后等待较长时间
-                            time.sleep(0.5)
-                        else:
-                            # 调试模式下等待用户单步操作
-                            time.sleep(0.1)
-                    else:
-                        # 未找到按钮时使用设定的间隔
-                        time.sleep(self.config.interval)
-                else:
-                    # 窗口未激活时使用较长的休眠时间
-                    time.sleep(0.5)
-                    
-            except Exception as e:
-                self.log(f"发生错误: {str(e)}")
-                time.sleep(1)
+            # 调试模式下在调试面板显示颜色预筛选统计和各阶段耗时
+            if step.active and loop.debug_mode and self.config.color_key:
+                self.root.after(0, self.debug_panel.update_color_key_stats,
+                                self.detector.get_color_key_stats())
+            if step.active and loop.debug_mode:
+                self.root.after(0, self.debug_panel.update_stage_stats,
+                                self.detector.get_stage_stats())
+        
+        loop.run(get_target_images, lambda: self.running, on_step=on_step)
 
     def update_status(self, status):
         """更新状态标签"""
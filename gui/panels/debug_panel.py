@@ -1,13 +1,17 @@
 import os
+import cv2
 import tkinter as tk
+from datetime import datetime
 from tkinter import ttk
 from PIL import Image, ImageTk
+from core.tracer import get_tracer
 
 class DebugPanel:
     def __init__(self, parent, debug_dir, log_func=None):
         self.parent = parent
         self.debug_dir = debug_dir
         self.log_func = log_func
+        self.tracer = get_tracer()
         
         # 调试状态
         self.last_screen = None
@@ -64,6 +68,24 @@ class DebugPanel:
         )
         self.match_info.pack(side=tk.LEFT, padx=5)
         
+        # 识别统计标签
+        self.stats_info = ttk.Label(
+            info_frame,
+            text="",
+            font=('Consolas', 9),
+            justify='left'
+        )
+        self.stats_info.pack(side=tk.LEFT, padx=15)
+        
+        # 分阶段耗时标签
+        self.timing_info = ttk.Label(
+            info_frame,
+            text="",
+            font=('Consolas', 9),
+            justify='left'
+        )
+        self.timing_info.pack(side=tk.LEFT, padx=15)
+        
         # 底部控制栏
         control_frame = ttk.Frame(debug_inner)
         control_frame.pack(fill=tk.X, side=tk.BOTTOM, pady=5)
@@ -86,6 +108,25 @@ class DebugPanel:
         )
         open_folder_btn.pack(side=tk.LEFT, padx=5)
         
+        # 跟踪开关，运行中随时开启或关闭，停止点击时自动导出
+        self.trace_var = tk.BooleanVar(value=self.tracer.enabled)
+        trace_check = ttk.Checkbutton(
+            control_frame,
+            text="记录跟踪",
+            variable=self.trace_var,
+            command=self.toggle_trace
+        )
+        trace_check.pack(side=tk.LEFT, padx=(15, 5))
+        
+        # 导出跟踪按钮
+        export_trace_btn = ttk.Button(
+            control_frame,
+            text="导出跟踪",
+            command=self.export_trace,
+            width=15
+        )
+        export_trace_btn.pack(side=tk.LEFT, padx=5)
+        
     def update_debug_panel(self, screen, result_img, template=None):
         """更新调试面板显示"""
         try:
@@ -149,11 +190,34 @@ class DebugPanel:
         except Exception as e:
             self.log(f"更新调试面板失败: {str(e)}")
             
+    def update_color_key_stats(self, stats):
+        """更新颜色预筛选的候选统计"""
+        self.stats_info.config(text=(
+            f"颜色预筛选搜索: {stats['searches']}\n"
+            f"颜色连通域: {stats['components']}\n"
+            f"尺寸不符排除: {stats['rejected']}\n"
+            f"候选位置: {stats['candidates']} (平均 {stats['candidates_per_search']:.1f}/次)\n"
+            f"无主色改整帧搜索: {stats['skipped']}"
+        ))
+        
+    def update_stage_stats(self, stats):
+        """更新各检测阶段最近的耗时分布"""
+        with self.tracer.span("update_stage_stats", "ui"):
+            lines = [f"{'阶段':<16}{'p50':>8}{'p95':>8}{'p99':>8}  ms"]
+            for stage, stage_stats in stats.items():
+                lines.append(
+                    f"{stage:<18}{stage_stats['p50_ms']:8.2f}{stage_stats['p95_ms']:8.2f}"
+                    f"{stage_stats['p99_ms']:8.2f}"
+                )
+            self.timing_info.config(text="\n".join(lines))
+        
     def clear_debug_info(self):
         """清除调试面板信息"""
         self.screen_canvas.delete("all")
         self.result_canvas.delete("all")
         self.match_info.config(text="等待匹配...")
+        self.stats_info.config(text="")
+        self.timing_info.config(text="")
         self.last_screen = None
         self.last_match_result = None
         self.last_match_location = None
@@ -167,6 +231,29 @@ class DebugPanel:
         except:
             self.log(f"无法打开文件夹: {self.debug_dir}")
             
+    def toggle_trace(self):
+        """开启或关闭跟踪记录"""
+        self.tracer.set_enabled(self.trace_var.get())
+        if self.tracer.enabled:
+            self.log("已开启跟踪记录")
+        else:
+            self.log(f"已关闭跟踪记录，已记录 {len(self.tracer)} 个事件")
+            
+    def export_trace(self):
+        """导出跟踪时间线为 Chrome trace JSON（可用 chrome://tracing 或 Perfetto 打开）"""
+        if not len(self.tracer):
+            self.log("没有可导出的跟踪记录")
+            return None
+        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        path = os.path.join(str(self.debug_dir), f"trace_{timestamp}.json")
+        try:
+            count = self.tracer.export(path)
+        except Exception as e:
+            self.log(f"导出跟踪失败: {str(e)}")
+            return None
+        self.log(f"已导出 {count} 个跟踪事件到 {path}")
+        return path
+            
     def set_match_params(self, algorithm, confidence_threshold, x_offset, y_offset):
         """设置匹配参数"""
         self.algorithm = algorithm
@@ -2,8 +2,12 @@ import os
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from PIL import Image, ImageTk
-import cv2
 from utils.image_utils import capture_screen, find_template_match
+from core.templates import TemplateRegistry
+from core.template_cache import TemplateCache
+from core.template_spec import TemplateSpec, parse_spec
+from core.scales import format_scales
+from utils.region_utils import format_rect
 
 class ImagePanel:
     def __init__(self, parent, config, log_func=None):
@@ -16,6 +20,12 @@ class ImagePanel:
         self.image_labels = []  # 存储图片标签
         self.image_tk_refs = []  # 保持对Tkinter PhotoImage对象的引用
         self.selected_image = None  # 当前选中的图片
+        self.registry = TemplateRegistry(log_func, TemplateCache())  # 已解码的模板，编译结果缓存在磁盘上
+        for path in config.color_templates:
+            self.registry.set_grayscale(path, False)
+        for path, spec in config.template_specs.items():
+            self.registry.set_spec(path, spec)
+        self.spec_labels = {}  # {图片路径: 单独设置摘要标签}
         
         self.setup_image_area()
         
@@ -89,6 +99,12 @@ class ImagePanel:
         if not os.path.exists(image_path):
             return
             
+        # 预先解码模板
+        template = self.registry.get(image_path)
+        if template is None:
+            self.log(f"错误: 无法读取图片 '{image_path}'")
+            return
+            
         # 将图片路径添加到目标列表
         if image_path not in self.target_images:
             self.target_images.append(image_path)
@@ -98,8 +114,8 @@ class ImagePanel:
         img_frame.pack(fill=tk.X, pady=5, padx=5)
         
         try:
-            # 打开图片并缩放
-            img = Image.open(image_path)
+            # 用已加载的模板生成缩略图，不再重新解码图片文件
+            img = Image.fromarray(template.color[:, :, ::-1].copy())
             img.thumbnail((150, 150))
             img_tk = ImageTk.PhotoImage(img)
             
@@ -140,6 +156,37 @@ class ImagePanel:
             )
             path_label.pack(anchor="w", pady=2)
             
+            # 彩色匹配选项，默认灰度匹配，按钮只靠颜色区分时才需要勾选
+            color_var = tk.BooleanVar(value=not self.registry.is_grayscale(image_path))
+            color_check = ttk.Checkbutton(
+                info_frame,
+                text="彩色匹配",
+                variable=color_var,
+                command=lambda path=image_path, var=color_var: self.set_color_match(path, var.get())
+            )
+            color_check.pack(anchor="w", pady=2)
+            
+            # 单独设置: 阈值、点击偏移、搜索范围、缩放比例、优先级和检测间隔
+            spec_frame = ttk.Frame(info_frame)
+            spec_frame.pack(anchor="w", pady=2)
+            
+            spec_btn = ttk.Button(
+                spec_frame,
+                text="单独设置",
+                command=lambda path=image_path: self.edit_spec(path),
+                width=10
+            )
+            spec_btn.pack(side=tk.LEFT)
+            
+            spec_label = ttk.Label(
+                spec_frame,
+                text=self.describe_spec(self.registry.get_spec(image_path)),
+                font=('Microsoft YaHei UI', 8),
+                foreground='gray'
+            )
+            spec_label.pack(side=tk.LEFT, padx=5)
+            self.spec_labels[image_path] = spec_label
+            
             # 点击切换选择状态
             def on_click(event, frame=img_frame, path=image_path):
                 if frame.cget('style') == 'Selected.TFrame':
@@ -172,6 +219,109 @@ class ImagePanel:
         except Exception as e:
             self.log(f"添加图片失败: {str(e)}")
             
+    def set_color_match(self, image_path, color):
+        """设置图片是否使用彩色匹配"""
+        self.registry.set_grayscale(image_path, not color)
+        if color and image_path not in self.config.color_templates:
+            self.config.color_templates.append(image_path)
+        elif not color and image_path in self.config.color_templates:
+            self.config.color_templates.remove(image_path)
+        self.log(f"{os.path.basename(image_path)} 使用{'彩色' if color else '灰度'}匹配")
+            
+    @staticmethod
+    def describe_spec(spec):
+        """单独设置的简短说明"""
+        if spec is None or spec.is_default:
+            return "使用全局设置"
+        parts = []
+        if spec.threshold is not None:
+            parts.append(f"阈值 {spec.threshold:g}")
+        if spec.x_offset is not None or spec.y_offset is not None:
+            parts.append(f"偏移 ({spec.x_offset or 0}, {spec.y_offset or 0})")
+        if spec.roi is not None:
+            parts.append(f"范围 {format_rect(spec.roi)}")
+        if spec.scales is not None:
+            parts.append(f"缩放 {format_scales(spec.scales)}")
+        if spec.priority:
+            parts.append(f"优先级 {spec.priority}")
+        if spec.every > 1:
+            parts.append(f"每{spec.every}轮")
+        return ", ".join(parts)
+        
+    def edit_spec(self, image_path):
+        """编辑图片的单独设置，留空的项使用全局设置"""
+        spec = self.registry.get_spec(image_path) or TemplateSpec(image_path)
+        
+        dialog = tk.Toplevel(self.parent)
+        dialog.title(f"单独设置 - {os.path.basename(image_path)}")
+        dialog.resizable(False, False)
+        dialog.transient(self.parent.winfo_toplevel())
+        
+        fields = [
+            ("相似度阈值(0~1):", "" if spec.threshold is None else f"{spec.threshold:g}"),
+            ("X偏移:", "" if spec.x_offset is None else str(spec.x_offset)),
+            ("Y偏移:", "" if spec.y_offset is None else str(spec.y_offset)),
+            ("搜索范围(左,上,右,下 0~1):", "" if spec.roi is None else format_rect(spec.roi)),
+            ("缩放比例(例如 1,1.25):", "" if spec.scales is None else format_scales(spec.scales)),
+            ("优先级(越大越优先):", str(spec.priority)),
+            ("检测间隔(每几轮检测一次):", str(spec.every)),
+        ]
+        variables = []
+        for row, (label, value) in enumerate(fields):
+            ttk.Label(dialog, text=label).grid(row=row, column=0, sticky="w", padx=10, pady=3)
+            var = tk.StringVar(value=value)
+            ttk.Entry(dialog, textvariable=var, width=20).grid(row=row, column=1, padx=10, pady=3)
+            variables.append(var)
+            
+        ttk.Label(
+            dialog,
+            text="留空表示使用全局设置；搜索范围相对于目标窗口，超出截图区域的部分不搜索",
+            font=('Microsoft YaHei UI', 8),
+            foreground='gray'
+        ).grid(row=len(fields), column=0, columnspan=2, sticky="w", padx=10, pady=3)
+        
+        def save():
+            values = [var.get().strip() for var in variables]
+            try:
+                # 与配置文件使用同一格式解析，保证界面和配置文件的校验一致
+                new_spec = parse_spec(image_path, ";".join(values))
+                if new_spec.threshold is not None and not 0 < new_spec.threshold <= 1:
+                    raise ValueError("相似度阈值应在0~1之间")
+                if new_spec.roi is not None:
+                    left, top, right, bottom = new_spec.roi
+                    if not (0 <= left < right <= 1 and 0 <= top < bottom <= 1):
+                        raise ValueError("搜索范围应在0~1之间，且右、下大于左、上")
+            except ValueError as e:
+                messagebox.showerror("设置无效", str(e), parent=dialog)
+                return
+            self.set_spec(image_path, new_spec)
+            dialog.destroy()
+            
+        button_frame = ttk.Frame(dialog)
+        button_frame.grid(row=len(fields) + 1, column=0, columnspan=2, pady=8)
+        ttk.Button(button_frame, text="保存", command=save, width=10).pack(side=tk.LEFT, padx=5)
+        ttk.Button(
+            button_frame,
+            text="恢复全局",
+            command=lambda: (self.set_spec(image_path, None), dialog.destroy()),
+            width=10
+        ).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="取消", command=dialog.destroy, width=10).pack(side=tk.LEFT, padx=5)
+        
+    def set_spec(self, image_path, spec):
+        """保存图片的单独设置，spec为None或全部为全局设置时删除"""
+        if spec is not None and spec.is_default:
+            spec = None
+        self.registry.set_spec(image_path, spec)
+        if spec is None:
+            self.config.template_specs.pop(image_path, None)
+        else:
+            self.config.template_specs[image_path] = spec
+        label = self.spec_labels.get(image_path)
+        if label is not None:
+            label.config(text=self.describe_spec(spec))
+        self.log(f"{os.path.basename(image_path)} {self.describe_spec(spec)}")
+            
     def browse_image(self):
         """浏览并添加图片"""
         file_paths = filedialog.askopenfilenames(
@@ -193,6 +343,8 @@ class ImagePanel:
                 self.image_labels.remove((frame, path))
                 if path in self.target_images:
                     self.target_images.remove(path)
+                self.registry.remove(path)
+                self.spec_labels.pop(path, None)
                 # 销毁框架
                 frame.destroy()
                 self.log(f"已移除图片: {os.path.basename(path)}")
@@ -215,7 +367,7 @@ class ImagePanel:
         
         if screen is not None:
             # 读取目标图片
-            template = cv2.imread(self.selected_image)
+            template = self.registry.get(self.selected_image)
             if template is None:
                 self.log(f"错误: 无法读取图片 '{self.selected_image}'")
                 return
@@ -223,7 +375,7 @@ class ImagePanel:
             # 模板匹配
             match_val, match_loc, _ = find_template_match(
                 screen, 
-                template, 
+                template.color, 
                 self.config.algorithm
             )
             
@@ -251,3 +403,7 @@ class ImagePanel:
     def get_target_images(self):
         """获取目标图片列表"""
         return self.target_images
+        
+    def get_templates(self):
+        """获取已解码的目标模板，内容相同的图片只保留一个"""
+        return self.registry.get_templates(self.target_images)
@@ -1,5 +1,8 @@
 import tkinter as tk
 from tkinter import ttk
+from utils.region_utils import parse_rect, format_rect
+from core.matcher import MATCH_ENGINES, MATCH_ORDERS
+from core.scales import parse_scales, format_scales
 
 class SettingsPanel:
     def __init__(self, parent, config):
@@ -8,12 +11,33 @@ class SettingsPanel:
         
         # 创建变量
         self.confidence_var = tk.DoubleVar(value=config.confidence_threshold)
+        self.algorithm_var = tk.StringVar(value=config.algorithm)
+        self.match_workers_var = tk.IntVar(value=config.match_workers)
+        self.stop_on_first_hit_var = tk.BooleanVar(value=config.stop_on_first_hit)
+        self.find_all_var = tk.BooleanVar(value=config.find_all)
+        self.find_all_order_var = tk.StringVar(value=config.find_all_order)
+        self.match_scales_var = tk.StringVar(value=format_scales(config.match_scales))
+        self.scale_sweep_misses_var = tk.IntVar(value=config.scale_sweep_misses)
+        self.pyramid_levels_var = tk.IntVar(value=config.pyramid_levels)
+        self.pyramid_candidates_var = tk.IntVar(value=config.pyramid_candidates)
+        self.roi_tracking_var = tk.BooleanVar(value=config.roi_tracking)
+        self.roi_padding_var = tk.IntVar(value=config.roi_padding)
+        self.roi_full_search_misses_var = tk.IntVar(value=config.roi_full_search_misses)
+        self.signature_check_var = tk.BooleanVar(value=config.signature_check)
+        self.signature_tolerance_var = tk.IntVar(value=config.signature_tolerance)
+        self.color_key_var = tk.BooleanVar(value=config.color_key)
+        self.change_gating_var = tk.BooleanVar(value=config.change_gating)
+        self.change_threshold_var = tk.IntVar(value=config.change_threshold)
+        self.dirty_regions_var = tk.BooleanVar(value=config.dirty_regions)
         self.click_method_var = tk.StringVar(value=config.click_method)
         self.clicks_var = tk.IntVar(value=config.click_count)
         self.click_interval_var = tk.DoubleVar(value=config.click_interval)
         self.x_offset_var = tk.IntVar(value=config.x_offset)
         self.y_offset_var = tk.IntVar(value=config.y_offset)
         self.window_title_var = tk.StringVar(value=config.window_title)
+        self.capture_window_var = tk.BooleanVar(value=config.capture_window)
+        self.capture_rect_var = tk.StringVar(value=format_rect(config.capture_rect))
+        self.capture_backend_var = tk.StringVar(value=config.capture_backend)
         self.start_minimized_var = tk.BooleanVar(value=config.start_minimized)
         self.auto_start_var = tk.BooleanVar(value=config.auto_start)
         self.save_screenshots_var = tk.BooleanVar(value=config.save_screenshots)
@@ -61,14 +85,221 @@ class SettingsPanel:
         
         self.confidence_var.trace("w", update_similarity_label)
         
-        # 匹配算法信息
+        # 匹配算法选择
+        algorithm_frame = ttk.Frame(similarity_frame)
+        algorithm_frame.grid(row=1, column=0, columnspan=3, sticky="w", pady=5)
+        
         algorithm_label = ttk.Label(
-            similarity_frame,
-            text="匹配算法: TM_CCOEFF_NORMED (推荐)",
+            algorithm_frame,
+            text="匹配算法:",
+            font=('Microsoft YaHei UI', 9)
+        )
+        algorithm_label.grid(row=0, column=0, sticky="w")
+        
+        algorithm_combo = ttk.Combobox(
+            algorithm_frame,
+            textvariable=self.algorithm_var,
+            values=list(MATCH_ENGINES),
+            state="readonly",
+            width=20
+        )
+        algorithm_combo.grid(row=0, column=1, padx=5)
+        
+        algorithm_hint = ttk.Label(
+            algorithm_frame,
+            text="FFT_NCC: 图片较多时更快; EXACT: 图片与屏幕像素完全一致时最快",
             font=('Microsoft YaHei UI', 9),
             foreground='gray'
         )
-        algorithm_label.grid(row=1, column=0, columnspan=3, sticky="w", pady=5)
+        algorithm_hint.grid(row=0, column=2, sticky="w", padx=5)
+        
+        # 金字塔匹配设置
+        pyramid_frame = ttk.Frame(similarity_frame)
+        pyramid_frame.grid(row=2, column=0, columnspan=3, sticky="w", pady=5)
+        
+        pyramid_levels_label = ttk.Label(pyramid_frame, text="金字塔层数(0=关闭):")
+        pyramid_levels_label.grid(row=0, column=0, sticky="w")
+        
+        pyramid_levels_spin = ttk.Spinbox(
+            pyramid_frame,
+            from_=0,
+            to=2,
+            width=5,
+            textvariable=self.pyramid_levels_var
+        )
+        pyramid_levels_spin.grid(row=0, column=1, padx=5)
+        
+        pyramid_candidates_label = ttk.Label(pyramid_frame, text="候选数量:")
+        pyramid_candidates_label.grid(row=0, column=2, sticky="w", padx=5)
+        
+        pyramid_candidates_spin = ttk.Spinbox(
+            pyramid_frame,
+            from_=1,
+            to=10,
+            width=5,
+            textvariable=self.pyramid_candidates_var
+        )
+        pyramid_candidates_spin.grid(row=0, column=3, padx=5)
+        
+        # 区域跟踪设置
+        roi_frame = ttk.Frame(similarity_frame)
+        roi_frame.grid(row=3, column=0, columnspan=3, sticky="w", pady=5)
+        
+        roi_check = ttk.Checkbutton(
+            roi_frame,
+            text="优先搜索上次位置",
+            variable=self.roi_tracking_var
+        )
+        roi_check.grid(row=0, column=0, sticky="w")
+        
+        roi_padding_label = ttk.Label(roi_frame, text="扩展像素:")
+        roi_padding_label.grid(row=0, column=1, sticky="w", padx=5)
+        
+        roi_padding_spin = ttk.Spinbox(
+            roi_frame,
+            from_=0,
+            to=500,
+            increment=10,
+            width=5,
+            textvariable=self.roi_padding_var
+        )
+        roi_padding_spin.grid(row=0, column=2, padx=5)
+        
+        roi_misses_label = ttk.Label(roi_frame, text="放弃跟踪(次):")
+        roi_misses_label.grid(row=0, column=3, sticky="w", padx=5)
+        
+        roi_misses_spin = ttk.Spinbox(
+            roi_frame,
+            from_=1,
+            to=50,
+            width=5,
+            textvariable=self.roi_full_search_misses_var
+        )
+        roi_misses_spin.grid(row=0, column=4, padx=5)
+        
+        signature_check = ttk.Checkbutton(
+            roi_frame,
+            text="像素签名快速确认",
+            variable=self.signature_check_var
+        )
+        signature_check.grid(row=1, column=0, sticky="w", pady=(5, 0))
+        
+        signature_tolerance_label = ttk.Label(roi_frame, text="签名容差:")
+        signature_tolerance_label.grid(row=1, column=1, sticky="w", padx=5, pady=(5, 0))
+        
+        signature_tolerance_spin = ttk.Spinbox(
+            roi_frame,
+            from_=0,
+            to=64,
+            width=5,
+            textvariable=self.signature_tolerance_var
+        )
+        signature_tolerance_spin.grid(row=1, column=2, padx=5, pady=(5, 0))
+        
+        color_key_check = ttk.Checkbutton(
+            roi_frame,
+            text="按按钮颜色预筛选",
+            variable=self.color_key_var
+        )
+        color_key_check.grid(row=1, column=3, columnspan=2, sticky="w", padx=5, pady=(5, 0))
+        
+        # 画面变化检测设置
+        change_frame = ttk.Frame(similarity_frame)
+        change_frame.grid(row=4, column=0, columnspan=3, sticky="w", pady=5)
+        
+        change_check = ttk.Checkbutton(
+            change_frame,
+            text="画面未变化时跳过匹配",
+            variable=self.change_gating_var
+        )
+        change_check.grid(row=0, column=0, sticky="w")
+        
+        change_threshold_label = ttk.Label(change_frame, text="变化阈值(越小越灵敏):")
+        change_threshold_label.grid(row=0, column=1, sticky="w", padx=5)
+        
+        change_threshold_spin = ttk.Spinbox(
+            change_frame,
+            from_=0,
+            to=64,
+            width=5,
+            textvariable=self.change_threshold_var
+        )
+        change_threshold_spin.grid(row=0, column=2, padx=5)
+        
+        dirty_regions_check = ttk.Checkbutton(
+            change_frame,
+            text="只搜索变化区域",
+            variable=self.dirty_regions_var
+        )
+        dirty_regions_check.grid(row=0, column=3, sticky="w", padx=5)
+        
+        # 并行匹配设置
+        parallel_frame = ttk.Frame(similarity_frame)
+        parallel_frame.grid(row=5, column=0, columnspan=3, sticky="w", pady=5)
+        
+        match_workers_label = ttk.Label(parallel_frame, text="匹配线程数:")
+        match_workers_label.grid(row=0, column=0, sticky="w")
+        
+        match_workers_spin = ttk.Spinbox(
+            parallel_frame,
+            from_=1,
+            to=16,
+            width=5,
+            textvariable=self.match_workers_var
+        )
+        match_workers_spin.grid(row=0, column=1, padx=5)
+        
+        stop_on_first_hit_check = ttk.Checkbutton(
+            parallel_frame,
+            text="靠前的图片匹配成功后停止",
+            variable=self.stop_on_first_hit_var
+        )
+        stop_on_first_hit_check.grid(row=0, column=2, sticky="w", padx=5)
+        
+        find_all_check = ttk.Checkbutton(
+            parallel_frame,
+            text="多目标模式（一次点击所有目标）",
+            variable=self.find_all_var
+        )
+        find_all_check.grid(row=1, column=0, columnspan=2, sticky="w", pady=(5, 0))
+        
+        find_all_order_label = ttk.Label(parallel_frame, text="点击顺序:")
+        find_all_order_label.grid(row=1, column=2, sticky="w", padx=5, pady=(5, 0))
+        
+        find_all_order_combo = ttk.Combobox(
+            parallel_frame,
+            textvariable=self.find_all_order_var,
+            values=list(MATCH_ORDERS),
+            width=10,
+            state="readonly"
+        )
+        find_all_order_combo.grid(row=1, column=3, sticky="w", pady=(5, 0))
+        
+        # 多尺度匹配设置
+        scale_frame = ttk.Frame(similarity_frame)
+        scale_frame.grid(row=6, column=0, columnspan=3, sticky="w", pady=5)
+        
+        match_scales_label = ttk.Label(scale_frame, text="缩放比例(例如 1,1.25,1.5):")
+        match_scales_label.grid(row=0, column=0, sticky="w")
+        
+        match_scales_entry = ttk.Entry(
+            scale_frame,
+            textvariable=self.match_scales_var,
+            width=16
+        )
+        match_scales_entry.grid(row=0, column=1, padx=5)
+        
+        scale_sweep_label = ttk.Label(scale_frame, text="重新搜索间隔(次):")
+        scale_sweep_label.grid(row=0, column=2, sticky="w", padx=5)
+        
+        scale_sweep_spin = ttk.Spinbox(
+            scale_frame,
+            from_=1,
+            to=100,
+            width=5,
+            textvariable=self.scale_sweep_misses_var
+        )
+        scale_sweep_spin.grid(row=0, column=3, padx=5)
         
         # 点击方式设置
         click_frame = ttk.LabelFrame(settings_inner, text="点击方式设置", padding=8)
@@ -176,6 +407,44 @@ class SettingsPanel:
         )
         window_title_entry.grid(row=0, column=1, padx=5, pady=5, sticky="w")
         
+        # 截图范围设置
+        capture_window_check = ttk.Checkbutton(
+            window_frame,
+            text="只截取窗口范围",
+            variable=self.capture_window_var
+        )
+        capture_window_check.grid(row=1, column=0, sticky="w", pady=5)
+        
+        capture_rect_label = ttk.Label(window_frame, text="相对区域(左,上,右,下):")
+        capture_rect_label.grid(row=2, column=0, sticky="w", pady=5)
+        
+        capture_rect_entry = ttk.Entry(
+            window_frame,
+            textvariable=self.capture_rect_var,
+            width=25
+        )
+        capture_rect_entry.grid(row=2, column=1, padx=5, pady=5, sticky="w")
+        
+        capture_backend_label = ttk.Label(window_frame, text="截图方式:")
+        capture_backend_label.grid(row=3, column=0, sticky="w", pady=5)
+        
+        capture_backend_combo = ttk.Combobox(
+            window_frame,
+            textvariable=self.capture_backend_var,
+            values=["pyautogui", "imagegrab", "mss"],
+            state="readonly",
+            width=22
+        )
+        capture_backend_combo.grid(row=3, column=1, padx=5, pady=5, sticky="w")
+        
+        capture_backend_hint = ttk.Label(
+            window_frame,
+            text="推荐mss: 截图最快，且只有mss会复用截图缓冲区；pyautogui/imagegrab每次截图都分配新内存",
+            font=('Microsoft YaHei UI', 9),
+            foreground='gray'
+        )
+        capture_backend_hint.grid(row=3, column=2, sticky="w", padx=5)
+        
         # 其他设置
         other_frame = ttk.LabelFrame(settings_inner, text="其他设置", padding=8)
         other_frame.pack(fill=tk.X, pady=5)
@@ -207,12 +476,41 @@ class SettingsPanel:
     def update_config(self):
         """更新配置"""
         self.config.confidence_threshold = self.confidence_var.get()
+        self.config.algorithm = self.algorithm_var.get()
+        self.config.match_workers = max(1, self.match_workers_var.get())
+        self.config.stop_on_first_hit = self.stop_on_first_hit_var.get()
+        self.config.find_all = self.find_all_var.get()
+        self.config.find_all_order = self.find_all_order_var.get()
+        try:
+            self.config.match_scales = parse_scales(self.match_scales_var.get())
+        except ValueError:
+            # 输入无效时保留原设置
+            self.match_scales_var.set(format_scales(self.config.match_scales))
+        self.config.scale_sweep_misses = self.scale_sweep_misses_var.get()
+        self.config.pyramid_levels = self.pyramid_levels_var.get()
+        self.config.pyramid_candidates = self.pyramid_candidates_var.get()
+        self.config.roi_tracking = self.roi_tracking_var.get()
+        self.config.roi_padding = self.roi_padding_var.get()
+        self.config.roi_full_search_misses = self.roi_full_search_misses_var.get()
+        self.config.signature_check = self.signature_check_var.get()
+        self.config.signature_tolerance = self.signature_tolerance_var.get()
+        self.config.color_key = self.color_key_var.get()
+        self.config.change_gating = self.change_gating_var.get()
+        self.config.change_threshold = self.change_threshold_var.get()
+        self.config.dirty_regions = self.dirty_regions_var.get()
         self.config.click_method = self.click_method_var.get()
         self.config.click_count = self.clicks_var.get()
         self.config.click_interval = self.click_interval_var.get()
         self.config.x_offset = self.x_offset_var.get()
         self.config.y_offset = self.y_offset_var.get()
         self.config.window_title = self.window_title_var.get()
+        self.config.capture_window = self.capture_window_var.get()
+        self.config.capture_backend = self.capture_backend_var.get()
+        try:
+            self.config.capture_rect = parse_rect(self.capture_rect_var.get())
+        except ValueError:
+            # 输入无效时保留原设置
+            self.capture_rect_var.set(format_rect(self.config.capture_rect))
         self.config.start_minimized = self.start_minimized_var.get()
         self.config.auto_start = self.auto_start_var.get()
         self.config.save_screenshots = self.save_screenshots_var.get()
@@ -221,12 +519,33 @@ class SettingsPanel:
         """获取设置值"""
         return {
             'confidence_var': self.confidence_var.get(),
+            'algorithm_var': self.algorithm_var.get(),
+            'match_workers_var': self.match_workers_var.get(),
+            'stop_on_first_hit_var': self.stop_on_first_hit_var.get(),
+            'find_all_var': self.find_all_var.get(),
+            'find_all_order_var': self.find_all_order_var.get(),
+            'match_scales_var': self.match_scales_var.get(),
+            'scale_sweep_misses_var': self.scale_sweep_misses_var.get(),
+            'pyramid_levels_var': self.pyramid_levels_var.get(),
+            'pyramid_candidates_var': self.pyramid_candidates_var.get(),
+            'roi_tracking_var': self.roi_tracking_var.get(),
+            'roi_padding_var': self.roi_padding_var.get(),
+            'roi_full_search_misses_var': self.roi_full_search_misses_var.get(),
+            'signature_check_var': self.signature_check_var.get(),
+            'signature_tolerance_var': self.signature_tolerance_var.get(),
+            'color_key_var': self.color_key_var.get(),
+            'change_gating_var': self.change_gating_var.get(),
+            'change_threshold_var': self.change_threshold_var.get(),
+            'dirty_regions_var': self.dirty_regions_var.get(),
             'click_method_var': self.click_method_var.get(),
             'clicks_var': self.clicks_var.get(),
             'click_interval_var': self.click_interval_var.get(),
             'x_offset_var': self.x_offset_var.get(),
             'y_offset_var': self.y_offset_var.get(),
             'window_title_var': self.window_title_var.get(),
+            'capture_window_var': self.capture_window_var.get(),
+            'capture_rect_var': self.capture_rect_var.get(),
+            'capture_backend_var': self.capture_backend_var.get(),
             'start_minimized_var': self.start_minimized_var.get(),
             'auto_start_var': self.auto_start_var.get(),
             'save_screenshots_var': self.save_screenshots_var.get()
@@ -0,0 +1,78 @@
+"""无界面回放运行点击循环
+
+用录制的截图代替屏幕、模拟的窗口代替 win32 窗口查询、记录点击代替鼠标操作，
+完整运行与界面相同的检测和点击循环，输出时间线。不需要Windows，例如:
+
+    python headless.py --replay debug --templates 1.png 2.png 3.png --timeline timeline.json
+"""
+import argparse
+from pathlib import Path
+
+from config import Config
+from core.capture import ReplaySource
+from core.headless import FakeWindow, HeadlessRunner
+from core.tracer import get_tracer
+from utils.region_utils import parse_rect
+
+ROOT_DIR = Path(__file__).parent
+DEFAULT_TEMPLATES = ["1.png", "2.png", "3.png"]
+
+
+def build_parser():
+    """构造命令行参数解析器"""
+    parser = argparse.ArgumentParser(description="Claude自动点击器无界面回放")
+    parser.add_argument("--replay", default=str(ROOT_DIR / "debug"), help="回放截图的目录或zip压缩包")
+    parser.add_argument("--templates", nargs="+", default=DEFAULT_TEMPLATES, help="模板图片")
+    parser.add_argument("--settings", default="", help="加载的配置文件（settings.ini格式）")
+    parser.add_argument("--window-rect", default="", help="模拟窗口在截图中的位置 左,上,右,下（像素），默认整张截图")
+    parser.add_argument("--ticks", type=int, default=0, help="运行轮数，0为播放完所有截图")
+    parser.add_argument("--loop", action="store_true", help="循环回放（需要同时指定 --ticks）")
+    parser.add_argument("--find-all", action="store_true", help="使用多目标模式")
+    parser.add_argument("--timeline", default="", help="保存时间线JSON的路径")
+    parser.add_argument("--trace", default="", help="保存 Chrome trace JSON 的路径（chrome://tracing 或 Perfetto 打开）")
+    parser.add_argument("--verbose", action="store_true", help="输出检测日志")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    if args.loop and not args.ticks:
+        print("错误: 循环回放时需要用 --ticks 指定运行轮数")
+        return
+
+    config = Config()
+    if args.settings:
+        config.load_from_file(args.settings)
+    if args.find_all:
+        config.find_all = True
+
+    tracer = get_tracer()
+    tracer.set_enabled(bool(args.trace))
+
+    rect = tuple(int(v) for v in parse_rect(args.window_rect)) if args.window_rect else None
+    source = ReplaySource(args.replay, loop=args.loop)
+    runner = HeadlessRunner(
+        config,
+        source,
+        [str(ROOT_DIR / p) if not Path(p).is_absolute() else p for p in args.templates],
+        FakeWindow(config.window_title, rect),
+        logger=print if args.verbose else None
+    )
+    timeline = runner.run(args.ticks or None)
+
+    for event in timeline:
+        clicks = ", ".join(f"({c['x']}, {c['y']})" for c in event['clicks'])
+        print(f"[{event['time']:8.3f}s] 第{event['tick']}轮 检测 {event['detect_ms']:8.2f} ms"
+              + (f"  点击 {clicks}" if clicks else "  未找到"))
+    print(f"\n统计: {runner.summary()}")
+
+    if args.timeline:
+        runner.write_timeline(args.timeline)
+        print(f"时间线已保存到 {args.timeline}")
+    if args.trace:
+        count = tracer.export(args.trace)
+        print(f"已导出 {count} 个跟踪事件到 {args.trace}")
+
+
+if __name__ == "__main__":
+    main()
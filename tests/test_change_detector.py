@@ -0,0 +1,24 @@
+"""画面变化检测的回归测试"""
+import numpy as np
+
+from core.change_detector import FrameChangeDetector
+
+
+def test_slow_change_accumulates_against_processed_frame():
+    detector = FrameChangeDetector(threshold=4)
+    frame = np.full((240, 320, 3), 100, np.uint8)
+    assert detector.should_process(frame)
+
+    # 每轮只变亮3级，相对上一轮始终不超过阈值，但相对最近处理的帧会累积超过阈值
+    processed = 0
+    for tick in range(1, 41):
+        frame = frame.copy()
+        frame[80:160, 120:200] = 100 + 3 * tick
+        if detector.should_process(frame):
+            processed += 1
+            # 变化区域相对最近处理的帧计算，覆盖整个变亮的区域
+            assert len(detector.changed_regions) == 1
+            x0, y0, x1, y1 = detector.changed_regions[0]
+            assert x0 <= 120 and y0 <= 80 and x1 >= 200 and y1 >= 160
+
+    assert processed == 20  # 每两轮累积6级，超过阈值4
@@ -0,0 +1,72 @@
+"""无界面回放的回归测试"""
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from config import Config
+from core.capture import ReplaySource
+from core.headless import FakeWindow, HeadlessRunner
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SCREEN = next(iter(sorted((ROOT_DIR / "debug").glob("screen_*.png"))), None)
+TEMPLATES = [str(ROOT_DIR / name) for name in ("1.png", "2.png", "3.png")]
+MOVED_TO = (200, 300)  # 按钮移动后的左上角
+
+
+def locate(frame, template):
+    """模板在截图中的左上角"""
+    result = cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)
+    _, score, _, location = cv2.minMaxLoc(result)
+    assert score > 0.9
+    return location
+
+
+def write_moved_prompt(directory):
+    """生成"按钮移动"的截图序列: 原位置 -> 被遮住两帧（画面不变）-> 出现在新位置
+
+    返回按钮在原位置和新位置的范围 (left, top, right, bottom)。
+    """
+    frame = cv2.imread(str(SCREEN))
+    template = cv2.imread(TEMPLATES[-1])
+    height, width = template.shape[:2]
+    x, y = locate(frame, template)
+    button = frame[y:y + height, x:x + width].copy()
+
+    covered = frame.copy()
+    fill = np.median(frame[max(0, y - 20):y, x:x + width].reshape(-1, 3), axis=0)
+    covered[max(0, y - 4):y + height + 4, max(0, x - 4):x + width + 4] = fill
+    moved = covered.copy()
+    mx, my = MOVED_TO
+    moved[my:my + height, mx:mx + width] = button
+
+    for index, image in enumerate([frame, covered, covered, moved, moved]):
+        cv2.imwrite(str(directory / f"screen_{index:02d}.png"), image)
+    return (x, y, x + width, y + height), (mx, my, mx + width, my + height)
+
+
+def inside(click, box):
+    left, top, right, bottom = box
+    return left <= click['x'] < right and top <= click['y'] < bottom
+
+
+@pytest.mark.skipif(SCREEN is None, reason="没有录制的调试截图")
+def test_moved_prompt_is_found_at_new_position(tmp_path):
+    original, moved = write_moved_prompt(tmp_path)
+    config = Config()
+    config.roi_tracking = True
+    config.change_gating = True
+    config.dirty_regions = True
+
+    runner = HeadlessRunner(config, ReplaySource(str(tmp_path), loop=False), TEMPLATES, FakeWindow(config.window_title))
+    timeline = runner.run()
+
+    clicks = [event['clicks'] for event in timeline]
+    assert len(clicks) == 5
+    assert clicks[0] and all(inside(click, original) for click in clicks[0])
+    assert not clicks[1] and not clicks[2]
+    # 按钮在原位置消失后，画面不变的帧也不能跳过
+    assert runner.detector.get_change_stats()['skipped_frames'] == 0
+    for tick in (3, 4):
+        assert clicks[tick] and all(inside(click, moved) for click in clicks[tick])
@@ -0,0 +1,51 @@
+"""模板匹配的回归测试"""
+from pathlib import Path
+
+import cv2
+import pytest
+
+from core.matcher import TemplateMatcher
+from core.template_spec import TemplateSpec
+from core.templates import TemplateRegistry
+from core.tracker import RoiTracker
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SCREEN = next(iter(sorted((ROOT_DIR / "debug").glob("screen_*.png"))), None)
+BUTTON = (717, 966)  # 3.png 在调试截图中的位置
+# 目标窗口在截图中的范围，右下部分超出截图（只截取了窗口的一部分）
+WINDOW = (600, 800, 1400, 1300)
+
+
+@pytest.fixture
+def frame():
+    if SCREEN is None:
+        pytest.skip("没有录制的调试截图")
+    return cv2.imread(str(SCREEN))
+
+
+@pytest.fixture
+def template():
+    return TemplateRegistry().get(str(ROOT_DIR / "3.png"))
+
+
+def test_roi_is_relative_to_window(frame, template):
+    matcher = TemplateMatcher()
+    # 窗口左上四分之一: (600, 800) - (1000, 1050)，包含按钮
+    template.spec = TemplateSpec(template.path, roi=(0, 0, 0.5, 0.5))
+    assert template.spec.roi_region(frame.shape, WINDOW) == (600, 800, 1000, 1050)
+    assert matcher.find_best(frame, [template], 0.8, window=WINDOW).location == BUTTON
+    # 同样的比例相对整张截图时不包含按钮
+    best = matcher.find_best(frame, [template], 0.8)
+    assert best is None or best.score < 0.8
+
+
+def test_tracked_search_stays_inside_roi(frame, template):
+    matcher = TemplateMatcher(tracker=RoiTracker())
+    matcher.signature_check = True
+    template.spec = TemplateSpec(template.path, roi=(0, 0, 1, 1))
+    assert matcher.find_best(frame, [template], 0.8, window=WINDOW).location == BUTTON
+
+    # 缩小搜索范围后，最近命中位置的签名确认和附近区域搜索都不能返回范围外的按钮
+    template.spec = TemplateSpec(template.path, roi=(0, 0, 0.5, 0.3))
+    best = matcher.find_best(frame, [template], 0.8, window=WINDOW)
+    assert best is None or best.score < 0.8
@@ -1,20 +1,60 @@
 import cv2
 import numpy as np
-from PIL import ImageGrab, Image
-import win32gui
+from PIL import Image
 import os
-import pyautogui
+import threading
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import pyautogui
+except Exception:
+    # 没有图形界面的环境（例如Linux服务器）无法导入pyautogui，仅保留纯图像处理函数
+    pyautogui = None
+from utils.window_utils import get_window_rect
+from utils.region_utils import CaptureRegion, window_capture_region
+from utils.tile_utils import match_tiled
 
-def capture_screen(hwnd=None):
-    """捕获屏幕区域"""
+# 大图分块匹配共用的线程池
+_tile_executor = None
+_tile_executor_lock = threading.Lock()
+
+def get_tile_executor():
+    """获取分块匹配线程池，线程数等于CPU核数"""
+    global _tile_executor
+    with _tile_executor_lock:
+        if _tile_executor is None:
+            _tile_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="tile")
+        return _tile_executor
+
+def get_screen_rect():
+    """获取可截图的屏幕范围"""
+    width, height = pyautogui.size()
+    return 0, 0, width, height
+
+def get_capture_region(hwnd=None, sub_rect=None):
+    """计算截图区域，没有窗口句柄时为全屏，窗口不在屏幕内时返回None"""
+    screen_rect = get_screen_rect()
+    if not hwnd:
+        return CaptureRegion(0, 0, screen_rect[2], screen_rect[3])
+    return window_capture_region(hwnd, get_window_rect, screen_rect, sub_rect)
+
+def capture_window(hwnd=None, sub_rect=None):
+    """截取窗口（或窗口的相对子区域）范围内的屏幕，返回截图和截图区域"""
     try:
-        # 使用pyautogui截取全屏，确保识别一致性
-        screenshot = pyautogui.screenshot()
+        region = get_capture_region(hwnd, sub_rect)
+        if region is None:
+            return None, None
+        # 使用pyautogui截图，确保识别一致性
+        screenshot = pyautogui.screenshot(region=(region.left, region.top, region.width, region.height))
         # 转换为OpenCV格式
-        return cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+        return cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR), region
     except Exception as e:
         print(f"截屏错误: {str(e)}")
-        return None
+        return None, None
+
+def capture_screen(hwnd=None):
+    """捕获屏幕区域，指定窗口句柄时只截取该窗口范围"""
+    screen, region = capture_window(hwnd)
+    return screen
 
 def find_template_match(screen, template, method_name=None):
     """在屏幕图像中查找模板匹配"""
@@ -35,8 +75,8 @@ def find_template_match(screen, template, method_name=None):
             # 使用最佳匹配算法 TM_CCOEFF_NORMED
             match_method = cv2.TM_CCOEFF_NORMED
             
-            # 模板匹配
-            result = cv2.matchTemplate(screen, template, match_method)
+            # 模板匹配，大图分块并行，结果与整图匹配相同
+            result = match_tiled(screen, template, match_method, get_tile_executor())
             min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
             
             # TM_CCOEFF_NORMED 算法下值越大表示匹配度越高
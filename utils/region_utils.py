@@ -0,0 +1,96 @@
+class CaptureRegion:
+    """截图区域，记录截图左上角在屏幕上的位置，用于把匹配坐标换算回屏幕坐标"""
+
+    def __init__(self, left, top, width, height):
+        self.left = int(left)
+        self.top = int(top)
+        self.width = int(width)
+        self.height = int(height)
+
+    @property
+    def right(self):
+        return self.left + self.width
+
+    @property
+    def bottom(self):
+        return self.top + self.height
+
+    @property
+    def bbox(self):
+        """区域 (left, top, right, bottom)"""
+        return self.left, self.top, self.right, self.bottom
+
+    def to_screen(self, point):
+        """截图内坐标转换为屏幕坐标"""
+        return self.left + int(point[0]), self.top + int(point[1])
+
+    def to_frame(self, point):
+        """屏幕坐标转换为截图内坐标"""
+        return int(point[0]) - self.left, int(point[1]) - self.top
+
+    def rect_to_frame(self, rect):
+        """屏幕坐标的矩形 (left, top, right, bottom) 转换为截图内坐标，可超出截图"""
+        return self.to_frame(rect[:2]) + self.to_frame(rect[2:])
+
+    def __eq__(self, other):
+        return isinstance(other, CaptureRegion) and self.bbox == other.bbox
+
+    def __repr__(self):
+        return f"CaptureRegion(left={self.left}, top={self.top}, width={self.width}, height={self.height})"
+
+
+def parse_rect(value):
+    """解析 "左,上,右,下" 格式的相对区域"""
+    parts = [float(v) for v in str(value).split(",")]
+    if len(parts) != 4:
+        raise ValueError(f"无效的区域: {value}")
+    return tuple(parts)
+
+
+def format_rect(rect):
+    """将相对区域格式化为 "左,上,右,下" """
+    return ",".join(f"{v:g}" for v in rect)
+
+
+def sub_rect_of(rect, sub_rect=None):
+    """按相对比例 (左, 上, 右, 下) 取矩形的子区域，比例取值0~1"""
+    left, top, right, bottom = rect
+    if not sub_rect:
+        return left, top, right, bottom
+    width = right - left
+    height = bottom - top
+    sl, st, sr, sb = sub_rect
+    return (
+        left + int(round(width * sl)),
+        top + int(round(height * st)),
+        left + int(round(width * sr)),
+        top + int(round(height * sb))
+    )
+
+
+def intersect_rect(rect, bounds):
+    """两个矩形的交集，没有交集时返回None"""
+    left = max(rect[0], bounds[0])
+    top = max(rect[1], bounds[1])
+    right = min(rect[2], bounds[2])
+    bottom = min(rect[3], bounds[3])
+    if right <= left or bottom <= top:
+        return None
+    return left, top, right, bottom
+
+
+def window_capture_region(hwnd, geometry, screen_rect, sub_rect=None):
+    """计算窗口（或窗口子区域）在屏幕上的截图区域
+
+    geometry 是根据窗口句柄返回 (left, top, right, bottom) 的函数，获取失败返回None；
+    screen_rect 是可截图的屏幕范围。窗口完全在屏幕外（例如最小化）时返回None。
+    """
+    if not hwnd:
+        return None
+    window_rect = geometry(hwnd)
+    if not window_rect:
+        return None
+    rect = intersect_rect(sub_rect_of(window_rect, sub_rect), screen_rect)
+    if rect is None:
+        return None
+    return CaptureRegion(rect[0], rect[1], rect[2] - rect[0], rect[3] - rect[1])
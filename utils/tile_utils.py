@@ -0,0 +1,45 @@
+import cv2
+import numpy as np
+
+# 分块匹配时每块结果图的边长，结果图不超过一块时不分块
+TILE_SIZE = 1024
+
+
+def tile_grid(result_shape, tile_size=TILE_SIZE):
+    """将匹配结果图划分为不重叠的块 [(x0, y0, x1, y1)]"""
+    height, width = result_shape[:2]
+    tiles = []
+    for y0 in range(0, height, tile_size):
+        for x0 in range(0, width, tile_size):
+            tiles.append((x0, y0, min(width, x0 + tile_size), min(height, y0 + tile_size)))
+    return tiles
+
+
+def match_tiled(frame, template, method=cv2.TM_CCOEFF_NORMED, executor=None, tile_size=TILE_SIZE):
+    """分块匹配，返回与 cv2.matchTemplate 尺寸相同的结果图
+
+    每块结果图对应的帧区域向右下多取模板尺寸减1的像素，相邻帧块因此重叠，
+    结果图各块互不重叠且拼起来正好覆盖整张结果图。给定线程池时各块并行匹配。
+    """
+    th, tw = template.shape[:2]
+    result_shape = (frame.shape[0] - th + 1, frame.shape[1] - tw + 1)
+    if result_shape[0] <= 0 or result_shape[1] <= 0:
+        raise ValueError("模板尺寸大于截图")
+
+    tiles = tile_grid(result_shape, tile_size)
+    if len(tiles) == 1:
+        return cv2.matchTemplate(frame, template, method)
+
+    result = np.empty(result_shape, np.float32)
+
+    def match_tile(tile):
+        x0, y0, x1, y1 = tile
+        result[y0:y1, x0:x1] = cv2.matchTemplate(frame[y0:y1 + th - 1, x0:x1 + tw - 1], template, method)
+
+    if executor is None:
+        for tile in tiles:
+            match_tile(tile)
+    else:
+        for future in [executor.submit(match_tile, tile) for tile in tiles]:
+            future.result()
+    return result
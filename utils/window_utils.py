@@ -1,6 +1,10 @@
-import win32gui
-import win32con
-import win32api
+try:
+    import win32gui
+    import win32con
+    import win32api
+except ImportError:
+    # 非Windows环境（例如在Linux上离线回放测试）下窗口相关函数不可用
+    win32gui = win32con = win32api = None
 
 def find_window(title):
     """根据窗口标题查找窗口"""
@@ -41,6 +45,9 @@ def is_window_foreground(hwnd):
 
 def check_window_status(window_title):
     """综合检查目标窗口是否激活"""
+    if win32gui is None:
+        return False, "当前系统不支持窗口检测"
+        
     hwnd = find_window(window_title)
     if not hwnd:
         return False, f"等待{window_title}窗口"
@@ -70,6 +77,14 @@ def get_window_rect(hwnd):
     except:
         return None
 
+def get_window_monitor(hwnd):
+    """获取窗口所在显示器的矩形区域，用于区分不同缩放比例的显示器"""
+    try:
+        monitor = win32api.MonitorFromWindow(hwnd, win32con.MONITOR_DEFAULTTONEAREST)
+        return tuple(win32api.GetMonitorInfo(monitor)['Monitor'])
+    except:
+        return None
+
 def screen_to_client(hwnd, point):
     """屏幕坐标转窗口客户坐标"""
     try: